@@ -0,0 +1,142 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del tempo di avvio: misura in processi separati il tempo di import di pdnd_client.client
+e pdnd_client.jwt_generator e quello della CLI con --token-only e un token valido in cache,
+al netto dell'avvio dell'interprete (python -c pass). Riporta anche quali dipendenze pesanti
+(requests, PyJWT, cryptography, ...) risultano caricate dopo l'import.
+
+Con --budget il comando termina con codice 1 se il tempo netto di uno scenario (mediana meno
+l'avvio dell'interprete) supera il budget in millisecondi: può essere usato in CI per evitare regressioni del tempo di avvio.
+
+Esempio:
+    python -m benchmarks.import_time --runs 20 --budget 150
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from pdnd_client.client import PDNDClient
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = ("requests", "urllib3", "jwt", "cryptography", "httpx")
+TOKEN_PURPOSE = "benchmark-import-time"
+
+# Stampa le dipendenze pesanti presenti in sys.modules dopo l'import indicato.
+_IMPORT_CHECK = (
+    "import sys, json; import {module}; "
+    "print(json.dumps([m for m in {heavy!r} if m in sys.modules]))"
+)
+
+
+def _run(command: list, env: dict = None) -> tuple[float, str]:
+    started = time.perf_counter()
+    completed = subprocess.run(command, cwd=ROOT, env=env, capture_output=True, text=True, check=True)
+    return time.perf_counter() - started, completed.stdout
+
+
+def measure(command: list, runs: int, env: dict = None) -> tuple[list, str]:
+    _run(command, env)  # riscaldamento: cache del filesystem e bytecode già compilato
+    samples = []
+    output = ""
+    for _ in range(runs):
+        elapsed, output = _run(command, env)
+        samples.append(elapsed)
+    return samples, output
+
+
+# Prepara configurazione e token in cache per lo scenario della CLI con --token-only.
+# Restituisce il comando, il token atteso in output e il file del token da rimuovere al termine.
+def prepare_cli(directory: str) -> tuple[list, str, str]:
+    config_path = os.path.join(directory, "config.json")
+    with open(config_path, "w", encoding="utf-8") as f:
+        json.dump({"benchmark": {"purposeId": TOKEN_PURPOSE}}, f)
+
+    token = "benchmark-token"
+    token_file = os.path.join(tempfile.gettempdir(), f"pdnd_token_{TOKEN_PURPOSE}.json")
+    PDNDClient().save_token(token, int(time.time()) + 3600, token_file)
+    command = [sys.executable, "main.py", "--config", config_path, "--env", "benchmark", "--token-only"]
+    return command, token, token_file
+
+
+def import_command(module: str) -> list:
+    return [sys.executable, "-c", _IMPORT_CHECK.format(module=module, heavy=HEAVY_MODULES)]
+
+
+def run(args) -> dict:
+    env = {**os.environ, "PYTHONPATH": ROOT}
+    baseline, _ = measure([sys.executable, "-c", "pass"], args.runs, env)
+    baseline_ms = statistics.median(baseline) * 1000
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        cli_command, token, token_file = prepare_cli(directory)
+        commands = {
+            "import_client": import_command("pdnd_client.client"),
+            "import_jwt_generator": import_command("pdnd_client.jwt_generator"),
+            "cli_token_only": cli_command
+        }
+        try:
+            measured = {
+                name: measure(command, args.runs, env)
+                for name, command in commands.items() if not args.only or name in args.only
+            }
+        finally:
+            os.unlink(token_file)
+
+        for name, (samples, output) in measured.items():
+            if name == "cli_token_only" and output.strip() != token:
+                raise RuntimeError(f"❌ La CLI con --token-only non ha restituito il token in cache: {output!r}")
+            median_ms = statistics.median(samples) * 1000
+            result = {
+                "name": name,
+                "runs": args.runs,
+                "median_ms": round(median_ms, 2),
+                "min_ms": round(min(samples) * 1000, 2),
+                "net_ms": round(max(median_ms - baseline_ms, 0.0), 2)
+            }
+            if name.startswith("import_"):
+                result["heavy_modules"] = json.loads(output)
+            results.append(result)
+            if not args.quiet:
+                print(f"{name:<22} mediana {result['median_ms']:8.2f} ms   netto {result['net_ms']:8.2f} ms",
+                      file=sys.stderr)
+
+    report = {"python": sys.version.split()[0], "baseline_ms": round(baseline_ms, 2), "results": results}
+    if args.budget is not None:
+        report["budget_ms"] = args.budget
+        report["over_budget"] = [r["name"] for r in results if r["net_ms"] > args.budget]
+    return report
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark del tempo di avvio del client PDND")
+    parser.add_argument("--runs", type=int, default=10, help="Esecuzioni per scenario")
+    parser.add_argument("--budget", type=float, help="Tempo massimo netto in ms per scenario (codice 1 se superato)")
+    parser.add_argument("--only", nargs="+", choices=("import_client", "import_jwt_generator", "cli_token_only"),
+                        help="Scenari da eseguire")
+    parser.add_argument("--output", help="File in cui scrivere il risultato JSON (default: stdout)")
+    parser.add_argument("--quiet", action="store_true", help="Non stampare il riepilogo su stderr")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+    if report.get("over_budget"):
+        print(f"❌ Budget di avvio superato: {', '.join(report['over_budget'])}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
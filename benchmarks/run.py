@@ -0,0 +1,340 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark del client PDND contro un server locale che simula autenticazione ed e-service.
+Misura throughput e latenze (p50/p95/p99) di get_api, get_api_many, paginate, del client
+asincrono, di request_token e di load_token/save_token sotto concorrenza, e produce
+un risultato JSON confrontabile tra versioni diverse (--compare).
+
+Esempio:
+    python -m benchmarks.run --iterations 500 --concurrency 16 --output risultati.json
+    python -m benchmarks.run --compare risultati.json
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from importlib import metadata
+
+from benchmarks.server import StandInServer
+from pdnd_client.client import PDNDClient
+from pdnd_client.jwt_generator import JWTGenerator
+from pdnd_client.metrics import Instrumentation, percentile
+from pdnd_client.pagination import OffsetPagination
+from pdnd_client.rate_limit import RateLimiter
+from pdnd_client.retry import RetryPolicy
+from pdnd_client.transport import Transport
+
+SCENARIOS = (
+    "get_api", "get_api_gzip", "get_api_many", "paginate", "async_get_api", "rate_limited",
+    "request_token", "request_token_reuse", "save_token", "load_token"
+)
+
+
+def summarize(name: str, latencies: list, wall: float, concurrency: int, errors: int = 0, **extra) -> dict:
+    count = len(latencies)
+    return {
+        "name": name,
+        "iterations": count,
+        "concurrency": concurrency,
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput": count / wall if wall > 0 else 0.0,
+        "latency": {
+            "mean": sum(latencies) / count if count else 0.0,
+            "min": min(latencies, default=0.0),
+            "p50": percentile(latencies, 50),
+            "p95": percentile(latencies, 95),
+            "p99": percentile(latencies, 99),
+            "max": max(latencies, default=0.0)
+        },
+        **extra
+    }
+
+
+# Esegue fn iterations volte su concurrency thread e misura la latenza di ogni chiamata.
+def measure(name: str, fn, iterations: int, concurrency: int, warmup: int = 5, **extra) -> dict:
+    for _ in range(min(warmup, iterations)):
+        fn()
+
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+
+    def timed(_):
+        nonlocal errors
+        started = time.perf_counter()
+        try:
+            fn()
+        except Exception:
+            with lock:
+                errors += 1
+            return
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        list(executor.map(timed, range(iterations)))
+    return summarize(name, latencies, time.perf_counter() - started, concurrency, errors, **extra)
+
+
+def make_client(server: StandInServer, concurrency: int, path: str = "/api") -> PDNDClient:
+    transport = Transport(pool_connections=4, pool_maxsize=max(concurrency, 10))
+    client = PDNDClient()
+    client.set_transport(transport)
+    client.set_token("benchmark-token")
+    client.set_api_url(server.url + path)
+    return client
+
+
+# Scrive una chiave RSA temporanea e restituisce la configurazione del generatore.
+def make_generator_config(directory: str) -> dict:
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    key_path = os.path.join(directory, "benchmark_key.pem")
+    with open(key_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM,
+            serialization.PrivateFormat.PKCS8,
+            serialization.NoEncryption()
+        ))
+    return {"kid": "kid", "issuer": "issuer", "clientId": "clientId", "purposeId": "purposeId",
+            "privKeyPath": key_path}
+
+
+def bench_get_api(server, args) -> dict:
+    client = make_client(server, args.concurrency)
+    result = measure("get_api", client.get_api, args.iterations, args.concurrency,
+                     payload_size=args.payload_size)
+    client.get_transport().close()
+    return result
+
+
+# get_api con body compresso con gzip: riporta anche i byte ricevuti e quelli decompressi.
+def bench_get_api_gzip(_, args) -> dict:
+    instrumentation = Instrumentation()
+    with StandInServer(latency=args.latency, payload_size=args.payload_size, compress=True) as server:
+        client = make_client(server, args.concurrency)
+        client.set_instrumentation(instrumentation)
+        result = measure("get_api_gzip", client.get_api, args.iterations, args.concurrency,
+                         payload_size=args.payload_size)
+        client.get_transport().close()
+        host = server.url.split("//")[1]
+    metrics = instrumentation.metrics
+    result["received_bytes"] = metrics.get_counter("received_bytes", host=host, encoding="gzip")
+    result["decoded_bytes"] = metrics.get_counter("decoded_bytes", host=host, encoding="gzip")
+    return result
+
+
+def bench_get_api_many(server, args) -> dict:
+    client = make_client(server, args.concurrency)
+    calls = ((None, {"n": i}) for i in range(args.iterations))
+    started = time.perf_counter()
+    results = list(client.get_api_many(calls, max_workers=args.concurrency))
+    wall = time.perf_counter() - started
+    client.get_transport().close()
+    return summarize("get_api_many", [r.elapsed for r in results if r.ok], wall, args.concurrency,
+                     sum(1 for r in results if not r.ok), payload_size=args.payload_size)
+
+
+def bench_paginate(server, args) -> dict:
+    client = make_client(server, 1, "/items")
+    strategy = OffsetPagination(limit=100, items_path="items")
+    runs = max(args.iterations // 50, 3)
+    result = measure("paginate", lambda: sum(1 for _ in client.paginate(strategy)), runs, 1, warmup=1,
+                     items=server.total_items)
+    client.get_transport().close()
+    return result
+
+
+def bench_async_get_api(server, args) -> dict | None:
+    try:
+        from pdnd_client.async_client import AsyncPDNDClient
+    except ImportError:
+        return None
+
+    async def run():
+        latencies = []
+        errors = 0
+        async with AsyncPDNDClient(concurrency=args.concurrency) as client:
+            client.set_token("benchmark-token")
+            client.set_api_url(server.url + "/api")
+
+            async def timed():
+                nonlocal errors
+                started = time.perf_counter()
+                try:
+                    await client.get_api()
+                except Exception:
+                    errors += 1
+                    return
+                latencies.append(time.perf_counter() - started)
+
+            # Come negli scenari a thread, concurrency worker eseguono le chiamate una dopo l'altra:
+            # la latenza misurata non include l'attesa in coda sul semaforo del client.
+            remaining = iter(range(args.iterations))
+
+            async def worker():
+                for _ in remaining:
+                    await timed()
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            wall = time.perf_counter() - started
+        return summarize("async_get_api", latencies, wall, args.concurrency, errors,
+                         payload_size=args.payload_size)
+
+    return asyncio.run(run())
+
+
+# get_api contro un server che risponde 429 a una chiamata ogni 10, con limitatore e retry attivi.
+def bench_rate_limited(_, args) -> dict:
+    with StandInServer(latency=args.latency, payload_size=args.payload_size, throttle_every=10) as server:
+        client = make_client(server, args.concurrency)
+        client.set_rate_limiter(RateLimiter(rate=10_000, max_concurrency=args.concurrency))
+        client.set_retry_policy(RetryPolicy(max_attempts=5, backoff_base=0.01, backoff_max=0.1))
+        result = measure("rate_limited", client.get_api, args.iterations, args.concurrency)
+        result["throttled"] = server.counters["throttled"]
+        client.get_transport().close()
+    return result
+
+
+def _bench_request_token(server, args, name: str, reuse: bool) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        generator = JWTGenerator(make_generator_config(directory))
+        generator.endpoint = server.url + "/token.oauth2"
+        generator.set_transport(Transport(pool_maxsize=max(args.concurrency, 10)))
+        generator.set_reuse_assertion(reuse)
+        iterations = max(args.iterations // 5, 10)
+        result = measure(name, generator.request_token, iterations, args.concurrency)
+        generator.get_transport().close()
+    return result
+
+
+def bench_request_token(server, args) -> dict:
+    return _bench_request_token(server, args, "request_token", reuse=False)
+
+
+def bench_request_token_reuse(server, args) -> dict:
+    return _bench_request_token(server, args, "request_token_reuse", reuse=True)
+
+
+def bench_save_token(_, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        file = os.path.join(directory, "token.json")
+        client = PDNDClient()
+        return measure("save_token", lambda: client.save_token("benchmark-token", int(time.time()) + 600, file),
+                       args.iterations, args.concurrency)
+
+
+def bench_load_token(_, args) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        file = os.path.join(directory, "token.json")
+        client = PDNDClient()
+        client.save_token("benchmark-token", int(time.time()) + 600, file)
+        return measure("load_token", lambda: PDNDClient().load_token(file), args.iterations, args.concurrency)
+
+
+BENCHMARKS = {
+    "get_api": bench_get_api,
+    "get_api_gzip": bench_get_api_gzip,
+    "get_api_many": bench_get_api_many,
+    "paginate": bench_paginate,
+    "async_get_api": bench_async_get_api,
+    "rate_limited": bench_rate_limited,
+    "request_token": bench_request_token,
+    "request_token_reuse": bench_request_token_reuse,
+    "save_token": bench_save_token,
+    "load_token": bench_load_token,
+}
+
+
+def package_version() -> str:
+    try:
+        return metadata.version("pdnd-python-client")
+    except metadata.PackageNotFoundError:
+        return "dev"
+
+
+def run(args) -> dict:
+    selected = args.only or list(SCENARIOS)
+    results = []
+    with StandInServer(latency=args.latency, payload_size=args.payload_size) as server:
+        for name in selected:
+            result = BENCHMARKS[name](server, args)
+            if result is not None:
+                results.append(result)
+                if not args.quiet:
+                    latency = result["latency"]
+                    print(f"{name:<22} {result['throughput']:>10.1f} op/s  p50 {latency['p50'] * 1000:8.2f} ms  "
+                          f"p95 {latency['p95'] * 1000:8.2f} ms  p99 {latency['p99'] * 1000:8.2f} ms",
+                          file=sys.stderr)
+    return {
+        "version": package_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "iterations": args.iterations,
+            "concurrency": args.concurrency,
+            "latency": args.latency,
+            "payload_size": args.payload_size
+        },
+        "results": results
+    }
+
+
+# Confronta throughput e p95 con un risultato precedente; un rapporto > 1 indica un miglioramento.
+def compare(current: dict, baseline: dict) -> list[dict]:
+    previous = {r["name"]: r for r in baseline.get("results", [])}
+    rows = []
+    for result in current["results"]:
+        old = previous.get(result["name"])
+        if old is None:
+            continue
+        rows.append({
+            "name": result["name"],
+            "throughput_ratio": result["throughput"] / old["throughput"] if old["throughput"] else None,
+            "p95_ratio": old["latency"]["p95"] / result["latency"]["p95"] if result["latency"]["p95"] else None
+        })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark del client PDND")
+    parser.add_argument("--iterations", type=int, default=200, help="Numero di chiamate per scenario")
+    parser.add_argument("--concurrency", type=int, default=8, help="Chiamate contemporanee")
+    parser.add_argument("--latency", type=float, default=0.0, help="Latenza simulata del server in secondi")
+    parser.add_argument("--payload-size", type=int, default=16 * 1024, help="Dimensione del body in byte")
+    parser.add_argument("--only", nargs="+", choices=SCENARIOS, help="Scenari da eseguire")
+    parser.add_argument("--output", help="File in cui scrivere il risultato JSON (default: stdout)")
+    parser.add_argument("--compare", help="Risultato JSON precedente con cui confrontare")
+    parser.add_argument("--quiet", action="store_true", help="Non stampare il riepilogo su stderr")
+    args = parser.parse_args(argv)
+
+    report = run(args)
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            report["comparison"] = {"baseline": args.compare, "results": compare(report, json.load(f))}
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
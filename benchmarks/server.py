@@ -0,0 +1,227 @@
+# benchmarks/server.py
+
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+# Genera un access token con la stessa forma di quelli PDND (header.payload.firma),
+# così che JWTGenerator ne legga la scadenza dal claim exp.
+def fake_access_token(lifetime: int, purpose_id: str = "purposeId") -> str:
+    def encode(data: dict) -> str:
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+
+    payload = {"exp": int(time.time()) + lifetime, "purposeId": purpose_id, "jti": f"{time.monotonic_ns()}"}
+    return f"{encode({'alg': 'RS256', 'typ': 'at+jwt'})}.{encode(payload)}.firma"
+
+
+# Costruisce un array JSON di record di circa size byte.
+def build_payload(size: int) -> bytes:
+    record_size = 64
+    count = max(size // record_size, 1)
+    filler = "x" * (record_size - 32)
+    return json.dumps([{"id": i, "value": filler} for i in range(count)]).encode("utf-8")
+
+
+# Server HTTP locale che simula il server di autenticazione PDND (POST /token.oauth2)
+# e un e-service (GET /api e GET /items, paginato con offset/limit; POST/PUT/PATCH /api
+# leggono il body, anche in Transfer-Encoding: chunked, e ne restituiscono dimensione e sha256).
+# Il comportamento è configurabile alla creazione e, per la singola chiamata, con i parametri
+# di query latency (secondi), size (byte del body) e status (codice di risposta):
+# - latency: attesa prima di ogni risposta;
+# - payload_size: dimensione del body di /api;
+# - total_items: numero di elementi restituiti da /items;
+# - throttle_every: una chiamata ogni N riceve 429 con Retry-After: retry_after;
+# - error_every: una chiamata ogni N riceve 503;
+# - compress: il body di /api viene inviato compresso con gzip se il client lo accetta.
+# Le risposte usano HTTP/1.1 con keep-alive, come i gateway reali.
+class StandInServer:
+    def __init__(self, latency: float = 0.0, payload_size: int = 1024, total_items: int = 1000,
+                 throttle_every: int = 0, retry_after: float = 0, error_every: int = 0,
+                 token_lifetime: int = 600, compress: bool = False, host: str = "127.0.0.1", port: int = 0):
+        self.latency = latency
+        self.payload_size = payload_size
+        self.total_items = total_items
+        self.throttle_every = throttle_every
+        self.retry_after = retry_after
+        self.error_every = error_every
+        self.token_lifetime = token_lifetime
+        self.compress = compress
+        self.counters = {"requests": 0, "tokens": 0, "throttled": 0, "errors": 0}
+        self._payloads = {}
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self) -> "StandInServer":
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="pdnd-stand-in", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> bool:
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        if self._thread is not None:
+            self._thread.join()
+        return True
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+    def payload(self, size: int, compressed: bool = False) -> bytes:
+        with self._lock:
+            body = self._payloads.get((size, compressed))
+            if body is None:
+                body = build_payload(size)
+                if compressed:
+                    body = gzip.compress(body, compresslevel=6)
+                self._payloads[(size, compressed)] = body
+            return body
+
+    # Incrementa il contatore delle richieste e restituisce l'eventuale stato forzato (429/503).
+    def next_status(self) -> int | None:
+        with self._lock:
+            self.counters["requests"] += 1
+            count = self.counters["requests"]
+            if self.throttle_every and count % self.throttle_every == 0:
+                self.counters["throttled"] += 1
+                return 429
+            if self.error_every and count % self.error_every == 0:
+                self.counters["errors"] += 1
+                return 503
+        return None
+
+
+def _make_handler(server: StandInServer):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        # Header e body in un unico segmento TCP: evita i ritardi di Nagle/delayed ACK
+        # che altrimenti dominerebbero le latenze misurate in locale.
+        wbufsize = -1
+        disable_nagle_algorithm = True
+
+        def log_message(self, format, *args):
+            pass
+
+        def _send(self, status: int, body: bytes, headers: dict = None):
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _prepare(self) -> tuple[str, dict] | None:
+            parts = urlsplit(self.path)
+            query = {k: v[-1] for k, v in parse_qs(parts.query).items()}
+            time.sleep(float(query.get("latency", server.latency)))
+            status = int(query["status"]) if "status" in query else server.next_status()
+            if status == 429:
+                self._send(429, b'{"detail": "Too Many Requests"}', {"Retry-After": str(server.retry_after)})
+                return None
+            if status is not None and status >= 400:
+                self._send(status, b'{"detail": "errore simulato"}')
+                return None
+            return parts.path, query
+
+        # Legge il body a blocchi (con Content-Length o chunked) senza tenerlo in memoria.
+        def _read_body(self):
+            if self.headers.get("Transfer-Encoding", "").lower() == "chunked":
+                while True:
+                    size = int(self.rfile.readline().split(b";")[0], 16)
+                    if size == 0:
+                        self.rfile.readline()
+                        return
+                    yield self.rfile.read(size)
+                    self.rfile.readline()
+            remaining = int(self.headers.get("Content-Length") or 0)
+            while remaining > 0:
+                chunk = self.rfile.read(min(remaining, 64 * 1024))
+                if not chunk:
+                    return
+                remaining -= len(chunk)
+                yield chunk
+
+        def _receive_upload(self):
+            digest = hashlib.sha256()
+            received = 0
+            for chunk in self._read_body():
+                digest.update(chunk)
+                received += len(chunk)
+            return {
+                "method": self.command,
+                "received": received,
+                "sha256": digest.hexdigest(),
+                "chunked": self.headers.get("Transfer-Encoding", "").lower() == "chunked",
+                "content_type": self.headers.get("Content-Type")
+            }
+
+        def do_POST(self):
+            if urlsplit(self.path).path == "/api":
+                self.do_PUT()
+                return
+            form = parse_qs(b"".join(self._read_body()).decode("utf-8"))
+            prepared = self._prepare()
+            if prepared is None:
+                return
+            path, _ = prepared
+            if path != "/token.oauth2" or "client_assertion" not in form:
+                self._send(400, b'{"error": "invalid_request"}')
+                return
+            with server._lock:
+                server.counters["tokens"] += 1
+            body = {
+                "access_token": fake_access_token(server.token_lifetime),
+                "token_type": "Bearer",
+                "expires_in": server.token_lifetime
+            }
+            self._send(200, json.dumps(body).encode("utf-8"))
+
+        def do_PUT(self):
+            upload = self._receive_upload()
+            prepared = self._prepare()
+            if prepared is None:
+                return
+            if prepared[0] != "/api":
+                self._send(404, b'{"detail": "Not Found"}')
+                return
+            self._send(200, json.dumps(upload).encode("utf-8"))
+
+        do_PATCH = do_PUT
+
+        def do_GET(self):
+            prepared = self._prepare()
+            if prepared is None:
+                return
+            path, query = prepared
+            if path == "/api":
+                size = int(query.get("size", server.payload_size))
+                if server.compress and "gzip" in (self.headers.get("Accept-Encoding") or ""):
+                    self._send(200, server.payload(size, compressed=True), {"Content-Encoding": "gzip"})
+                else:
+                    self._send(200, server.payload(size))
+            elif path == "/items":
+                offset = int(query.get("offset", 0))
+                limit = int(query.get("limit", 100))
+                items = [{"id": i} for i in range(offset, min(offset + limit, server.total_items))]
+                self._send(200, json.dumps({"items": items, "total": server.total_items}).encode("utf-8"))
+            else:
+                self._send(404, b'{"detail": "Not Found"}')
+
+    return Handler
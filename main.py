@@ -6,11 +6,135 @@ Questo script gestisce gli argomenti da linea di comando, il caricamento della c
 la generazione del JWT e le interazioni con le API.
 """
 import argparse
-import json
+import sys
 import tempfile
+import time
+from pdnd_client import jsonlib
 from pdnd_client.config import Config
-from pdnd_client.jwt_generator import JWTGenerator
-from pdnd_client.client import PDNDClient
+from pdnd_client.client import BatchResult, PDNDClient
+from pdnd_client.metrics import percentile
+from pdnd_client.token_cache import token_file_lock
+
+# Stampa la risposta. Con pretty il body JSON viene decodificato una sola volta e stampato
+# indentato; se il body non è JSON viene stampato così com'è.
+def print_response(status_code: int, body: str, pretty: bool):
+    if not pretty:
+        print(body)
+        return
+    print(f"\nRisposta API [status_code: {status_code}]")
+    try:
+        print(jsonlib.dumps(jsonlib.loads(body), pretty=True))
+    except ValueError:
+        print(body)
+
+
+# Legge le richieste del batch in formato JSONL: una per riga, come oggetto
+# {"url": "...", "filters": {...} oppure "chiave=valore&..."}. url può mancare se è indicato --api-url.
+# Le righe vuote vengono ignorate; per le righe non valide viene restituito un ValueError al posto
+# della richiesta, così che il batch possa proseguire e riportare l'errore nel risultato.
+def read_batch(lines):
+    for number, line in enumerate(lines, start=1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            item = jsonlib.loads(line)
+        except ValueError:
+            yield ValueError(f"❌ Riga {number} del batch non valida: JSON non valido")
+            continue
+        if not isinstance(item, dict):
+            yield ValueError(f"❌ Riga {number} del batch non valida: è atteso un oggetto JSON")
+            continue
+        yield item.get("url"), item.get("filters")
+
+
+# Serializza un BatchResult come riga NDJSON. Il body viene riportato decodificato se è JSON.
+def batch_result_line(result) -> str:
+    line = {
+        "index": result.index,
+        "url": result.url,
+        "status_code": result.status_code if result.ok else getattr(result.error, "status_code", None),
+        "elapsed": round(result.elapsed, 6)
+    }
+    if result.ok:
+        try:
+            line["body"] = jsonlib.loads(result.body)
+        except ValueError:
+            line["body"] = result.body
+    else:
+        line["error"] = str(result.error)
+    return jsonlib.dumps(line)
+
+
+# Esegue le richieste del batch in parallelo e scrive i risultati su out in formato NDJSON,
+# nell'ordine di completamento oppure, con order="input", nell'ordine delle righe di input.
+# Le righe non valide (ValueError restituiti da read_batch) diventano righe di errore senza
+# interrompere il batch. Restituisce il riepilogo con i conteggi e i percentili delle latenze;
+# le righe non valide sono contate a parte (invalid) e non entrano nelle latenze né nel throughput.
+def run_batch(client: PDNDClient, calls, concurrency: int = 8, order: str = "completion", out=None) -> dict:
+    out = out or sys.stdout
+    latencies = []
+    statuses = {}
+    errors = 0
+    invalid_count = 0
+    buffered = {}
+    next_index = 0
+    positions = []  # posizione nell'input di ogni richiesta passata a get_api_many
+    invalid = []
+    started = time.perf_counter()
+
+    def valid_calls():
+        for position, call in enumerate(calls):
+            if isinstance(call, Exception):
+                invalid.append(BatchResult(index=position, url=None, error=call))
+            else:
+                positions.append(position)
+                yield call
+
+    def write(result, sent=True):
+        nonlocal errors, invalid_count, next_index
+        if not sent:
+            invalid_count += 1
+        else:
+            latencies.append(result.elapsed)
+            if result.ok:
+                statuses[str(result.status_code)] = statuses.get(str(result.status_code), 0) + 1
+            else:
+                errors += 1
+
+        if order == "input":
+            # I risultati arrivati in anticipo restano in attesa di quelli che li precedono.
+            buffered[result.index] = result
+            while next_index in buffered:
+                out.write(batch_result_line(buffered.pop(next_index)) + "\n")
+                next_index += 1
+        else:
+            out.write(batch_result_line(result) + "\n")
+
+    for result in client.get_api_many(valid_calls(), max_workers=concurrency):
+        result.index = positions[result.index]
+        while invalid:
+            write(invalid.pop(0), sent=False)
+        write(result)
+    while invalid:
+        write(invalid.pop(0), sent=False)
+    out.flush()
+
+    elapsed = time.perf_counter() - started
+    return {
+        "total": len(latencies) + invalid_count,
+        "ok": len(latencies) - errors,
+        "errors": errors,
+        "invalid": invalid_count,
+        "status_codes": statuses,
+        "elapsed": round(elapsed, 3),
+        "throughput": round(len(latencies) / elapsed, 1) if elapsed > 0 else 0.0,
+        "latency_ms": {
+            name: round(percentile(latencies, q) * 1000, 2)
+            for name, q in (("p50", 50), ("p95", 95), ("p99", 99))
+        }
+    }
+
 
 # Funzione principale che gestisce gli argomenti da linea di comando ed esegue la logica del client PDND.
 # Inizializza la configurazione, genera un token JWT
@@ -24,12 +148,21 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--config", default="configs/config.json", help="Percorso del file JSON di configurazione")
     parser.add_argument("--env", default="produzione", help="Chiave dell'ambiente nel file di configurazione")
-    parser.add_argument("--api-url", help="URL dell'API da chiamare con POST")
+    parser.add_argument("--api-url", help="URL dell'API da chiamare (GET, oppure il metodo indicato con --method)")
+    parser.add_argument("--method", choices=("GET", "POST", "PUT", "PATCH"), default="GET",
+                        help="Metodo HTTP della chiamata a --api-url")
+    parser.add_argument("--body", help="File da inviare come body con POST/PUT/PATCH (- per stdin)")
     parser.add_argument("--status-url", help="URL di stato da chiamare con GET")
     parser.add_argument("--debug", action="store_true", help="Abilita l'output di debug")
     parser.add_argument("--pretty", action="store_true", help="Abilita l'output dei json formattandoli in modo leggibile")
     parser.add_argument("--no-verify-ssl", action="store_true", help="Disabilita la verifica SSL")
     parser.add_argument("--api-url-filters", help="Parametri di query per l'API (es. chiave1=val1&chiave2=val2)")
+    parser.add_argument("--batch", help="File JSONL con le richieste da eseguire (- per stdin)")
+    parser.add_argument("--concurrency", type=int, default=8, help="Richieste contemporanee in modalità batch")
+    parser.add_argument("--order", choices=("completion", "input"), default="completion",
+                        help="Ordine dei risultati NDJSON in modalità batch")
+    parser.add_argument("--token-only", action="store_true",
+                        help="Stampa solo il token (dalla cache se valido) senza chiamare le API")
     args = parser.parse_args()
 
     # Carica la configurazione dal file JSON specificato e dalla chiave ambiente.
@@ -39,6 +172,7 @@ def main():
     client = PDNDClient()
     client.set_debug(args.debug)
     client.set_verify_ssl(not args.no_verify_ssl)
+    client.set_retry_policy()
     temp_dir = tempfile.gettempdir()
     client.set_token_file(f"{temp_dir}/pdnd_token_{config.get('purposeId')}.json")
     token, exp = client.load_token()
@@ -51,46 +185,70 @@ def main():
             print("\nToken valido, lo carico da file...")
             print(f"\n{token}\n")
     else:
-        if args.debug:
-            print("Token non valido o scaduto, ne richiedo uno nuovo...")
-        # Genera un token JWT usando la configurazione caricata
-        jwt_gen = JWTGenerator(config)
-        jwt_gen.set_debug(args.debug)
-        jwt_gen.set_env(args.env)
-        # Se il token non è valido, ne richiede uno nuovo
-        token, exp = jwt_gen.request_token()
-        # Salva il token per usi futuri
-        client.save_token(token, exp)
+        # Il lock sul file del token evita che più processi avviati insieme
+        # richiedano ciascuno un nuovo token: chi attende rilegge il file aggiornato.
+        with token_file_lock(client.token_file):
+            token, exp = client.load_token()
+            if not client.is_token_valid(exp):
+                if args.debug:
+                    print("Token non valido o scaduto, ne richiedo uno nuovo...")
+                # Genera un token JWT usando la configurazione caricata.
+                # Il generatore (e con esso PyJWT e cryptography) viene importato solo qui:
+                # con un token valido in cache la CLI non carica lo stack di firma.
+                from pdnd_client.jwt_generator import JWTGenerator
+                jwt_gen = JWTGenerator(config)
+                jwt_gen.set_debug(args.debug)
+                jwt_gen.set_env(args.env)
+                jwt_gen.set_retry_policy()
+                # Se il token non è valido, ne richiede uno nuovo
+                token, exp = jwt_gen.request_token()
+                # Salva il token per usi futuri
+                client.save_token(token, exp)
 
     client.set_token(token)
     client.set_expiration(exp)
 
+    # Con --token-only stampa solo il token e termina, senza chiamare alcuna API:
+    # con un token valido in cache non vengono importati né requests né lo stack di firma.
+    if args.token_only:
+        print(token)
+        return
+
     # Se l'utente ha fornito un URL di stato, effettua una richiesta GET a quell'URL.
     if args.status_url:
         client.set_status_url(args.status_url)
         status_code, response = client.get_status(args.status_url)
-        if args.debug or args.pretty:
-            print(f"\nRisposta API [status_code: {status_code}]")
-            parsed = json.loads(response)
-            # Stampa in formato leggibile
-            pretty = json.dumps(parsed, indent=2, ensure_ascii=False)
-            print(pretty)
-        else:
-            print(response)
+        print_response(status_code, response, args.debug or args.pretty)
+
+    # In modalità batch tutte le richieste condividono il token e un unico pool di connessioni.
+    # I risultati vanno su stdout in formato NDJSON, il riepilogo su stderr.
+    if args.batch:
+        from pdnd_client.transport import Transport
+        client.set_api_url(args.api_url)
+        client.set_transport(Transport(pool_maxsize=max(args.concurrency, 10)))
+        source = sys.stdin if args.batch == "-" else open(args.batch, "r", encoding="utf-8")
+        try:
+            summary = run_batch(client, read_batch(source), args.concurrency, args.order)
+        finally:
+            if source is not sys.stdin:
+                source.close()
+            client.get_transport().close()
+        print(f"\n📊 Riepilogo batch: {jsonlib.dumps(summary)}", file=sys.stderr)
+        return
 
-    # Se l'utente ha fornito un URL API, analizza i filtri ed effettua una richiesta POST a quell'URL.
+    # Se l'utente ha fornito un URL API, analizza i filtri ed effettua la chiamata a quell'URL.
+    # Con POST/PUT/PATCH il file indicato con --body viene inviato a blocchi, senza caricarlo in memoria.
     if args.api_url:
         client.set_api_url(args.api_url)
         client.set_filters(args.api_url_filters)
-        status_code, response = client.get_api(token)
-        if args.debug or args.pretty:
-            print(f"\nRisposta API [status_code: {status_code}]")
-            parsed = json.loads(response)
-            # Stampa in formato leggibile
-            pretty = json.dumps(parsed, indent=2, ensure_ascii=False)
-            print(pretty)
+        if args.method == "GET":
+            status_code, response = client.get_api(token)
+        elif args.body in (None, "-"):
+            status_code, response = client.send_api(args.method, sys.stdin.buffer if args.body else None, token)
         else:
-            print(response)
+            with open(args.body, "rb") as body:
+                status_code, response = client.send_api(args.method, body, token)
+        print_response(status_code, response, args.debug or args.pretty)
 
 # Se questo script viene eseguito direttamente, esegue la funzione main.
 # Questo consente di usare lo script come applicazione standalone.
@@ -0,0 +1,32 @@
+# pdnd_client/_lazy.py
+
+import importlib
+import threading
+
+
+# La classe LazyModule rimanda l'import di un modulo al primo accesso a un suo attributo.
+# client.py e jwt_generator.py la usano per requests, PyJWT e cryptography (e per il modulo
+# transport, che importa requests). Così importare pdnd_client resta veloce e lo stack di firma
+# viene caricato solo quando serve un nuovo client assertion: la CLI con un token valido in cache
+# non lo carica mai. Dopo il primo accesso il costo è quello di una chiamata a __getattr__.
+class LazyModule:
+    def __init__(self, name: str):
+        self.__name = name
+        self.__module = None
+        self.__lock = threading.Lock()
+
+    def _load(self):
+        module = self.__module
+        if module is None:
+            with self.__lock:
+                if self.__module is None:
+                    self.__module = importlib.import_module(self.__name)
+                module = self.__module
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __repr__(self) -> str:
+        state = "caricato" if self.__module is not None else "non caricato"
+        return f"<LazyModule {self.__name} ({state})>"
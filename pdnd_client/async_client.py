@@ -0,0 +1,292 @@
+# pdnd_client/async_client.py
+
+import asyncio
+from urllib.parse import urlsplit
+
+try:
+    import httpx
+except ImportError as e:  # pragma: no cover - dipendenza opzionale
+    raise ImportError(
+        "Il client asincrono richiede httpx: installa il pacchetto con 'pip install pdnd-python-client[async]'."
+    ) from e
+
+from pdnd_client.client import BODY_METHODS, PDNDClientBase
+from pdnd_client.exceptions import PdndCircuitOpenError, PdndException, PdndTokenError
+from pdnd_client.retry import async_call_with_retry
+from pdnd_client.jwt_generator import JWTGenerator
+from pdnd_client.singleflight import AsyncSingleFlight
+from pdnd_client.transport import DEFAULT_CONNECT_TIMEOUT, DEFAULT_READ_TIMEOUT
+from pdnd_client.upload import UPLOAD_CHUNK_SIZE, RequestBody
+
+# Le codifiche supportate da httpx possono differire da quelle di urllib3 usate dal client sincrono
+# (ad esempio zstd richiede il pacchetto zstandard): vengono richieste solo quelle che httpx sa decodificare.
+try:
+    from httpx._decoders import SUPPORTED_DECODERS
+except ImportError:  # pragma: no cover - modulo interno di httpx
+    SUPPORTED_DECODERS = ("gzip", "deflate")
+ACCEPT_ENCODING = ", ".join(encoding for encoding in SUPPORTED_DECODERS if encoding != "identity")
+
+DEFAULT_MAX_CONNECTIONS = 100
+DEFAULT_MAX_KEEPALIVE = 20
+DEFAULT_CONCURRENCY = 10
+
+# La classe AsyncTransport è l'equivalente asincrono di Transport.
+# Incapsula un httpx.AsyncClient con pool di connessioni keep-alive e timeout di connessione/lettura.
+# Con httpx la verifica SSL è una proprietà del pool e non della singola richiesta,
+# per questo viene configurata alla creazione del transport.
+# Va chiusa con aclose() oppure usata come context manager asincrono.
+class AsyncTransport:
+    def __init__(self, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 max_keepalive_connections: int = DEFAULT_MAX_KEEPALIVE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 verify_ssl: bool = True):
+        if max_connections < 1:
+            raise ValueError("Il numero massimo di connessioni deve essere maggiore di zero.")
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.verify_ssl = verify_ssl
+        self.closed = False
+        self.client = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections
+            ),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            verify=verify_ssl
+        )
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        if self.closed:
+            raise RuntimeError("Il transport è stato chiuso.")
+        return await self.client.request(method, url, **kwargs)
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
+
+    async def aclose(self) -> bool:
+        if not self.closed:
+            self.closed = True
+            await self.client.aclose()
+        return True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+
+# La classe AsyncPDNDClient rispecchia PDNDClient con metodi asincroni (get_api, get_status).
+# Le chiamate vengono eseguite su un AsyncTransport condivisibile e il numero di richieste
+# contemporaneamente in volo è limitato da un semaforo configurabile con set_concurrency().
+# La gestione di token, filtri e file del token è ereditata da PDNDClientBase. Le funzionalità
+# del solo client sincrono (TokenManager/TokenRegistry, limitatore, cache delle risposte, metriche,
+# get_api_many, paginate, streaming e download) non sono disponibili.
+class AsyncPDNDClient(PDNDClientBase):
+    def __init__(self, concurrency: int = DEFAULT_CONCURRENCY):
+        super().__init__()
+        self.owns_transport = False
+        self.set_concurrency(concurrency)
+
+    # Imposta il numero massimo di richieste contemporanee di questo client.
+    def set_concurrency(self, concurrency: int) -> bool:
+        if concurrency < 1:
+            raise ValueError("La concorrenza deve essere maggiore di zero.")
+        self.concurrency = concurrency
+        self._semaphore = asyncio.Semaphore(concurrency)
+        return True
+
+    def set_transport(self, transport: AsyncTransport) -> bool:
+        self.transport = transport
+        self.owns_transport = False
+        return True
+
+    # Se non è stato impostato un transport, ne crea uno dedicato al client
+    # che verrà chiuso insieme al client.
+    def get_transport(self) -> AsyncTransport:
+        if self.transport is None:
+            self.transport = AsyncTransport(verify_ssl=self.verify_ssl)
+            self.owns_transport = True
+        return self.transport
+
+    def _accept_encoding(self) -> str:
+        return ACCEPT_ENCODING
+
+    # Abilita l'accorpamento delle chiamate get_api identiche contemporanee (vedi PDNDClient).
+    def set_coalescing(self, coalescing=True) -> bool:
+        if isinstance(coalescing, AsyncSingleFlight):
+            self.single_flight = coalescing
+        else:
+            self.single_flight = AsyncSingleFlight() if coalescing else None
+        return True
+
+    async def get_api(self, token: str = None) -> tuple[int, str]:
+        if self.single_flight is None:
+            return await self._get_api_once(token)
+        key = (self._final_url(), self._token_fingerprint(token if token is not None else self.token))
+        return await self.single_flight.do(key, lambda: self._get_api_once(token))
+
+    # Come get_api, ma restituisce il body JSON già decodificato.
+    async def get_api_json(self, token: str = None) -> tuple[int, object]:
+        status_code, body = await self.get_api(token)
+        return status_code, self._decode_json(body)
+
+    async def _get_api_once(self, token: str = None) -> tuple[int, str]:
+        url, headers = self._build_api_request(token)
+        host = urlsplit(url).netloc
+        breaker = self.circuit_breakers.get(host) if self.circuit_breakers is not None else None
+
+        async def send():
+            try:
+                async with self._semaphore:
+                    return await self.get_transport().get(url, headers=headers)
+            except httpx.HTTPError as e:
+                raise PdndException(f"❌ Errore nella chiamata API: {e}")
+
+        response = await async_call_with_retry(send, self.retry_policy, breaker, host)
+        return self._handle_api_response(
+            response.status_code, response.text, response.is_success, response.headers, response
+        )
+
+    async def post_api(self, body=None, token: str = None, content_type: str = None) -> tuple[int, str]:
+        return await self.send_api("POST", body, token, content_type)
+
+    async def put_api(self, body=None, token: str = None, content_type: str = None) -> tuple[int, str]:
+        return await self.send_api("PUT", body, token, content_type)
+
+    async def patch_api(self, body=None, token: str = None, content_type: str = None) -> tuple[int, str]:
+        return await self.send_api("PATCH", body, token, content_type)
+
+    # Versione asincrona di PDNDClient.send_api. Oltre ai tipi di body del client sincrono
+    # accetta anche generatori asincroni; il retry si applica solo ai body che possono essere reinviati.
+    async def send_api(self, method: str, body=None, token: str = None,
+                       content_type: str = None) -> tuple[int, str]:
+        method = method.upper()
+        if method not in BODY_METHODS:
+            raise ValueError(f"Metodo non supportato: {method}. Metodi ammessi: {', '.join(BODY_METHODS)}")
+        request_body = RequestBody(body, content_type)
+        url, headers = self._build_api_request(token)
+        headers.update(request_body.headers)
+        host = urlsplit(url).netloc
+        breaker = self.circuit_breakers.get(host) if self.circuit_breakers is not None else None
+        policy = self.retry_policy if request_body.replayable else None
+
+        async def send():
+            request_body.rewind()
+            try:
+                async with self._semaphore:
+                    return await self.get_transport().request(
+                        method, url, headers=headers, content=_async_content(request_body)
+                    )
+            except httpx.HTTPError as e:
+                raise PdndException(f"❌ Errore nella chiamata API: {e}")
+
+        response = await async_call_with_retry(send, policy, breaker, host)
+        return self._handle_api_response(
+            response.status_code, response.text, response.is_success, response.headers, response
+        )
+
+    async def get_status(self, url) -> [int, str]:
+        headers = {"Authorization": f"Bearer {self.token}"}
+        async with self._semaphore:
+            response = await self.get_transport().get(url, headers=headers)
+        return response.status_code, response.text
+
+    async def aclose(self) -> bool:
+        if self.owns_transport and self.transport is not None:
+            await self.transport.aclose()
+            self.transport = None
+            self.owns_transport = False
+        return True
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+        return False
+
+
+# Converte il body nel formato accettato da httpx.AsyncClient: byte oppure iterabile asincrono.
+# I file vengono letti a blocchi; la lettura è sincrona, come per i file locali in asyncio.
+def _async_content(body: RequestBody):
+    data = body.data
+    if data is None or isinstance(data, bytes) or hasattr(data, "__aiter__"):
+        return data
+
+    async def chunks():
+        if hasattr(data, "read"):
+            while chunk := data.read(UPLOAD_CHUNK_SIZE):
+                yield chunk
+        else:
+            for chunk in data:
+                yield chunk
+
+    return chunks()
+
+
+# La classe AsyncJWTGenerator rispecchia JWTGenerator con una request_token asincrona.
+# La generazione del client_assertion è la stessa del generatore sincrono.
+class AsyncJWTGenerator(JWTGenerator):
+    def __init__(self, config):
+        super().__init__(config)
+        self.owns_transport = False
+
+    def set_transport(self, transport: AsyncTransport) -> bool:
+        self.transport = transport
+        self.owns_transport = False
+        return True
+
+    def get_transport(self) -> AsyncTransport:
+        if self.transport is None:
+            self.transport = AsyncTransport()
+            self.owns_transport = True
+        return self.transport
+
+    async def request_token(self) -> [str, int]:
+        data, headers, expiration_time = self._build_token_request()
+        host = urlsplit(self.endpoint).netloc
+        breaker = self.circuit_breakers.get(host) if self.circuit_breakers is not None else None
+
+        async def send():
+            try:
+                return await self.get_transport().post(self.endpoint, data=data, headers=headers)
+            except httpx.HTTPError as e:
+                raise PdndException(str(e))
+
+        try:
+            response = await async_call_with_retry(send, self.retry_policy, breaker, host)
+        except PdndCircuitOpenError:
+            raise
+        except PdndException as e:
+            raise PdndTokenError(
+                f"❌ Errore nella richiesta POST: {e}", attempts=e.attempts, elapsed=e.elapsed
+            ) from e
+
+        if not response.is_success:
+            raise PdndTokenError(
+                f"❌ Errore nella richiesta POST: {response.status_code} {response.text}",
+                status_code=response.status_code,
+                body=response.text,
+                attempts=response.pdnd_attempts,
+                elapsed=response.pdnd_elapsed
+            )
+
+        if response.status_code == 200:
+            self._handle_token_response(response.json(), expiration_time)
+
+        return self.token, self.token_exp
+
+    async def aclose(self) -> bool:
+        if self.owns_transport and self.transport is not None:
+            await self.transport.aclose()
+            self.transport = None
+            self.owns_transport = False
+        return True
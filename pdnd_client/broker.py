@@ -0,0 +1,314 @@
+# pdnd_client/broker.py
+
+import argparse
+import os
+import socket
+import socketserver
+import stat
+import struct
+import tempfile
+import threading
+import time
+from pdnd_client import jsonlib
+from pdnd_client.exceptions import PdndTokenError
+
+SOCKET_NAME = "pdnd_broker.sock"
+DEFAULT_CLIENT_SKEW = 30  # secondi prima di exp oltre i quali il client richiede di nuovo il token al broker
+DEFAULT_TIMEOUT = 5.0
+
+# Protocollo del broker: una richiesta JSON per riga, a cui corrisponde una risposta JSON per riga.
+# Sulla stessa connessione si possono inviare più richieste.
+#   {"op": "get", "purpose_id": "..."}                          -> {"ok": true, "token": "...", "exp": 1700000000}
+#   {"op": "refresh", "purpose_id": "...", "stale_token": "..."} -> {"ok": true, "token": "...", "exp": 1700000000}
+#   {"op": "stats"}                                              -> {"ok": true, "stats": {...}}
+# In caso di errore la risposta è {"ok": false, "error": "..."}.
+
+
+# Percorso predefinito del socket: in $XDG_RUNTIME_DIR, privata dell'utente, oppure in una cartella
+# pdnd-<uid> con permessi 0700 nella cartella temporanea. Un socket direttamente in /tmp potrebbe
+# essere creato prima da un altro utente, che riceverebbe così i token scaduti dei client.
+def default_socket_path() -> str:
+    runtime_dir = os.environ.get("XDG_RUNTIME_DIR")
+    if not runtime_dir:
+        runtime_dir = os.path.join(tempfile.gettempdir(), f"pdnd-{os.getuid()}")
+    return os.path.join(runtime_dir, SOCKET_NAME)
+
+
+# Crea (se manca) la cartella del socket con permessi 0700 e verifica che appartenga all'utente
+# e non sia accessibile ad altri.
+def _ensure_private_dir(path: str):
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o077:
+        raise PermissionError(f"La cartella del socket {path} deve appartenere all'utente e avere permessi 0700.")
+
+
+# La classe TokenBroker è un processo di lunga durata che possiede i token di un insieme di finalità
+# e li distribuisce ai processi locali (CLI, cron, worker anche in altri linguaggi) su un socket Unix.
+# I token sono gestiti da un TokenRegistry: per le finalità configurate il rinnovo parte in anticipo
+# rispetto alla scadenza, così che il server di autenticazione riceva una sola richiesta per finalità
+# e per host, e le richieste al broker non attendano mai la rete.
+# Se purposes è vuoto il broker serve qualsiasi finalità richiesta; altrimenti solo quelle indicate.
+# Il socket viene creato con permessi 0600: possono usarlo solo i processi dello stesso utente.
+class TokenBroker:
+    def __init__(self, registry, socket_path: str = None, purposes=()):
+        self.registry = registry
+        self.socket_path = socket_path or default_socket_path()
+        self.purposes = tuple(purposes)
+        self.requests = 0
+        self._requests_lock = threading.Lock()
+        self._server = None
+        self._thread = None
+        self._managers = []
+
+    def _check_purpose(self, purpose_id: str):
+        if self.purposes and purpose_id not in self.purposes:
+            raise ValueError(f"Finalità non gestita dal broker: {purpose_id}")
+
+    # Esegue una richiesta del protocollo e restituisce la risposta.
+    def handle(self, request: dict) -> dict:
+        with self._requests_lock:
+            self.requests += 1
+        op = request.get("op")
+        try:
+            if op == "stats":
+                return {"ok": True, "stats": {**self.registry.stats(), "requests": self.requests}}
+            if op not in ("get", "refresh"):
+                raise ValueError(f"Operazione non valida: {op}")
+            purpose_id = request.get("purpose_id") or self.registry.jwt_generator.purposeId
+            self._check_purpose(purpose_id)
+            manager = self.registry.get_manager(purpose_id)
+            if op == "refresh":
+                token = manager.refresh(stale_token=request.get("stale_token"))
+            else:
+                token = manager.get_token()
+            return {"ok": True, "token": token, "exp": manager.get_expiration()}
+        except Exception as e:
+            return {"ok": False, "error": str(e)}
+
+    # Crea il socket e avvia il broker in un thread; per ogni finalità configurata
+    # avvia il rinnovo in anticipo del token.
+    def start(self) -> "TokenBroker":
+        if not hasattr(socketserver, "ThreadingUnixStreamServer"):
+            raise RuntimeError("Il broker richiede i socket Unix, non disponibili su questa piattaforma.")
+        if os.path.dirname(self.socket_path) == os.path.dirname(default_socket_path()):
+            _ensure_private_dir(os.path.dirname(self.socket_path))
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)  # socket rimasto da un'esecuzione precedente
+
+        old_umask = os.umask(0o177)
+        try:
+            self._server = socketserver.ThreadingUnixStreamServer(self.socket_path, _make_handler(self))
+        finally:
+            os.umask(old_umask)
+        self._server.daemon_threads = True
+
+        for purpose_id in self.purposes:
+            manager = self.registry.get_manager(purpose_id)
+            manager.start()
+            self._managers.append(manager)
+
+        self._thread = threading.Thread(target=self._server.serve_forever, args=(0.1,), name="pdnd-broker",
+                                        daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> bool:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        for manager in self._managers:
+            manager.stop()
+        self._managers = []
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+        return True
+
+    # Avvia il broker e resta in attesa fino a un'interruzione (Ctrl+C / SIGTERM gestito dal chiamante).
+    def serve_forever(self):
+        self.start()
+        try:
+            self._thread.join()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.stop()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
+
+
+def _make_handler(broker: TokenBroker):
+    class Handler(socketserver.StreamRequestHandler):
+        def handle(self):
+            for line in self.rfile:
+                try:
+                    request = jsonlib.loads(line)
+                    if not isinstance(request, dict):
+                        raise ValueError("La richiesta deve essere un oggetto JSON")
+                    response = broker.handle(request)
+                except ValueError as e:
+                    response = {"ok": False, "error": f"Richiesta non valida: {e}"}
+                self.wfile.write(jsonlib.dumps(response).encode("utf-8") + b"\n")
+                self.wfile.flush()
+
+    return Handler
+
+
+# La classe BrokerTokenSource ottiene i token da un TokenBroker locale.
+# Espone la stessa interfaccia di TokenManager (get_token, refresh) e di TokenRegistry (get_manager),
+# quindi può essere usata con client.set_token_manager() oppure client.set_token_registry().
+# Il token ricevuto viene tenuto in memoria fino a skew secondi prima della scadenza:
+# nella maggior parte delle chiamate non c'è nemmeno la richiesta al broker.
+# La connessione al socket è persistente e viene riaperta automaticamente se cade.
+# Prima di inviare richieste il client verifica che il broker sia in esecuzione con lo stesso utente.
+class BrokerTokenSource:
+    def __init__(self, socket_path: str = None, purpose_id: str = None,
+                 skew: float = DEFAULT_CLIENT_SKEW, timeout: float = DEFAULT_TIMEOUT):
+        self.socket_path = socket_path or default_socket_path()
+        self.purpose_id = purpose_id
+        self.skew = skew
+        self.timeout = timeout
+        self.token = None
+        self.token_exp = None
+        self._sources = {}
+        self._sock = None
+        self._file = None
+        self._lock = threading.Lock()
+
+    def get_token(self) -> str:
+        token, exp = self.token, self.token_exp
+        if token and exp and time.time() < exp - self.skew:
+            return token
+        return self._fetch({"op": "get", "purpose_id": self.purpose_id})
+
+    def refresh(self, stale_token: str = None) -> str:
+        return self._fetch({"op": "refresh", "purpose_id": self.purpose_id, "stale_token": stale_token})
+
+    def get_expiration(self) -> float | None:
+        return self.token_exp
+
+    # Restituisce la sorgente per la finalità indicata (env e client_id sono quelli del broker).
+    def get_manager(self, purpose_id: str = None, env: str = None, client_id: str = None) -> "BrokerTokenSource":
+        if purpose_id is None or purpose_id == self.purpose_id:
+            return self
+        with self._lock:
+            source = self._sources.get(purpose_id)
+            if source is None:
+                source = self._sources[purpose_id] = BrokerTokenSource(
+                    self.socket_path, purpose_id, self.skew, self.timeout
+                )
+            return source
+
+    def stats(self) -> dict:
+        return self._call({"op": "stats"})["stats"]
+
+    def _fetch(self, request: dict) -> str:
+        response = self._call(request)
+        self.token, self.token_exp = response["token"], response.get("exp")
+        return self.token
+
+    def _call(self, request: dict) -> dict:
+        payload = jsonlib.dumps(request).encode("utf-8") + b"\n"
+        with self._lock:
+            # Un solo nuovo tentativo: la connessione persistente potrebbe essere stata chiusa dal broker.
+            for attempt in (1, 2):
+                try:
+                    if self._sock is None:
+                        self._connect()
+                    self._sock.sendall(payload)
+                    line = self._file.readline()
+                    if not line:
+                        raise ConnectionError("connessione chiusa dal broker")
+                    break
+                except OSError as e:
+                    self._close()
+                    if attempt == 2:
+                        raise PdndTokenError(f"❌ Broker dei token non raggiungibile ({self.socket_path}): {e}") from e
+
+        response = jsonlib.loads(line)
+        if not response.get("ok"):
+            raise PdndTokenError(f"❌ Errore dal broker dei token: {response.get('error')}")
+        return response
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        try:
+            sock.connect(self.socket_path)
+            owner = _peer_uid(sock, self.socket_path)
+        except OSError:
+            sock.close()
+            raise
+        if owner != os.getuid():
+            sock.close()
+            raise PdndTokenError(
+                f"❌ Il socket {self.socket_path} appartiene a un altro utente (uid {owner}): connessione rifiutata"
+            )
+        self._sock = sock
+        self._file = sock.makefile("rb")
+
+    def _close(self):
+        if self._file is not None:
+            self._file.close()
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = self._file = None
+
+    def close(self) -> bool:
+        with self._lock:
+            self._close()
+        for source in self._sources.values():
+            source.close()
+        return True
+
+
+# Utente del processo all'altro capo del socket (SO_PEERCRED, Linux) oppure, dove non è disponibile,
+# proprietario del file del socket.
+def _peer_uid(sock: socket.socket, path: str) -> int:
+    if hasattr(socket, "SO_PEERCRED"):
+        credentials = sock.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+        return struct.unpack("3i", credentials)[1]
+    return os.stat(path).st_uid
+
+
+# Avvio del broker da linea di comando:
+#   python -m pdnd_client.broker --config configs/config.json --env produzione --purposes id1 id2
+def main(argv=None):
+    from pdnd_client.config import Config
+    from pdnd_client.jwt_generator import JWTGenerator
+    from pdnd_client.token_registry import TokenRegistry
+
+    parser = argparse.ArgumentParser(description="Broker locale dei token PDND su socket Unix")
+    parser.add_argument("--config", default="configs/config.json", help="Percorso del file JSON di configurazione")
+    parser.add_argument("--env", default="produzione", help="Chiave dell'ambiente nel file di configurazione")
+    parser.add_argument("--socket", default=None,
+                        help="Percorso del socket Unix (default: $XDG_RUNTIME_DIR/pdnd_broker.sock)")
+    parser.add_argument("--purposes", nargs="*", default=None,
+                        help="Finalità (purposeId) gestite; default: quella della configurazione")
+    parser.add_argument("--refresh-skew", type=float, default=120,
+                        help="Secondi di anticipo del rinnovo rispetto alla scadenza")
+    args = parser.parse_args(argv)
+
+    config = Config(args.config, args.env)
+    jwt_gen = JWTGenerator(config)
+    jwt_gen.set_env(args.env)
+    jwt_gen.set_retry_policy()
+    jwt_gen.set_reuse_assertion(True)
+    purposes = args.purposes if args.purposes is not None else [config.get("purposeId")]
+    registry = TokenRegistry(jwt_gen, refresh_skew=args.refresh_skew)
+    broker = TokenBroker(registry, args.socket, purposes)
+    print(f"🔐 Broker dei token in ascolto su {broker.socket_path} per {', '.join(purposes)}")
+    broker.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+# pdnd_client/cache.py
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlencode
+from pdnd_client.token_cache import atomic_write
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_MAX_ENTRIES = 1024
+
+
+# Risposta memorizzata in cache, con i validatori per la richiesta condizionale.
+@dataclass
+class CachedResponse:
+    status_code: int
+    body: str
+    etag: str | None = None
+    last_modified: str | None = None
+    expires_at: float = 0.0
+    size: int = 0
+
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+    # Header da aggiungere alla richiesta per chiedere al server se la risposta è cambiata.
+    def conditional_headers(self) -> dict:
+        headers = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+# Calcola la chiave di cache a partire da URL, filtri (in ordine normalizzato) e finalità.
+def cache_key(url: str, filters: dict, scope: str) -> str:
+    query = urlencode(sorted((str(k), v) for k, v in (filters or {}).items()), doseq=True)
+    return hashlib.sha256(f"{scope}|{url}|{query}".encode("utf-8")).hexdigest()
+
+
+# Calcola la scadenza della risposta da Cache-Control e Expires.
+# Restituisce None se la risposta non deve essere memorizzata (no-store).
+def freshness(headers, default_ttl: float = 0) -> float | None:
+    now = time.time()
+    directives = {}
+    for part in (headers.get("Cache-Control") or "").split(","):
+        name, _, value = part.strip().partition("=")
+        if name:
+            directives[name.lower()] = value.strip('"')
+
+    if "no-store" in directives:
+        return None
+    if "no-cache" in directives:
+        return now
+    if "max-age" in directives:
+        try:
+            return now + max(int(directives["max-age"]), 0)
+        except ValueError:
+            return now
+    if headers.get("Expires"):
+        try:
+            return parsedate_to_datetime(headers["Expires"]).timestamp()
+        except (TypeError, ValueError):
+            return now  # Expires non valido equivale a una risposta già scaduta
+    return now + default_ttl
+
+
+# La classe ResponseCache memorizza le risposte di get_api per evitare di riscaricare
+# dati che non cambiano. Ha un livello in memoria (LRU limitato per numero di voci e per byte)
+# e un livello opzionale su disco (directory), senza limiti di dimensione: la cartella va dedicata
+# alla cache e svuotata con clear() o da una pulizia periodica. Le scadenze rispettano Cache-Control/Expires;
+# una risposta scaduta con ETag o Last-Modified viene riconvalidata con una richiesta
+# condizionale e, se il server risponde 304, servita dalla cache.
+# Le statistiche (hits, revalidations, misses, hit_ratio) sono disponibili con stats().
+class ResponseCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 directory: str = None, default_ttl: float = 0):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.directory = directory
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.revalidations = 0
+        self.misses = 0
+        self.current_bytes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key: str) -> CachedResponse | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                return entry
+        entry = self._read_disk(key)
+        if entry is not None:
+            with self._lock:
+                self._put_memory(key, entry)
+        return entry
+
+    # Memorizza una risposta, se Cache-Control lo consente e se c'è modo di riusarla
+    # (scadenza futura oppure un validatore per la riconvalida).
+    def store(self, key: str, status_code: int, body: str, headers) -> CachedResponse | None:
+        expires_at = freshness(headers, self.default_ttl)
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if expires_at is None or (expires_at <= time.time() and not etag and not last_modified):
+            self.delete(key)
+            return None
+
+        entry = CachedResponse(
+            status_code=status_code,
+            body=body,
+            etag=etag,
+            last_modified=last_modified,
+            expires_at=expires_at,
+            size=len(body.encode("utf-8"))
+        )
+        with self._lock:
+            self._put_memory(key, entry)
+        self._write_disk(key, entry)
+        return entry
+
+    # Aggiorna la scadenza (e i validatori) di una voce dopo una risposta 304.
+    def revalidated(self, key: str, entry: CachedResponse, headers) -> CachedResponse:
+        expires_at = freshness(headers, self.default_ttl)
+        entry.expires_at = expires_at if expires_at is not None else 0.0
+        entry.etag = headers.get("ETag") or entry.etag
+        entry.last_modified = headers.get("Last-Modified") or entry.last_modified
+        self._write_disk(key, entry)
+        return entry
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.current_bytes -= entry.size
+        if self.directory:
+            try:
+                os.unlink(self._disk_path(key))
+            except OSError:
+                pass
+        return True
+
+    # Svuota entrambi i livelli: sul disco vengono rimosse tutte le voci della cartella,
+    # comprese quelle troppo grandi per la memoria o scritte da altri processi.
+    def clear(self) -> bool:
+        with self._lock:
+            self._entries.clear()
+            self.current_bytes = 0
+        if self.directory:
+            for name in os.listdir(self.directory):
+                if name.endswith(".json"):
+                    try:
+                        os.unlink(os.path.join(self.directory, name))
+                    except OSError:
+                        pass
+        return True
+
+    def record(self, outcome: str):
+        with self._lock:
+            if outcome == "hit":
+                self.hits += 1
+            elif outcome == "revalidated":
+                self.revalidations += 1
+            else:
+                self.misses += 1
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.revalidations + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self.current_bytes,
+                "hits": self.hits,
+                "revalidations": self.revalidations,
+                "misses": self.misses,
+                "hit_ratio": (self.hits + self.revalidations) / total if total else 0.0
+            }
+
+    # Inserisce la voce nel livello in memoria e rimuove le meno usate oltre i limiti.
+    # Va chiamato con il lock acquisito.
+    def _put_memory(self, key: str, entry: CachedResponse):
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self.current_bytes -= previous.size
+        if entry.size > self.max_bytes:
+            return  # troppo grande per la memoria, resta solo su disco
+        self._entries[key] = entry
+        self.current_bytes += entry.size
+        while len(self._entries) > self.max_entries or self.current_bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self.current_bytes -= evicted.size
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _write_disk(self, key: str, entry: CachedResponse):
+        if self.directory:
+            atomic_write(self._disk_path(key), json.dumps(asdict(entry), ensure_ascii=False).encode("utf-8"))
+
+    def _read_disk(self, key: str) -> CachedResponse | None:
+        if not self.directory:
+            return None
+        try:
+            with open(self._disk_path(key), "r", encoding="utf-8") as f:
+                return CachedResponse(**json.load(f))
+        except (OSError, TypeError, ValueError):
+            return None
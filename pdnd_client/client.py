@@ -5,16 +5,56 @@
 # La funzione parse_filters viene utilizzata per convertire una stringa di query in un dizionario,
 # che può essere passato come parametro nelle richieste API.
 
-import requests
-import os
-import json
+import hashlib
 import time
+from typing import TYPE_CHECKING
+from collections.abc import Iterable, Iterator
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
 from datetime import datetime
-from urllib.parse import urlencode
-
-# La classe PDNDClient viene inizializzata con un token JWT e un'opzione per verificare i certificati SSL.
-# Fornisce metodi per effettuare richieste GET e POST verso URL specificati.
-class PDNDClient:
+from urllib.parse import urlencode, urlsplit
+from pdnd_client import jsonlib
+from pdnd_client._lazy import LazyModule
+from pdnd_client.cache import ResponseCache, cache_key
+from pdnd_client.exceptions import PdndException, PdndRateLimitError
+from pdnd_client.metrics import SPAN_BODY_READ, SPAN_JSON_DECODE, SPAN_REQUEST_SEND, SPAN_TOKEN_LOAD, SPAN_TTFB
+from pdnd_client.rate_limit import get_default_rate_limiter, parse_retry_after
+from pdnd_client.retry import RetryPolicy, call_with_retry, get_default_circuit_breakers
+from pdnd_client.singleflight import SingleFlight
+from pdnd_client.streaming import iter_json_records
+from pdnd_client.token_cache import read_token_file, write_token_file
+from pdnd_client.upload import RequestBody
+
+if TYPE_CHECKING:
+    from pdnd_client.transport import Transport
+
+requests = LazyModule("requests")
+transport_module = LazyModule("pdnd_client.transport")
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+BODY_METHODS = ("POST", "PUT", "PATCH")
+
+# Risultato di una singola chiamata eseguita da get_api_many.
+# index è la posizione della richiesta nell'iterabile di input; se la chiamata fallisce
+# status_code e body sono None ed error contiene l'eccezione sollevata.
+@dataclass
+class BatchResult:
+    index: int
+    url: str
+    status_code: int | None = None
+    body: str | None = None
+    error: Exception | None = None
+    elapsed: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+# La classe PDNDClientBase contiene lo stato e i metodi comuni a PDNDClient e AsyncPDNDClient:
+# URL e filtri, token e relativo file, retry, circuit breaker, compressione e gestione delle risposte.
+# Non effettua chiamate di rete: l'invio delle richieste è implementato dalle sottoclassi.
+class PDNDClientBase:
     def __init__(self):
         self.verify_ssl = True
         self.api_url = None
@@ -24,6 +64,12 @@ class PDNDClient:
         self.token = ""
         self.token_file = "tmp/pdnd_token.json"
         self.token_exp = None  # Token expiration time, if applicable
+        self.transport = None  # Transport (o AsyncTransport) usato per le chiamate
+        self.single_flight = None  # SingleFlight per accorpare le GET identiche contemporanee
+        self.retry_policy = None  # RetryPolicy per le chiamate GET
+        self.circuit_breakers = None  # CircuitBreakers per host
+        self.instrumentation = None  # Instrumentation per span di latenza e contatori
+        self.compression = True  # Richiede le risposte compresse (Accept-Encoding)
 
     # Questo metodo recupera l'URL dell'API, che può essere sovrascritto dall'utente.
     def get_api_url(self) -> str:
@@ -37,18 +83,21 @@ class PDNDClient:
     # Imposta i filtri da utilizzare nelle richieste API.
     # Se viene fornita una stringa, la converte in un dizionario.
     def set_filters(self, filters) -> bool:
+        self.filters = self._parse_filters(filters)
+        return True
+
+    # Converte i filtri (stringa "chiave1=val1&chiave2=val2" o dizionario) in un dizionario.
+    @staticmethod
+    def _parse_filters(filters) -> dict:
         if not filters:
-            self.filters = {}
-            return True
+            return {}
 
         if isinstance(filters, str):
             # Analizza la stringa nel formato "chiave1=val1&chiave2=val2"
-            self.filters = dict(pair.split("=", 1) for pair in filters.split("&") if "=" in pair)
+            return dict(pair.split("=", 1) for pair in filters.split("&") if "=" in pair)
         elif isinstance(filters, dict):
-            self.filters = filters
-        else:
-            raise ValueError("I filtri devono essere una stringa o un dizionario.")
-        return True
+            return filters
+        raise ValueError("I filtri devono essere una stringa o un dizionario.")
 
     # Questo metodo imposta la modalità di debug, che controlla se stampare un output dettagliato.
     def set_debug(self, debug) -> bool:
@@ -79,50 +128,87 @@ class PDNDClient:
         self.verify_ssl = verify_ssl
         return True
 
-    def get_api(self, token: str = None) -> tuple[int, str]:
-        url = self.api_url if hasattr(self, 'api_url') and self.api_url else self.get_api_url()
+    # Imposta la politica di retry delle chiamate GET (idempotenti). Con True vengono usate
+    # le regole predefinite (RetryPolicy.idempotent()), con None i retry vengono disattivati.
+    def set_retry_policy(self, retry_policy=True) -> bool:
+        if retry_policy is True:
+            retry_policy = RetryPolicy.idempotent()
+        self.retry_policy = retry_policy or None
+        return True
+
+    # Abilita i circuit breaker per host. Con True viene usato l'insieme condiviso da tutti
+    # i client del processo, con None vengono disattivati.
+    def set_circuit_breaker(self, circuit_breakers=True) -> bool:
+        if circuit_breakers is True:
+            circuit_breakers = get_default_circuit_breakers()
+        self.circuit_breakers = circuit_breakers or None
+        return True
+
+    # Abilita o disabilita la richiesta di risposte compresse (gzip/deflate e, se disponibili, br/zstd).
+    # La decompressione avviene in streaming ed è trasparente anche per stream_api e download_api.
+    def set_compression(self, compression: bool) -> bool:
+        self.compression = compression
+        return True
+
+    # Decodifica il body JSON con il backend di pdnd_client.jsonlib.
+    def _decode_json(self, body):
+        if self.instrumentation is None:
+            return jsonlib.loads(body)
+        with self.instrumentation.span(SPAN_JSON_DECODE):
+            return jsonlib.loads(body)
+
+    # Costruisce l'URL finale (con i filtri come query string) e gli header della chiamata API.
+    # Se url o filters non vengono passati, usa quelli impostati sul client.
+    def _build_api_request(self, token: str = None, url: str = None, filters: dict = None) -> tuple[str, dict]:
+        url = self._final_url(url, filters)
         if token is None:
             token = self.token
         if not token:
             raise ValueError("Il token non può essere vuoto")
 
-        # Aggiunta dei filtri come query string
-        if hasattr(self, 'filters') and self.filters:
-            query = urlencode(self.filters, doseq=True)
-            separator = '&' if '?' in url else '?'
-            url += separator + query
-
         headers = {
             "Authorization": f"Bearer {token}",
-            "Accept": "*/*"
+            "Accept": "*/*",
+            "Accept-Encoding": self._accept_encoding() if self.compression else "identity"
         }
+        return url, headers
+
+    # Codifiche accettate nelle risposte: quelle che il transport HTTP sa decodificare.
+    def _accept_encoding(self) -> str:
+        return transport_module.ACCEPT_ENCODING
+
+    # Solleva l'eccezione corrispondente a una risposta di errore dell'API.
+    # Se è disponibile la risposta, riporta anche il numero di tentativi e il tempo trascorso.
+    @staticmethod
+    def _raise_api_error(status_code: int, body: str, headers=None, response=None):
+        message = f"❌ Errore nella chiamata API: {body}"
+        attempts = getattr(response, "pdnd_attempts", 1) if response is not None else None
+        elapsed = getattr(response, "pdnd_elapsed", None) if response is not None else None
+        if status_code == 429:
+            retry_after = parse_retry_after((headers or {}).get("Retry-After"))
+            raise PdndRateLimitError(message, status_code, body, retry_after, attempts, elapsed)
+        raise PdndException(message, status_code, body, attempts, elapsed)
+
+    # Restituisce l'URL della chiamata con i filtri aggiunti come query string.
+    def _final_url(self, url: str = None, filters: dict = None) -> str:
+        url = url or (self.api_url if hasattr(self, 'api_url') and self.api_url else self.get_api_url())
 
-        try:
-            response = requests.get(url, headers=headers, verify=self.verify_ssl)
-        except requests.exceptions.RequestException as e:
-            raise Exception(f"❌ Errore nella chiamata API: {e}")
-
-        status_code = response.status_code
-        body = response.text
-
-        if not response.ok:
-            raise Exception(f"❌ Errore nella chiamata API: {response.text}")
-
-        if self.debug:
-            try:
-                decoded = response.json()
-                body = json.dumps(decoded, indent=2, ensure_ascii=False)
-            except Exception:
-                pass  # Se non è JSON, lascia il body così com'è
-
+        # Aggiunta dei filtri come query string
+        filters = self.filters if filters is None and hasattr(self, 'filters') else filters
+        if filters:
+            query = urlencode(filters, doseq=True)
+            separator = '&' if '?' in url else '?'
+            url += separator + query
+        return url
+
+    # Verifica l'esito della chiamata API e restituisce il body così come ricevuto.
+    # La formattazione leggibile del JSON spetta a chi presenta il risultato (es. main.py con --pretty).
+    def _handle_api_response(self, status_code: int, body: str, ok: bool, headers=None,
+                             response=None) -> tuple[int, str]:
+        if not ok:
+            self._raise_api_error(status_code, body, headers, response)
         return status_code, body
 
-    # Questo metodo esegue una richiesta GET all'URL specificato e restituisce il codice di stato e il testo della risposta
-    def get_status(self, url)  -> [int, str]:
-        headers = {"Authorization": f"Bearer {self.token}"}
-        response = requests.get(url, headers=headers, verify=self.verify_ssl)
-        return response.status_code, response.text
-
     def get_token(self) -> str:
         return self.token
 
@@ -138,16 +224,13 @@ class PDNDClient:
     def load_token(self, file: str = None) -> [str, str]:
         file = file or self.token_file  # Usa il file passato o quello di default
 
-        if not os.path.exists(file):
-            return [None, None]
-
-        try:
-            with open(file, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except (json.JSONDecodeError, IOError):
-            return [None, None]
-
-        if not data or "token" not in data or "exp" not in data:
+        # Il contenuto viene riletto dal disco solo se il file è cambiato dall'ultima lettura.
+        if self.instrumentation is None:
+            data = read_token_file(file)
+        else:
+            with self.instrumentation.span(SPAN_TOKEN_LOAD):
+                data = read_token_file(file)
+        if not data:
             return [None, None]
 
         self.token = data["token"]
@@ -157,7 +240,7 @@ class PDNDClient:
     # Questo metodo salva il token e la sua data di scadenza in un file JSON.
     # Il token deve essere una stringa e l'exp può essere una stringa, un intero o un oggetto datetime.
     # Se il file non esiste, viene creato.
-    # Se il file esiste, viene sovrascritto.
+    # Se il file esiste, viene sostituito in modo atomico.
     # Il formato della data di scadenza deve essere "YYYY-MM-DD HH:MM:SS".
     # Se il token o l'exp non sono validi, viene sollevata un'eccezione.
     # Restituisce True se il salvataggio ha successo, False altrimenti.
@@ -183,18 +266,505 @@ class PDNDClient:
         except ValueError:
             raise ValueError("L'exp deve essere una stringa nel formato 'YYYY-MM-DD HH:MM:SS'")
 
+        # La scrittura è atomica: chi legge in parallelo vede il file precedente o quello nuovo.
         file = file or self.token_file
-        if not os.path.exists(os.path.dirname(file)):
-            os.makedirs(os.path.dirname(file))
-
-        data = {
-            "token": token,
-            "exp": exp
-        }
-        with open(file, "w", encoding="utf-8") as f:
-            json.dump(data, f, ensure_ascii=False)
+        write_token_file(file, token, exp)
 
         self.token = token
         self.token_exp = exp
         return True
 
+    # Impronta del token, usata come ambito di cache e accorpamento quando la finalità non è nota.
+    @staticmethod
+    def _token_fingerprint(token: str) -> str:
+        return hashlib.sha256((token or "").encode("utf-8")).hexdigest()[:16]
+
+
+# La classe PDNDClient viene inizializzata con un token JWT e un'opzione per verificare i certificati SSL.
+# Fornisce metodi per effettuare richieste GET e POST verso URL specificati.
+class PDNDClient(PDNDClientBase):
+    def __init__(self):
+        super().__init__()
+        self.token_manager = None  # TokenManager opzionale per il rinnovo automatico del token
+        self.token_registry = None  # TokenRegistry opzionale per i token di più purposeId
+        self.response_cache = None  # ResponseCache opzionale per le risposte di get_api
+        self.rate_limiter = None  # RateLimiter per host e purposeId
+
+    # Imposta il transport HTTP (pool di connessioni keep-alive) da usare per le richieste.
+    # Lo stesso transport può essere condiviso tra più istanze di PDNDClient e JWTGenerator.
+    def set_transport(self, transport: "Transport") -> bool:
+        self.transport = transport
+        return True
+
+    def get_transport(self) -> "Transport":
+        return self.transport or transport_module.get_default_transport()
+
+    # Imposta un TokenManager da cui ottenere il token quando non ne viene passato uno esplicito.
+    # Con il manager impostato, un 401 della chiamata API provoca un rinnovo del token
+    # e un nuovo tentativo (una sola volta).
+    def set_token_manager(self, token_manager) -> bool:
+        self.token_manager = token_manager
+        return True
+
+    # Imposta un TokenRegistry da cui ottenere il token della finalità (purpose_id) indicata
+    # nelle singole chiamate.
+    def set_token_registry(self, token_registry) -> bool:
+        self.token_registry = token_registry
+        return True
+
+    # Restituisce il TokenManager da cui prendere il token: quello del registro per purpose_id,
+    # se indicato, altrimenti quello impostato sul client (o None).
+    def _token_source(self, purpose_id: str = None):
+        if purpose_id is not None:
+            if self.token_registry is None:
+                raise ValueError("Per usare purpose_id è necessario impostare un TokenRegistry.")
+            return self.token_registry.get_manager(purpose_id)
+        return self.token_manager
+
+    # Restituisce il token da usare: quello del TokenManager, se impostato, altrimenti quello del client.
+    def _current_token(self, purpose_id: str = None) -> str:
+        source = self._token_source(purpose_id)
+        if source is not None:
+            return source.get_token()
+        return self.token
+
+    # Imposta la cache delle risposte usata da get_api (e get_api_many).
+    def set_response_cache(self, response_cache: ResponseCache) -> bool:
+        self.response_cache = response_cache
+        return True
+
+    # Abilita l'accorpamento delle chiamate get_api identiche contemporanee: chiamate con lo
+    # stesso URL finale (filtri inclusi) e la stessa finalità/token condividono un'unica
+    # richiesta al server. Si può passare un SingleFlight esistente per condividerlo tra client.
+    # Il numero di chiamate accorpate è disponibile con client.single_flight.stats().
+    def set_coalescing(self, coalescing=True) -> bool:
+        if isinstance(coalescing, SingleFlight):
+            self.single_flight = coalescing
+        else:
+            self.single_flight = SingleFlight() if coalescing else None
+        return True
+
+    # Imposta il limitatore di traffico per host e finalità. Con True viene usato quello
+    # condiviso da tutti i client del processo, con None il limitatore viene disattivato.
+    def set_rate_limiter(self, rate_limiter=True) -> bool:
+        if rate_limiter is True:
+            rate_limiter = get_default_rate_limiter()
+        self.rate_limiter = rate_limiter or None
+        return True
+
+    # Imposta l'Instrumentation (pdnd_client.metrics) che riceve gli span di latenza
+    # (token_load, request_send, ttfb, body_read, json_decode) e i contatori di richieste,
+    # errori per stato e cache. Con None la raccolta viene disattivata.
+    def set_instrumentation(self, instrumentation) -> bool:
+        self.instrumentation = instrumentation
+        return True
+
+    # Con use_cache=False la chiamata ignora la cache delle risposte.
+    def get_api(self, token: str = None, purpose_id: str = None, use_cache: bool = True) -> tuple[int, str]:
+        return self._fetch_api(token, purpose_id=purpose_id, use_cache=use_cache)
+
+    # Invia una chiamata POST all'API con il body indicato (vedi send_api).
+    def post_api(self, body=None, token: str = None, purpose_id: str = None,
+                 content_type: str = None) -> tuple[int, str]:
+        return self.send_api("POST", body, token, purpose_id, content_type)
+
+    def put_api(self, body=None, token: str = None, purpose_id: str = None,
+                content_type: str = None) -> tuple[int, str]:
+        return self.send_api("PUT", body, token, purpose_id, content_type)
+
+    def patch_api(self, body=None, token: str = None, purpose_id: str = None,
+                  content_type: str = None) -> tuple[int, str]:
+        return self.send_api("PATCH", body, token, purpose_id, content_type)
+
+    # Invia una chiamata con body (POST, PUT, PATCH) all'URL e con i filtri impostati sul client
+    # (o a quelli indicati). Il body può essere un dizionario (inviato come JSON), una stringa,
+    # dei byte, un file aperto in modalità binaria o un generatore di blocchi: file e generatori
+    # vengono inviati a blocchi senza caricarli in memoria (i generatori con Transfer-Encoding: chunked).
+    # Token, transport, limitatore e circuit breaker sono gli stessi di get_api; la politica di retry
+    # e il rinnovo del token su 401 vengono applicati solo se il body può essere reinviato
+    # (dizionari, stringhe, byte e file su cui è possibile fare seek).
+    def send_api(self, method: str, body=None, token: str = None, purpose_id: str = None,
+                 content_type: str = None, url: str = None, filters: dict = None) -> tuple[int, str]:
+        method = method.upper()
+        if method not in BODY_METHODS:
+            raise ValueError(f"Metodo non supportato: {method}. Metodi ammessi: {', '.join(BODY_METHODS)}")
+        request_body = RequestBody(body, content_type)
+        response = self._open_api(token, url, filters, purpose_id, method=method, body=request_body)
+        return self._handle_api_response(
+            response.status_code, response.text, response.ok, response.headers, response
+        )
+
+    # Come get_api, ma restituisce il body già decodificato (dict o list) invece del testo.
+    # Il body viene decodificato una sola volta, con orjson se installato (vedi pdnd_client.jsonlib).
+    def get_api_json(self, token: str = None, purpose_id: str = None, use_cache: bool = True) -> tuple[int, object]:
+        status_code, body = self._fetch_api(token, purpose_id=purpose_id, use_cache=use_cache)
+        return status_code, self._decode_json(body)
+
+    # Esegue in parallelo molte chiamate API, una per ogni coppia (url, filtri) dell'iterabile.
+    # url può essere None per usare l'URL impostato sul client; i filtri possono essere
+    # una stringa o un dizionario come in set_filters. Con un TokenRegistry ogni elemento può
+    # indicare anche la finalità: (url, filtri, purpose_id).
+    # Tutte le chiamate condividono lo stesso token e lo stesso transport: per sfruttarlo
+    # al meglio il pool del transport dovrebbe avere almeno max_workers connessioni.
+    # I risultati (BatchResult) vengono restituiti man mano che le chiamate terminano;
+    # un errore su una singola chiamata, compreso un elemento malformato, viene riportato
+    # nel relativo risultato senza interrompere le altre.
+    def get_api_many(self, calls: Iterable, max_workers: int = 8, token: str = None) -> Iterator[BatchResult]:
+        if max_workers < 1:
+            raise ValueError("Il numero di worker deve essere maggiore di zero.")
+        # Con un TokenManager il token viene risolto per ogni chiamata, così da seguirne i rinnovi.
+        if token is None and self.token_manager is None and self.token_registry is None:
+            token = self.token
+            if not token:
+                raise ValueError("Il token non può essere vuoto")
+
+        items = enumerate(calls)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            pending = set()
+            exhausted = False
+            while True:
+                # Mantiene in coda un numero limitato di richieste per non consumare
+                # subito tutto l'iterabile di input.
+                while not exhausted and len(pending) < max_workers * 2:
+                    try:
+                        index, call = next(items)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    if not isinstance(call, (tuple, list)) or len(call) not in (2, 3):
+                        yield BatchResult(index=index, url=None, error=ValueError(
+                            f"❌ Richiesta {index} non valida: è attesa una coppia (url, filtri) "
+                            f"o una tripla (url, filtri, purpose_id), trovato {call!r}"
+                        ))
+                        continue
+                    url, filters, *purpose = call
+                    purpose_id = purpose[0] if purpose else None
+                    pending.add(executor.submit(self._run_batch_item, index, url, filters, token, purpose_id))
+                if not pending:
+                    break
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+
+    def _run_batch_item(self, index: int, url: str, filters, token: str, purpose_id: str = None) -> BatchResult:
+        result = BatchResult(index=index, url=url or self.get_api_url())
+        started = time.perf_counter()
+        try:
+            result.status_code, result.body = self._fetch_api(
+                token, url, self._parse_filters(filters), purpose_id=purpose_id
+            )
+        except Exception as e:
+            result.error = e
+        result.elapsed = time.perf_counter() - started
+        return result
+
+    # Scorre tutte le pagine di un'API paginata restituendo gli elementi uno alla volta.
+    # strategy è una delle strategie di pdnd_client.pagination (offset/limit, numero di pagina,
+    # cursore, link nel body o header Link). Se url o filters non sono indicati vengono usati
+    # quelli del client. Con prefetch=True la pagina successiva viene richiesta in background
+    # mentre il chiamante elabora gli elementi di quella corrente.
+    # max_pages e max_items limitano il numero di pagine richieste e di elementi restituiti.
+    def paginate(self, strategy, url: str = None, filters=None, max_pages: int = None,
+                 max_items: int = None, prefetch: bool = True, token: str = None,
+                 purpose_id: str = None) -> Iterator:
+        url = url or self.get_api_url()
+        filters = self._parse_filters(filters) if filters is not None else dict(self.filters)
+        request = strategy.first_request(url, filters)
+
+        def fetch(request):
+            return self._fetch_page(request[0], request[1], token, purpose_id)
+
+        executor = ThreadPoolExecutor(max_workers=1) if prefetch else None
+        future = executor.submit(fetch, request) if prefetch else None
+        pages = items = 0
+        try:
+            while request is not None:
+                data, headers = future.result() if prefetch else fetch(request)
+                pages += 1
+                page_items = strategy.extract_items(data)
+
+                next_request = None
+                if max_pages is None or pages < max_pages:
+                    next_request = strategy.next_request(request, data, headers, page_items)
+                    if next_request == request:
+                        next_request = None  # evita cicli infiniti se il server ripete la stessa pagina
+                request = next_request
+                if prefetch and request is not None:
+                    future = executor.submit(fetch, request)
+
+                for item in page_items:
+                    yield item
+                    items += 1
+                    if max_items is not None and items >= max_items:
+                        return
+        finally:
+            if executor:
+                executor.shutdown(wait=False, cancel_futures=True)
+
+    # Richiede una pagina e ne restituisce il body JSON decodificato e gli header.
+    def _fetch_page(self, url: str, filters: dict, token: str = None, purpose_id: str = None):
+        response = self._open_api(token, url, filters, purpose_id)
+        if not response.ok:
+            self._raise_api_error(response.status_code, response.text, response.headers, response)
+        return self._decode_json(response.content), response.headers
+
+    # Esegue la chiamata GET all'API con l'URL e i filtri indicati (o quelli del client).
+    def _fetch_api(self, token: str = None, url: str = None, filters: dict = None,
+                   purpose_id: str = None, use_cache: bool = True) -> tuple[int, str]:
+        if self.single_flight is None:
+            return self._fetch_api_once(token, url, filters, purpose_id, use_cache)
+
+        key = (
+            self._final_url(url, filters),
+            self._cache_scope(token, purpose_id),
+            use_cache
+        )
+        return self.single_flight.do(
+            key, lambda: self._fetch_api_once(token, url, filters, purpose_id, use_cache)
+        )
+
+    def _fetch_api_once(self, token: str = None, url: str = None, filters: dict = None,
+                        purpose_id: str = None, use_cache: bool = True) -> tuple[int, str]:
+        cache = self.response_cache if use_cache else None
+        if cache is None:
+            response = self._open_api(token, url, filters, purpose_id)
+            return self._handle_api_response(
+                response.status_code, response.text, response.ok, response.headers, response
+            )
+
+        key = cache_key(
+            url or self.get_api_url(),
+            filters if filters is not None else self.filters,
+            self._cache_scope(token, purpose_id)
+        )
+        entry = cache.get(key)
+        if entry is not None and entry.is_fresh():
+            cache.record("hit")
+            self._count_cache("hit")
+            return self._handle_api_response(entry.status_code, entry.body, True)
+
+        conditional = entry.conditional_headers() if entry is not None else None
+        response = self._open_api(token, url, filters, purpose_id, extra_headers=conditional)
+        if entry is not None and response.status_code == 304:
+            cache.revalidated(key, entry, response.headers)
+            cache.record("revalidated")
+            self._count_cache("revalidated")
+            return self._handle_api_response(entry.status_code, entry.body, True)
+
+        cache.record("miss")
+        self._count_cache("miss")
+        if response.ok:
+            cache.store(key, response.status_code, response.text, response.headers)
+        return self._handle_api_response(
+            response.status_code, response.text, response.ok, response.headers, response
+        )
+
+    def _count_cache(self, outcome: str):
+        if self.instrumentation is not None:
+            self.instrumentation.count("cache", outcome=outcome)
+
+    # Ambito della cache: la finalità (purposeId) della chiamata oppure, se non è nota,
+    # un'impronta del token usato, così che risposte di finalità diverse non si mescolino.
+    def _cache_scope(self, token: str = None, purpose_id: str = None) -> str:
+        purpose_id = self._purpose_scope(token, purpose_id)
+        if purpose_id:
+            return purpose_id
+        return self._token_fingerprint(token if token is not None else self._current_token())
+
+    # Finalità (purposeId) della chiamata: quella indicata oppure quella del TokenManager impostato.
+    # Restituisce None se non è nota.
+    def _purpose_scope(self, token: str = None, purpose_id: str = None) -> str | None:
+        if purpose_id:
+            return purpose_id
+        if token is None and self.token_manager is not None:
+            generator = getattr(self.token_manager, "jwt_generator", None)
+            if generator is not None and generator.purposeId:
+                return generator.purposeId
+            return getattr(self.token_manager, "purpose_id", None)
+        return None
+
+    # Invia la chiamata (GET se non indicato method) e restituisce la risposta, gestendo il token
+    # e il rinnovo su 401. Con stream=True il body non viene letto: spetta al chiamante consumarlo
+    # e chiudere la risposta. body è il RequestBody delle chiamate POST/PUT/PATCH.
+    def _open_api(self, token: str = None, url: str = None, filters: dict = None,
+                  purpose_id: str = None, stream: bool = False, extra_headers: dict = None,
+                  method: str = "GET", body: RequestBody = None):
+        limit_key = None
+        if self.rate_limiter is not None:
+            # La chiave è (host, purposeId) e non dipende dal token: i rinnovi non azzerano lo stato
+            # del limitatore. Se la finalità non è nota le chiamate verso l'host condividono il limite.
+            limit_key = (urlsplit(self._final_url(url, {})).netloc, self._purpose_scope(token, purpose_id))
+
+        source = self._token_source(purpose_id) if token is None else None
+        managed = source is not None
+        if managed:
+            token = source.get_token()
+        url, headers = self._build_api_request(token, url, filters)
+        if extra_headers:
+            headers.update(extra_headers)
+        if body is not None:
+            headers.update(body.headers)
+        response = self._send(method, url, headers, stream, limit_key, body)
+
+        # Token revocato o scaduto lato server: lo rinnova e ritenta una sola volta
+        # (solo se il body, se presente, può essere inviato di nuovo).
+        if managed and response.status_code == 401 and (body is None or body.replayable):
+            response.close()
+            token = source.refresh(stale_token=token)
+            headers["Authorization"] = f"Bearer {token}"
+            response = self._send(method, url, headers, stream, limit_key, body)
+
+        return response
+
+    # Invia la chiamata applicando retry e circuit breaker, se configurati.
+    # Le chiamate con un body che non può essere reinviato (generatori, file senza seek)
+    # non vengono mai ritentate.
+    def _send(self, method: str, url: str, headers: dict, stream: bool = False, limit_key: tuple = None,
+              body: RequestBody = None):
+        kwargs = {"stream": True} if stream else {}
+        if body is not None and body.data is not None:
+            kwargs["data"] = body.data
+        policy = self.retry_policy if body is None or body.replayable else None
+
+        # Ogni invio riparte dall'inizio del body: anche il nuovo tentativo dopo il rinnovo del token su 401.
+        def send():
+            if body is not None:
+                body.rewind()
+            return self._send_once(method, url, headers, kwargs, limit_key)
+
+        if policy is None and self.circuit_breakers is None:
+            return send()
+        host = urlsplit(url).netloc
+        breaker = self.circuit_breakers.get(host) if self.circuit_breakers is not None else None
+
+        return call_with_retry(send, policy, breaker, host)
+
+    def _send_once(self, method: str, url: str, headers: dict, kwargs: dict, limit_key: tuple = None):
+        if limit_key is None:
+            return self._do_send(method, url, headers, kwargs)
+        # Il permesso del limitatore viene rilasciato con l'esito della chiamata (429/503, Retry-After).
+        with self.rate_limiter.slot(limit_key) as slot:
+            response = self._do_send(method, url, headers, kwargs)
+            slot.update(response.status_code, response.headers)
+            return response
+
+    def _do_send(self, method: str, url: str, headers: dict, kwargs: dict):
+        if self.instrumentation is not None:
+            return self._do_send_instrumented(method, url, headers, kwargs)
+        try:
+            return self._transport_request(method, url, headers, kwargs)
+        except requests.exceptions.RequestException as e:
+            raise PdndException(f"❌ Errore nella chiamata API: {e}")
+
+    def _transport_request(self, method: str, url: str, headers: dict, kwargs: dict):
+        transport = self.get_transport()
+        if method == "GET":
+            return transport.get(url, headers=headers, verify=self.verify_ssl, **kwargs)
+        return transport.request(method, url, headers=headers, verify=self.verify_ssl, **kwargs)
+
+    # Come _do_send, ma misura separatamente l'invio fino agli header (request_send),
+    # il tempo al primo byte riportato da requests (ttfb) e la lettura del body (body_read).
+    # Per separare le due fasi la richiesta viene sempre inviata in streaming; il body viene
+    # poi letto subito, a meno che il chiamante non abbia chiesto lo streaming.
+    def _do_send_instrumented(self, method: str, url: str, headers: dict, kwargs: dict):
+        instrumentation = self.instrumentation
+        host = urlsplit(url).netloc
+        try:
+            with instrumentation.span(SPAN_REQUEST_SEND, host=host):
+                response = self._transport_request(method, url, headers, {**kwargs, "stream": True})
+        except requests.exceptions.RequestException as e:
+            instrumentation.count("errors", status="network")
+            raise PdndException(f"❌ Errore nella chiamata API: {e}")
+
+        elapsed = getattr(response, "elapsed", None)
+        if elapsed is not None:
+            instrumentation.emit(SPAN_TTFB, elapsed.total_seconds(), host=host)
+        if not kwargs.get("stream"):
+            # Un errore durante la lettura del body (es. ChunkedEncodingError, timeout) viene gestito
+            # come in _do_send: errore di rete, ritentabile dalla RetryPolicy.
+            try:
+                with instrumentation.span(SPAN_BODY_READ, host=host):
+                    content = response.content
+            except requests.exceptions.RequestException as e:
+                response.close()
+                instrumentation.count("errors", status="network")
+                raise PdndException(f"❌ Errore nella chiamata API: {e}")
+            if isinstance(content, bytes):
+                self._record_transfer(response, host, len(content))
+
+        status = str(response.status_code)
+        instrumentation.count("requests", host=host, status=status)
+        if response.status_code >= 400:
+            instrumentation.count("errors", status=status)
+        return response
+
+    # Registra i byte ricevuti dalla rete (compressi) e quelli del body decompresso,
+    # per host e Content-Encoding. I byte ricevuti sono letti dal contatore di urllib3 (raw.tell()).
+    def _record_transfer(self, response, host: str, decoded: int):
+        received = getattr(getattr(response, "raw", None), "tell", None)
+        received = received() if callable(received) else None
+        if not isinstance(received, int):
+            received = decoded
+        encoding = response.headers.get("Content-Encoding") or "identity"
+        self.instrumentation.count("received_bytes", received, host=host, encoding=encoding)
+        self.instrumentation.count("decoded_bytes", decoded, host=host, encoding=encoding)
+
+    # Restituisce il body della risposta in streaming a blocchi già decompressi;
+    # con l'instrumentation attiva, al termine registra i byte trasferiti.
+    def _iter_body(self, response, chunk_size: int) -> Iterator[bytes]:
+        if self.instrumentation is None:
+            yield from response.iter_content(chunk_size=chunk_size)
+            return
+        decoded = 0
+        for chunk in response.iter_content(chunk_size=chunk_size):
+            decoded += len(chunk)
+            yield chunk
+        self._record_transfer(response, urlsplit(response.url).netloc, decoded)
+
+    # Apre la chiamata API in streaming e verifica l'esito prima di restituire la risposta.
+    def _open_api_stream(self, token: str = None, purpose_id: str = None):
+        response = self._open_api(token, purpose_id=purpose_id, stream=True)
+        if not response.ok:
+            body = response.text
+            response.close()
+            self._raise_api_error(response.status_code, body, response.headers, response)
+        return response
+
+    # Variante in streaming di get_api: restituisce il body a blocchi di byte (chunk_size)
+    # senza mai caricarlo interamente in memoria.
+    def stream_api(self, token: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   purpose_id: str = None) -> Iterator[bytes]:
+        response = self._open_api_stream(token, purpose_id)
+        try:
+            yield from self._iter_body(response, chunk_size)
+        finally:
+            response.close()
+
+    # Restituisce uno alla volta i record di un array JSON contenuto nella risposta,
+    # decodificandoli man mano che arrivano: la memoria usata non dipende dalla dimensione
+    # della risposta. path indica, se necessario, le chiavi da attraversare per raggiungere
+    # l'array (es. "data.items").
+    def iter_api_records(self, path=None, token: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                         purpose_id: str = None) -> Iterator:
+        return iter_json_records(self.stream_api(token, chunk_size, purpose_id), path)
+
+    # Scrive il body della risposta direttamente su file, a blocchi, senza tenerlo in memoria.
+    # Restituisce il codice di stato e il numero di byte scritti.
+    def download_api(self, file: str, token: str = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                     purpose_id: str = None) -> tuple[int, int]:
+        response = self._open_api_stream(token, purpose_id)
+        written = 0
+        try:
+            with open(file, "wb") as f:
+                for chunk in self._iter_body(response, chunk_size):
+                    f.write(chunk)
+                    written += len(chunk)
+        finally:
+            response.close()
+        return response.status_code, written
+
+    # Questo metodo esegue una richiesta GET all'URL specificato e restituisce il codice di stato e il testo della risposta
+    def get_status(self, url, purpose_id: str = None)  -> [int, str]:
+        headers = {"Authorization": f"Bearer {self._current_token(purpose_id)}"}
+        response = self.get_transport().get(url, headers=headers, verify=self.verify_ssl)
+        return response.status_code, response.text
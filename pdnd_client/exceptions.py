@@ -0,0 +1,35 @@
+# pdnd_client/exceptions.py
+
+# Eccezioni sollevate dal client PDND.
+# Derivano da Exception, quindi il codice che intercetta Exception continua a funzionare;
+# in più riportano, quando disponibili, il codice di stato HTTP, il body della risposta,
+# il numero di tentativi effettuati e il tempo complessivo trascorso (in secondi).
+
+
+class PdndException(Exception):
+    def __init__(self, message: str, status_code: int = None, body: str = None,
+                 attempts: int = None, elapsed: float = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.body = body
+        self.attempts = attempts
+        self.elapsed = elapsed
+
+
+# Il server ha rifiutato la chiamata per superamento dei limiti di traffico (429).
+# retry_after indica, se il server lo comunica, dopo quanti secondi riprovare.
+class PdndRateLimitError(PdndException):
+    def __init__(self, message: str, status_code: int = 429, body: str = None, retry_after: float = None,
+                 attempts: int = None, elapsed: float = None):
+        super().__init__(message, status_code, body, attempts, elapsed)
+        self.retry_after = retry_after
+
+
+# Il circuit breaker dell'host è aperto: la chiamata non è stata inviata.
+class PdndCircuitOpenError(PdndException):
+    pass
+
+
+# Errore nella richiesta del token al server di autenticazione.
+class PdndTokenError(PdndException):
+    pass
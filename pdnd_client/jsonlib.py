@@ -0,0 +1,69 @@
+# pdnd_client/jsonlib.py
+
+import json
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dipendenza opzionale
+    orjson = None
+
+# Backend JSON usato dal client per decodificare le risposte delle API.
+# Se orjson è installato viene usato automaticamente (è più veloce e accetta direttamente i byte),
+# altrimenti si usa il modulo json della libreria standard. Il backend può essere cambiato
+# con set_backend("json") / set_backend("orjson") oppure passando un oggetto con loads e dumps.
+
+
+class _StdlibBackend:
+    name = "json"
+
+    @staticmethod
+    def loads(data):
+        return json.loads(data)
+
+    @staticmethod
+    def dumps(obj, pretty: bool = False) -> str:
+        return json.dumps(obj, indent=2 if pretty else None, ensure_ascii=False)
+
+
+class _OrjsonBackend:
+    name = "orjson"
+
+    @staticmethod
+    def loads(data):
+        return orjson.loads(data)
+
+    @staticmethod
+    def dumps(obj, pretty: bool = False) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0).decode("utf-8")
+
+
+_backend = _OrjsonBackend if orjson is not None else _StdlibBackend
+
+
+def set_backend(backend) -> bool:
+    global _backend
+    if backend == "json":
+        _backend = _StdlibBackend
+    elif backend == "orjson":
+        if orjson is None:
+            raise ValueError("Il backend orjson richiede il pacchetto orjson: installalo con 'pip install orjson'.")
+        _backend = _OrjsonBackend
+    elif hasattr(backend, "loads") and hasattr(backend, "dumps"):
+        _backend = backend
+    else:
+        raise ValueError("Il backend deve essere 'json', 'orjson' o un oggetto con i metodi loads e dumps.")
+    return True
+
+
+def get_backend() -> str:
+    return getattr(_backend, "name", type(_backend).__name__)
+
+
+# Decodifica un documento JSON (str o bytes).
+def loads(data):
+    return _backend.loads(data)
+
+
+# Serializza obj in JSON; con pretty=True il risultato è indentato per la lettura.
+def dumps(obj, pretty: bool = False) -> str:
+    return _backend.dumps(obj, pretty)
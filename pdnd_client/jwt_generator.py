@@ -1,14 +1,62 @@
 # pdnd_client/jwt_generator.py
 
+import copy
 import time
 import json
 import base64
-import requests
-import jwt  # PyJWT
 import secrets
 import os
+import threading
 from datetime import datetime, timezone
-from jwt import exceptions as jwt_exceptions
+from typing import TYPE_CHECKING
+from urllib.parse import urlsplit
+from pdnd_client._lazy import LazyModule
+from pdnd_client.exceptions import PdndCircuitOpenError, PdndException, PdndTokenError
+from pdnd_client.metrics import SPAN_TOKEN_REFRESH
+from pdnd_client.retry import RetryPolicy, call_with_retry, get_default_circuit_breakers
+
+if TYPE_CHECKING:
+    from pdnd_client.transport import Transport
+
+requests = LazyModule("requests")
+jwt = LazyModule("jwt")  # PyJWT
+jwt_exceptions = LazyModule("jwt.exceptions")
+serialization = LazyModule("cryptography.hazmat.primitives.serialization")
+transport_module = LazyModule("pdnd_client.transport")
+
+ASSERTION_LIFETIME = 43200 * 60  # 30 giorni
+DEFAULT_ASSERTION_MIN_VALIDITY = 3600  # validità residua minima per riutilizzare un client_assertion
+
+# Cache delle chiavi private già caricate, condivisa da tutti i generatori del processo.
+# La chiave viene riletta solo quando cambiano mtime, dimensione o inode del file (rotazione).
+_key_cache = {}
+_key_cache_lock = threading.Lock()
+
+
+# Restituisce la chiave privata (oggetto cryptography) e la firma del file da cui è stata letta.
+def load_private_key(path: str) -> tuple[object, tuple]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        raise FileNotFoundError(f"File della chiave privata non trovato: {path}")
+
+    signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    with _key_cache_lock:
+        cached = _key_cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1], signature
+
+    with open(path, "rb") as key_file:
+        pem = key_file.read()
+    try:
+        private_key = serialization.load_pem_private_key(pem, password=None)
+    except (ValueError, TypeError) as e:
+        raise Exception(f"❌ Errore durante il caricamento della chiave privata {path}:\n{str(e)}")
+
+    with _key_cache_lock:
+        _key_cache[path] = (signature, private_key)
+    return private_key, signature
+
 
 # Questa classe è responsabile della generazione di un token JWT basato sulla configurazione fornita.
 # Utilizza la libreria PyJWT per creare e firmare il token con una chiave privata.
@@ -28,10 +76,17 @@ class JWTGenerator:
         self.clientId = self.config.get("clientId")
         self.kid = self.config.get("kid")
         self.purposeId = self.config.get("purposeId")
+        self.token = None
         self.token_exp = None
         self.endpoint = "https://auth.interop.pagopa.it/token.oauth2"
         self.aud = "auth.interop.pagopa.it/client-assertion"
-
+        self.transport = None  # Se None viene usato il transport condiviso di processo
+        self.retry_policy = None  # RetryPolicy per la richiesta del token
+        self.circuit_breakers = None  # CircuitBreakers per host
+        self.instrumentation = None  # Instrumentation per la durata dei rinnovi del token
+        self.reuse_assertion = False
+        self.assertion_min_validity = DEFAULT_ASSERTION_MIN_VALIDITY
+        self._assertion = None  # (chiave di validità, client_assertion, exp)
 
     def set_debug(self, debug) -> bool:
         self.debug = debug
@@ -45,15 +100,117 @@ class JWTGenerator:
         elif self.env == "attestazione":
             self.endpoint = "https://auth.att.interop.pagopa.it/token.oauth2"
             self.aud = "auth.att.interop.pagopa.it/client-assertion"
+        elif self.env == "produzione":
+            self.endpoint = "https://auth.interop.pagopa.it/token.oauth2"
+            self.aud = "auth.interop.pagopa.it/client-assertion"
+        return True
+
+    # Restituisce una copia del generatore per un altro purposeId (ed eventualmente un altro
+    # ambiente o clientId), riutilizzando chiave, kid, issuer e transport già configurati.
+    def for_purpose(self, purpose_id: str, env: str = None, client_id: str = None) -> "JWTGenerator":
+        clone = copy.copy(self)
+        clone.purposeId = purpose_id
+        if client_id:
+            clone.client_id = client_id
+            clone.clientId = client_id
+        if env and env != self.env:
+            clone.set_env(env)
+        clone.token = None
+        clone.token_exp = None
+        return clone
+
+    # Abilita il riutilizzo del client_assertion per le richieste di token successive,
+    # finché gli restano almeno min_validity secondi di validità.
+    # Il client_assertion viene comunque rigenerato se cambiano la chiave o i claim.
+    def set_reuse_assertion(self, reuse: bool, min_validity: int = DEFAULT_ASSERTION_MIN_VALIDITY) -> bool:
+        self.reuse_assertion = reuse
+        self.assertion_min_validity = min_validity
+        if not reuse:
+            self._assertion = None
+        return True
+
+    # Imposta il transport HTTP (pool di connessioni keep-alive) usato per la richiesta del token.
+    def set_transport(self, transport: "Transport") -> bool:
+        self.transport = transport
+        return True
+
+    def get_transport(self) -> "Transport":
+        return self.transport or transport_module.get_default_transport()
+
+    # Imposta la politica di retry della richiesta del token. Con True vengono usate
+    # le regole predefinite (RetryPolicy.token()), con None i retry vengono disattivati.
+    def set_retry_policy(self, retry_policy=True) -> bool:
+        if retry_policy is True:
+            retry_policy = RetryPolicy.token()
+        self.retry_policy = retry_policy or None
         return True
 
+    # Abilita il circuit breaker verso il server di autenticazione. Con True viene usato
+    # l'insieme condiviso da tutti i client del processo, con None viene disattivato.
+    def set_circuit_breaker(self, circuit_breakers=True) -> bool:
+        if circuit_breakers is True:
+            circuit_breakers = get_default_circuit_breakers()
+        self.circuit_breakers = circuit_breakers or None
+        return True
+
+    # Imposta l'Instrumentation (pdnd_client.metrics) che riceve lo span token_refresh
+    # e il contatore dei rinnovi del token. Con None la raccolta viene disattivata.
+    def set_instrumentation(self, instrumentation) -> bool:
+        self.instrumentation = instrumentation
+        return True
+
+    # Richiede un nuovo access token. In caso di errore solleva PdndTokenError con codice
+    # di stato, body della risposta, numero di tentativi e tempo trascorso.
     def request_token(self) -> [str, int]:
+        if self.instrumentation is None:
+            return self._request_token()
+        self.instrumentation.count("token_refreshes")
+        with self.instrumentation.span(SPAN_TOKEN_REFRESH):
+            return self._request_token()
+
+    def _request_token(self) -> [str, int]:
+        data, headers, expiration_time = self._build_token_request()
+        host = urlsplit(self.endpoint).netloc
+        breaker = self.circuit_breakers.get(host) if self.circuit_breakers is not None else None
+
+        try:
+            response = call_with_retry(
+                lambda: self._post_token(data, headers), self.retry_policy, breaker, host
+            )
+        except PdndCircuitOpenError:
+            raise
+        except PdndException as e:
+            raise PdndTokenError(
+                f"❌ Errore nella richiesta POST: {e}", attempts=e.attempts, elapsed=e.elapsed
+            ) from e
+
+        if not response.ok:
+            raise PdndTokenError(
+                f"❌ Errore nella richiesta POST: {response.status_code} {response.text}",
+                status_code=response.status_code,
+                body=response.text,
+                attempts=response.pdnd_attempts,
+                elapsed=response.pdnd_elapsed
+            )
+
+        if response.status_code == 200:
+            self._handle_token_response(response.json(), expiration_time)
+
+        return self.token, self.token_exp
+
+    def _post_token(self, data: dict, headers: dict):
+        try:
+            return self.get_transport().post(self.endpoint, data=data, headers=headers)
+        except requests.exceptions.RequestException as e:
+            raise PdndException(str(e))
+
+    # Valida la configurazione e genera il client_assertion firmato.
+    # Restituisce il body e gli header della richiesta POST e la scadenza del client_assertion.
+    def _build_token_request(self) -> tuple[dict, dict, int]:
         if not self.client_id:
             raise ValueError("Client ID non specificato nella configurazione.")
         if not self.privKeyPath:
             raise ValueError("Percorso della chiave privata non specificato nella configurazione.")
-        if not os.path.exists(self.privKeyPath):
-            raise FileNotFoundError(f"File della chiave privata non trovato: {self.privKeyPath}")
         if not self.endpoint:
             raise ValueError("Endpoint non specificato nella configurazione.")
         if not self.issuer:
@@ -65,13 +222,41 @@ class JWTGenerator:
         if not self.purposeId:
             raise ValueError("Purpose ID non specificato nella configurazione.")
 
-        with open(self.privKeyPath, "rb") as key_file:
-            private_key = key_file.read()
+        client_assertion, expiration_time = self._get_client_assertion()
+
+        if self.debug:
+            print(f"\n✅ Enviroment: {self.env}")
+            print("\n✅ Client assertion generato con successo.")
+            print(f"\n📄 JWT (client_assertion):\n{client_assertion}")
+
+        data = {
+            "client_id": self.client_id,
+            "client_assertion": client_assertion,
+            "client_assertion_type": "urn:ietf:params:oauth:client-assertion-type:jwt-bearer",
+            "grant_type": "client_credentials"
+        }
+
+        headers = {
+            "Content-Type": "application/x-www-form-urlencoded"
+        }
+
+        return data, headers, expiration_time
+
+    # Restituisce il client_assertion firmato e la sua scadenza.
+    # Con reuse_assertion attivo, riusa quello generato in precedenza se è ancora valido
+    # ed è stato firmato con la stessa chiave e gli stessi claim.
+    def _get_client_assertion(self) -> tuple[str, int]:
+        private_key, key_signature = load_private_key(self.privKeyPath)
+        cache_key = (self.privKeyPath, key_signature, self.issuer, self.clientId, self.aud, self.purposeId, self.kid)
+
+        cached = self._assertion
+        if self.reuse_assertion and cached and cached[0] == cache_key:
+            if cached[2] - time.time() > self.assertion_min_validity:
+                return cached[1], cached[2]
 
         issued_at = int(time.time())
-        expiration_time = issued_at + (43200 * 60)  # 30 giorni
+        expiration_time = issued_at + ASSERTION_LIFETIME
         jti = secrets.token_hex(16)
-        access_token = None
 
         payload = {
             "iss": self.issuer,
@@ -99,55 +284,36 @@ class JWTGenerator:
         except jwt_exceptions.PyJWTError as e:
             raise Exception(f"❌ Errore durante la generazione del client_assertion JWT:\n{str(e)}")
 
-        if self.debug:
-            print(f"\n✅ Enviroment: {self.env}")
-            print("\n✅ Client assertion generato con successo.")
-            print(f"\n📄 JWT (client_assertion):\n{client_assertion}")
+        if self.reuse_assertion:
+            self._assertion = (cache_key, client_assertion, expiration_time)
+        return client_assertion, expiration_time
 
-        data = {
-            "client_id": self.client_id,
-            "client_assertion": client_assertion,
-            "client_assertion_type": "urn:ietf:params:oauth:client-assertion-type:jwt-bearer",
-            "grant_type": "client_credentials"
-        }
+    # Estrae l'access token e la sua scadenza dalla risposta del server di autenticazione.
+    def _handle_token_response(self, json_response: dict, expiration_time: int) -> [str, int]:
+        access_token = json_response.get("access_token")
 
-        headers = {
-            "Content-Type": "application/x-www-form-urlencoded"
-        }
+        if access_token:
+            try:
+                payload_part = access_token.split('.')[1]
+                padded = payload_part + '=' * (-len(payload_part) % 4)
+                decoded_payload = json.loads(base64.urlsafe_b64decode(padded))
+                self.token_exp = decoded_payload.get("exp")
+            except Exception:
+                self.token_exp = None
 
-        try:
-            response = requests.post(self.endpoint, data=data, headers=headers)
-            response.raise_for_status()  # Solleva eccezione per codici HTTP 4xx/5xx
-        except requests.exceptions.RequestException as e:
-            print(f"❌ Errore nella richiesta POST: {e}")
-            return None
+            if self.debug:
+                if self.token_exp:
+                    dt = datetime.fromtimestamp(self.token_exp, tz=timezone.utc)
+                    token_exp_str = dt.astimezone().strftime('%Y-%m-%d %H:%M:%S')
+                else:
+                    token_exp_str = 'non disponibile'
 
-        if response.status_code == 200:
-            json_response = response.json()
-            access_token = json_response.get("access_token")
-
-            if access_token:
-                try:
-                    payload_part = access_token.split('.')[1]
-                    padded = payload_part + '=' * (-len(payload_part) % 4)
-                    decoded_payload = json.loads(base64.urlsafe_b64decode(padded))
-                    self.token_exp = decoded_payload.get("exp")
-                except Exception:
-                    self.token_exp = None
-
-                if self.debug:
-                    if self.token_exp:
-                        dt = datetime.fromtimestamp(self.token_exp, tz=timezone.utc)
-                        token_exp_str = dt.astimezone().strftime('%Y-%m-%d %H:%M:%S')
-                    else:
-                        token_exp_str = 'non disponibile'
-
-                    print(f"\n🔐 Access Token:\n{access_token}")
-                    print(f"\n⏰ Scadenza token (exp): {token_exp_str}")
-
-                self.token = access_token
-                self.token_exp = self.token_exp or expiration_time
-            else:
-                raise Exception(f"⚠️ Nessun access token trovato:\n{json.dumps(json_response, indent=2)}")
+                print(f"\n🔐 Access Token:\n{access_token}")
+                print(f"\n⏰ Scadenza token (exp): {token_exp_str}")
+
+            self.token = access_token
+            self.token_exp = self.token_exp or expiration_time
+        else:
+            raise Exception(f"⚠️ Nessun access token trovato:\n{json.dumps(json_response, indent=2)}")
 
         return self.token, self.token_exp
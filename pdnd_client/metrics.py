@@ -0,0 +1,151 @@
+# pdnd_client/metrics.py
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Nomi degli span emessi da PDNDClient e JWTGenerator.
+SPAN_TOKEN_LOAD = "token_load"
+SPAN_TOKEN_REFRESH = "token_refresh"
+SPAN_REQUEST_SEND = "request_send"
+SPAN_TTFB = "ttfb"
+SPAN_BODY_READ = "body_read"
+SPAN_JSON_DECODE = "json_decode"
+
+
+# Percentile (metodo nearest-rank) di una lista di campioni; 0.0 se la lista è vuota.
+def percentile(samples: list, q: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(max(math.ceil(q / 100 * len(ordered)) - 1, 0), len(ordered) - 1)
+    return ordered[index]
+
+
+class _Histogram:
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    escaped = (f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"' for k, v in labels)
+    return "{" + ",".join(escaped) + "}"
+
+
+# La classe Metrics raccoglie in memoria istogrammi di latenza e contatori, con etichette,
+# ed esporta i valori nel formato testuale di Prometheus con to_prometheus().
+class Metrics:
+    def __init__(self, prefix: str = "pdnd", buckets: tuple = DEFAULT_BUCKETS):
+        self.prefix = prefix
+        self.buckets = tuple(sorted(buckets))
+        self._histograms = {}
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = _Histogram(self.buckets)
+            histogram.observe(value)
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def get_counter(self, name: str, **labels) -> float:
+        with self._lock:
+            return self._counters.get((name, tuple(sorted(labels.items()))), 0)
+
+    # Restituisce count, somma e conteggi per bucket (non cumulativi) di un istogramma.
+    def get_histogram(self, name: str, **labels) -> dict | None:
+        with self._lock:
+            histogram = self._histograms.get((name, tuple(sorted(labels.items()))))
+            if histogram is None:
+                return None
+            return {"count": histogram.count, "sum": histogram.sum, "buckets": list(histogram.counts)}
+
+    def to_prometheus(self) -> str:
+        lines = []
+        with self._lock:
+            histograms = sorted(self._histograms.items())
+            counters = sorted(self._counters.items())
+
+        declared = set()
+        for (name, labels), histogram in histograms:
+            metric = f"{self.prefix}_{name}_seconds"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} histogram")
+            cumulative = 0
+            for bound, count in zip(list(self.buckets) + ["+Inf"], histogram.counts):
+                cumulative += count
+                lines.append(f"{metric}_bucket{_format_labels(labels + (('le', bound),))} {cumulative}")
+            lines.append(f"{metric}_sum{_format_labels(labels)} {histogram.sum}")
+            lines.append(f"{metric}_count{_format_labels(labels)} {histogram.count}")
+
+        for (name, labels), value in counters:
+            metric = f"{self.prefix}_{name}_total"
+            if metric not in declared:
+                declared.add(metric)
+                lines.append(f"# TYPE {metric} counter")
+            lines.append(f"{metric}{_format_labels(labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+# La classe Instrumentation riceve gli eventi temporizzati (span) e i contatori emessi dal client.
+# Ogni span viene registrato nell'istogramma "<nome span>" delle Metrics e passato agli hook
+# registrati con add_hook(), che ricevono (nome, durata in secondi, attributi).
+# Gli errori sollevati da un hook vengono ignorati per non interrompere la chiamata.
+# Se l'instrumentation non è impostata sul client, il costo per chiamata è un solo controllo su None.
+class Instrumentation:
+    def __init__(self, metrics: Metrics = None):
+        self.metrics = metrics if metrics is not None else Metrics()
+        self.hooks = []
+
+    def add_hook(self, hook) -> bool:
+        self.hooks.append(hook)
+        return True
+
+    def remove_hook(self, hook) -> bool:
+        self.hooks.remove(hook)
+        return True
+
+    def emit(self, name: str, duration: float, **attrs):
+        self.metrics.observe(name, duration, **attrs)
+        for hook in self.hooks:
+            try:
+                hook(name, duration, attrs)
+            except Exception:
+                pass
+
+    def count(self, name: str, value: float = 1, **labels):
+        self.metrics.inc(name, value, **labels)
+
+    # Misura la durata del blocco e la emette come span; in caso di eccezione
+    # l'attributo error riporta il tipo dell'errore.
+    @contextmanager
+    def span(self, name: str, **attrs):
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException as e:
+            self.emit(name, time.perf_counter() - started, **attrs, error=type(e).__name__)
+            raise
+        self.emit(name, time.perf_counter() - started, **attrs)
@@ -0,0 +1,135 @@
+# pdnd_client/pagination.py
+
+import re
+from urllib.parse import urljoin
+
+# Strategie di paginazione per PDNDClient.paginate().
+# Ogni strategia sa come costruire la richiesta della prima pagina, come estrarre gli
+# elementi dalla risposta e come ricavare la richiesta della pagina successiva
+# (None quando le pagine sono finite). Una richiesta è una coppia (url, filtri).
+
+
+# Restituisce il valore che si trova in data seguendo le chiavi di path (es. "data.items").
+def get_path(data, path):
+    if not path:
+        return data
+    if isinstance(path, str):
+        path = path.split(".")
+    for key in path:
+        if not isinstance(data, dict):
+            return None
+        data = data.get(key)
+    return data
+
+
+# Classe base delle strategie: items_path indica dove si trova la lista degli elementi
+# nella risposta JSON (None se la risposta è essa stessa una lista).
+class Pagination:
+    def __init__(self, items_path=None):
+        self.items_path = items_path
+
+    def first_request(self, url: str, filters: dict) -> tuple[str, dict]:
+        return url, dict(filters)
+
+    def extract_items(self, data) -> list:
+        items = get_path(data, self.items_path)
+        return items if isinstance(items, list) else []
+
+    def next_request(self, request: tuple[str, dict], data, headers, items: list) -> tuple[str, dict] | None:
+        raise NotImplementedError
+
+
+# Paginazione offset/limit: ?offset=0&limit=100, ?offset=100&limit=100, ...
+# Si ferma alla prima pagina vuota oppure, se la risposta riporta il numero totale di elementi
+# (total_path), quando l'offset raggiunge il totale. Una pagina con meno di limit elementi non
+# basta: molti gateway riducono la dimensione massima della pagina rispetto al limit richiesto.
+class OffsetPagination(Pagination):
+    def __init__(self, limit: int = 100, offset_param: str = "offset", limit_param: str = "limit",
+                 start: int = 0, items_path=None, total_path="total"):
+        super().__init__(items_path)
+        if limit < 1:
+            raise ValueError("Il limite deve essere maggiore di zero.")
+        self.limit = limit
+        self.offset_param = offset_param
+        self.limit_param = limit_param
+        self.start = start
+        self.total_path = total_path
+
+    def first_request(self, url, filters):
+        return url, {**filters, self.offset_param: self.start, self.limit_param: self.limit}
+
+    def next_request(self, request, data, headers, items):
+        if not items:
+            return None
+        url, filters = request
+        offset = int(filters[self.offset_param]) + len(items)
+        total = get_path(data, self.total_path) if self.total_path else None
+        if isinstance(total, int) and not isinstance(total, bool) and offset >= total:
+            return None
+        return url, {**filters, self.offset_param: offset}
+
+
+# Paginazione per numero di pagina: ?page=1&size=50, ?page=2&size=50, ...
+# Si ferma alla prima pagina vuota o, se page_size è indicato, alla prima pagina incompleta.
+class PageNumberPagination(Pagination):
+    def __init__(self, page_size: int = None, page_param: str = "page", size_param: str = "size",
+                 start: int = 1, items_path=None):
+        super().__init__(items_path)
+        self.page_size = page_size
+        self.page_param = page_param
+        self.size_param = size_param
+        self.start = start
+
+    def first_request(self, url, filters):
+        filters = {**filters, self.page_param: self.start}
+        if self.page_size:
+            filters[self.size_param] = self.page_size
+        return url, filters
+
+    def next_request(self, request, data, headers, items):
+        if not items or (self.page_size and len(items) < self.page_size):
+            return None
+        url, filters = request
+        return url, {**filters, self.page_param: int(filters[self.page_param]) + 1}
+
+
+# Paginazione a cursore: il cursore della pagina successiva si trova nella risposta
+# (cursor_path) e va passato nel parametro cursor_param. Si ferma quando il cursore è vuoto.
+class CursorPagination(Pagination):
+    def __init__(self, cursor_path="next_cursor", cursor_param: str = "cursor", items_path=None):
+        super().__init__(items_path)
+        self.cursor_path = cursor_path
+        self.cursor_param = cursor_param
+
+    def next_request(self, request, data, headers, items):
+        cursor = get_path(data, self.cursor_path)
+        if not cursor:
+            return None
+        url, filters = request
+        return url, {**filters, self.cursor_param: cursor}
+
+
+# Paginazione con link alla pagina successiva nel body (es. {"links": {"next": "..."}}).
+# Il link può essere assoluto o relativo e contiene già tutti i parametri della query.
+class NextLinkPagination(Pagination):
+    def __init__(self, next_path="next", items_path=None):
+        super().__init__(items_path)
+        self.next_path = next_path
+
+    def next_request(self, request, data, headers, items):
+        link = get_path(data, self.next_path)
+        if not link:
+            return None
+        return urljoin(request[0], link), {}
+
+
+_LINK_NEXT = re.compile(r'<([^>]*)>\s*;[^,]*\brel="?next"?', re.IGNORECASE)
+
+
+# Paginazione tramite l'header HTTP Link (RFC 8288) con rel="next".
+class LinkHeaderPagination(Pagination):
+    def next_request(self, request, data, headers, items):
+        match = _LINK_NEXT.search(headers.get("Link", "") if headers else "")
+        if not match:
+            return None
+        return urljoin(request[0], match.group(1)), {}
@@ -0,0 +1,192 @@
+# pdnd_client/rate_limit.py
+
+import threading
+import time
+from email.utils import parsedate_to_datetime
+
+DEFAULT_RATE = None  # richieste al secondo; None = nessun limite fisso
+DEFAULT_MAX_CONCURRENCY = 16
+THROTTLE_STATUSES = (429, 503)
+
+
+# Interpreta l'header Retry-After (secondi oppure data HTTP) e restituisce i secondi di attesa.
+def parse_retry_after(value) -> float | None:
+    if not value:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(parsedate_to_datetime(value).timestamp() - time.time(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+
+# Se gli header RateLimit-* / X-RateLimit-* indicano che le richieste disponibili sono finite,
+# restituisce i secondi che mancano al reset della finestra.
+def parse_rate_limit_reset(headers) -> float | None:
+    for prefix in ("RateLimit", "X-RateLimit"):
+        remaining = headers.get(f"{prefix}-Remaining")
+        reset = headers.get(f"{prefix}-Reset")
+        if remaining is None or reset is None:
+            continue
+        try:
+            if int(remaining) > 0:
+                return None
+            reset = float(reset)
+        except (TypeError, ValueError):
+            return None
+        # Alcuni server indicano il reset come timestamp assoluto invece che in secondi
+        return max(reset - time.time(), 0.0) if reset > 1e9 else reset
+    return None
+
+
+# Stato del limitatore per una coppia (host, finalità).
+class _Bucket:
+    def __init__(self, rate: float, concurrency: int):
+        self.rate = rate
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.limit = float(concurrency)
+        self.in_flight = 0
+        self.blocked_until = 0.0
+        self.throttled = 0
+
+
+# La classe RateLimiter limita le chiamate per host e finalità (purposeId) con un limite di
+# concorrenza adattivo in stile AIMD: a ogni risposta 429/503 la concorrenza viene ridotta in modo
+# moltiplicativo, a ogni risposta positiva risale gradualmente fino a max_concurrency.
+# Per default non c'è un limite fisso di richieste al secondo: è il server, con le risposte 429/503
+# e gli header, a determinare il ritmo. Se rate è indicato si aggiunge un token bucket (rate richieste
+# al secondo, con raffiche fino a burst) che viene ridotto e fatto risalire allo stesso modo.
+# Retry-After e gli header RateLimit-Remaining/RateLimit-Reset sospendono le chiamate
+# verso quella coppia fino al momento indicato dal server.
+# Un'unica istanza (get_default_rate_limiter) può essere condivisa da tutti i PDNDClient del processo.
+class RateLimiter:
+    def __init__(self, rate: float = DEFAULT_RATE, burst: float = None,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY, min_concurrency: int = 1,
+                 min_rate: float = 0.1, decrease_factor: float = 0.5, increase_step: float = 1.0):
+        if (rate is not None and rate <= 0) or max_concurrency < 1 or min_concurrency < 1:
+            raise ValueError("Rate e concorrenza devono essere maggiori di zero.")
+        self.rate = rate
+        self.burst = burst if burst is not None or rate is None else max(rate, 1.0)
+        self.max_concurrency = max_concurrency
+        self.min_concurrency = min(min_concurrency, max_concurrency)
+        self.min_rate = min(min_rate, rate) if rate is not None else min_rate
+        self.decrease_factor = decrease_factor
+        self.increase_step = increase_step
+        self._buckets = {}
+        self._cond = threading.Condition()
+
+    def _bucket(self, key) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.rate, self.max_concurrency)
+        return bucket
+
+    # Attende finché la chiamata verso key può partire. Con timeout restituisce False
+    # se il permesso non arriva in tempo.
+    def acquire(self, key, timeout: float = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            bucket = self._bucket(key)
+            while True:
+                now = time.monotonic()
+                if bucket.rate is not None:
+                    bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+                bucket.updated = now
+
+                if now < bucket.blocked_until:
+                    wait = bucket.blocked_until - now
+                elif bucket.in_flight >= int(bucket.limit):
+                    wait = None
+                elif bucket.rate is not None and bucket.tokens < 1:
+                    wait = (1 - bucket.tokens) / bucket.rate
+                else:
+                    bucket.tokens -= 1
+                    bucket.in_flight += 1
+                    return True
+
+                if deadline is not None:
+                    remaining = deadline - now
+                    if remaining <= 0:
+                        return False
+                    wait = remaining if wait is None else min(wait, remaining)
+                self._cond.wait(wait)
+
+    # Registra l'esito della chiamata e adatta concorrenza e rate.
+    def release(self, key, status_code: int = None, headers=None):
+        headers = headers or {}
+        with self._cond:
+            bucket = self._bucket(key)
+            bucket.in_flight = max(bucket.in_flight - 1, 0)
+            now = time.monotonic()
+
+            if status_code in THROTTLE_STATUSES:
+                bucket.throttled += 1
+                bucket.limit = max(float(self.min_concurrency), bucket.limit * self.decrease_factor)
+                if bucket.rate is not None:
+                    bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+                    bucket.tokens = 0.0
+                retry_after = parse_retry_after(headers.get("Retry-After"))
+                if retry_after:
+                    bucket.blocked_until = max(bucket.blocked_until, now + retry_after)
+            elif status_code is not None and status_code < 400:
+                bucket.limit = min(float(self.max_concurrency), bucket.limit + self.increase_step / bucket.limit)
+                if bucket.rate is not None:
+                    bucket.rate = min(self.rate, bucket.rate + self.rate * 0.05)
+
+            reset = parse_rate_limit_reset(headers)
+            if reset:
+                bucket.blocked_until = max(bucket.blocked_until, now + reset)
+            self._cond.notify_all()
+
+    # Context manager: acquisisce il permesso e lo rilascia all'uscita.
+    # L'esito va comunicato con slot.update(status_code, headers).
+    def slot(self, key) -> "_Slot":
+        return _Slot(self, key)
+
+    def stats(self, key) -> dict:
+        with self._cond:
+            bucket = self._bucket(key)
+            return {
+                "rate": bucket.rate,
+                "concurrency": int(bucket.limit),
+                "in_flight": bucket.in_flight,
+                "throttled": bucket.throttled,
+                "blocked_for": max(bucket.blocked_until - time.monotonic(), 0.0)
+            }
+
+
+class _Slot:
+    def __init__(self, limiter: RateLimiter, key):
+        self.limiter = limiter
+        self.key = key
+        self.status_code = None
+        self.headers = None
+
+    def update(self, status_code: int, headers=None):
+        self.status_code = status_code
+        self.headers = headers
+
+    def __enter__(self):
+        self.limiter.acquire(self.key)
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.limiter.release(self.key, self.status_code, self.headers)
+        return False
+
+
+_default_limiter = None
+_default_lock = threading.Lock()
+
+
+# Restituisce il RateLimiter condiviso a livello di processo.
+def get_default_rate_limiter() -> RateLimiter:
+    global _default_limiter
+    with _default_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter()
+        return _default_limiter
@@ -0,0 +1,250 @@
+# pdnd_client/retry.py
+
+import asyncio
+import random
+import threading
+import time
+from pdnd_client.exceptions import PdndCircuitOpenError, PdndException
+from pdnd_client.rate_limit import parse_retry_after
+
+DEFAULT_RETRY_STATUSES = (429, 502, 503, 504)
+DEFAULT_FAILURE_THRESHOLD = 5
+DEFAULT_RESET_TIMEOUT = 30.0
+DEFAULT_RETRY_AFTER_MAX = 30.0
+DEFAULT_DEADLINE = 60.0
+
+
+# La classe RetryPolicy descrive quando e quanto ritentare una chiamata:
+# - max_attempts: numero massimo di tentativi (compreso il primo);
+# - backoff esponenziale limitato (backoff_base * 2^n, al massimo backoff_max) con jitter
+#   casuale, per evitare che più client ritentino tutti nello stesso istante;
+# - deadline: tempo massimo complessivo in secondi, oltre il quale non si ritenta più;
+# - retry_statuses: codici HTTP che provocano un nuovo tentativo (Retry-After viene rispettato);
+# - retry_after_max: attesa massima accettata da Retry-After: se il server chiede di attendere di più
+#   non si ritenta e il chiamante riceve subito l'errore (PdndRateLimitError riporta retry_after);
+# - retry_connection_errors: se ritentare su errori di rete (connessione rifiutata, reset, timeout).
+class RetryPolicy:
+    def __init__(self, max_attempts: int = 3, backoff_base: float = 0.2, backoff_max: float = 10.0,
+                 jitter: bool = True, deadline: float = None, retry_statuses=DEFAULT_RETRY_STATUSES,
+                 retry_connection_errors: bool = True, retry_after_max: float = DEFAULT_RETRY_AFTER_MAX):
+        if max_attempts < 1:
+            raise ValueError("Il numero di tentativi deve essere maggiore di zero.")
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.jitter = jitter
+        self.deadline = deadline
+        self.retry_statuses = tuple(retry_statuses)
+        self.retry_connection_errors = retry_connection_errors
+        self.retry_after_max = retry_after_max
+
+    # Regole predefinite per le chiamate idempotenti (GET verso le API).
+    @classmethod
+    def idempotent(cls) -> "RetryPolicy":
+        return cls(deadline=DEFAULT_DEADLINE)
+
+    # Regole predefinite per la richiesta del token: pochi tentativi, senza ritentare
+    # sui 4xx (credenziali o client assertion non validi non migliorano ritentando).
+    @classmethod
+    def token(cls) -> "RetryPolicy":
+        return cls(max_attempts=3, backoff_base=0.5, backoff_max=5.0, deadline=30.0,
+                   retry_statuses=(429, 500, 502, 503, 504))
+
+    # Attesa prima del tentativo successivo a quello indicato (1 = dopo il primo tentativo).
+    def backoff(self, attempt: int) -> float:
+        delay = min(self.backoff_max, self.backoff_base * (2 ** (attempt - 1)))
+        return random.uniform(0, delay) if self.jitter else delay
+
+    # Restituisce l'attesa prima di un nuovo tentativo, oppure None se non va ritentato.
+    def next_delay(self, attempt: int, elapsed: float, retry_after: float = None) -> float | None:
+        if attempt >= self.max_attempts:
+            return None
+        if retry_after is not None and self.retry_after_max is not None and retry_after > self.retry_after_max:
+            return None
+        delay = retry_after if retry_after is not None else self.backoff(attempt)
+        if self.deadline is not None and elapsed + delay > self.deadline:
+            return None
+        return delay
+
+
+# La classe CircuitBreaker protegge un host che non risponde: dopo failure_threshold errori
+# consecutivi (errori di rete o 5xx) il circuito si apre e le chiamate falliscono subito
+# con PdndCircuitOpenError, senza occupare thread in attesa di timeout. Dopo reset_timeout
+# secondi viene lasciata passare una chiamata di prova: se va a buon fine il circuito si chiude.
+class CircuitBreaker:
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial_in_progress = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self.opened_at is None:
+                return "closed"
+            if time.monotonic() - self.opened_at >= self.reset_timeout:
+                return "half_open"
+            return "open"
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.opened_at is None:
+                return True
+            if time.monotonic() - self.opened_at < self.reset_timeout or self._trial_in_progress:
+                return False
+            self._trial_in_progress = True
+            return True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial_in_progress = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self._trial_in_progress or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._trial_in_progress = False
+
+    # Chiude la chiamata di prova senza registrarne l'esito: va usato quando la chiamata
+    # si interrompe per un motivo che non dipende dall'host (transport chiuso, interruzione, cancellazione).
+    def release_trial(self):
+        with self._lock:
+            self._trial_in_progress = False
+
+    def retry_in(self) -> float:
+        with self._lock:
+            if self.opened_at is None:
+                return 0.0
+            return max(self.reset_timeout - (time.monotonic() - self.opened_at), 0.0)
+
+
+# Insieme di CircuitBreaker, uno per host, creati alla prima richiesta.
+class CircuitBreakers:
+    def __init__(self, failure_threshold: int = DEFAULT_FAILURE_THRESHOLD,
+                 reset_timeout: float = DEFAULT_RESET_TIMEOUT):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def get(self, host: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(host)
+            if breaker is None:
+                breaker = self._breakers[host] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+
+_default_breakers = None
+_default_lock = threading.Lock()
+
+
+# Restituisce l'insieme di circuit breaker condiviso a livello di processo.
+def get_default_circuit_breakers() -> CircuitBreakers:
+    global _default_breakers
+    with _default_lock:
+        if _default_breakers is None:
+            _default_breakers = CircuitBreakers()
+        return _default_breakers
+
+
+def _is_failure(status_code: int) -> bool:
+    return status_code >= 500
+
+
+def _check_breaker(breaker: CircuitBreaker, host: str, attempts: int, started: float):
+    if breaker is not None and not breaker.allow():
+        raise PdndCircuitOpenError(
+            f"❌ Circuito aperto per {host}: chiamate sospese per {breaker.retry_in():.1f}s",
+            attempts=attempts,
+            elapsed=time.monotonic() - started
+        )
+
+
+# Esegue send() applicando policy e breaker. send() restituisce una risposta con status_code
+# e headers oppure solleva PdndException per gli errori di rete.
+# Alla risposta finale vengono aggiunti gli attributi pdnd_attempts e pdnd_elapsed;
+# le eccezioni riportano attempts ed elapsed.
+def call_with_retry(send, policy: RetryPolicy = None, breaker: CircuitBreaker = None, host: str = None):
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        _check_breaker(breaker, host, attempt - 1, started)
+        try:
+            response = send()
+        except PdndException as e:
+            if breaker is not None:
+                breaker.record_failure()
+            elapsed = time.monotonic() - started
+            delay = policy.next_delay(attempt, elapsed) if policy and policy.retry_connection_errors else None
+            if delay is None:
+                e.attempts, e.elapsed = attempt, elapsed
+                raise
+            time.sleep(delay)
+            continue
+        except BaseException:
+            if breaker is not None:
+                breaker.release_trial()
+            raise
+
+        if breaker is not None:
+            breaker.record_failure() if _is_failure(response.status_code) else breaker.record_success()
+
+        elapsed = time.monotonic() - started
+        delay = None
+        if policy and response.status_code in policy.retry_statuses:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            delay = policy.next_delay(attempt, elapsed, retry_after)
+        if delay is None:
+            response.pdnd_attempts, response.pdnd_elapsed = attempt, elapsed
+            return response
+        response.close()
+        time.sleep(delay)
+
+
+# Versione asincrona di call_with_retry.
+async def async_call_with_retry(send, policy: RetryPolicy = None, breaker: CircuitBreaker = None,
+                                host: str = None):
+    started = time.monotonic()
+    attempt = 0
+    while True:
+        attempt += 1
+        _check_breaker(breaker, host, attempt - 1, started)
+        try:
+            response = await send()
+        except PdndException as e:
+            if breaker is not None:
+                breaker.record_failure()
+            elapsed = time.monotonic() - started
+            delay = policy.next_delay(attempt, elapsed) if policy and policy.retry_connection_errors else None
+            if delay is None:
+                e.attempts, e.elapsed = attempt, elapsed
+                raise
+            await asyncio.sleep(delay)
+            continue
+        except BaseException:
+            if breaker is not None:
+                breaker.release_trial()
+            raise
+
+        if breaker is not None:
+            breaker.record_failure() if _is_failure(response.status_code) else breaker.record_success()
+
+        elapsed = time.monotonic() - started
+        delay = None
+        if policy and response.status_code in policy.retry_statuses:
+            retry_after = parse_retry_after(response.headers.get("Retry-After"))
+            delay = policy.next_delay(attempt, elapsed, retry_after)
+        if delay is None:
+            response.pdnd_attempts, response.pdnd_elapsed = attempt, elapsed
+            return response
+        await response.aclose()
+        await asyncio.sleep(delay)
@@ -0,0 +1,100 @@
+# pdnd_client/singleflight.py
+
+import asyncio
+import threading
+
+# Accorpamento (single-flight) delle chiamate identiche in corso.
+# La prima chiamata con una certa chiave esegue davvero la funzione; quelle che arrivano
+# con la stessa chiave mentre è ancora in corso ne attendono l'esito e ricevono lo stesso
+# risultato (o la stessa eccezione). Una volta terminata, la chiave viene liberata:
+# non si tratta di una cache, ma solo di una deduplicazione delle chiamate contemporanee.
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+# Versione per i thread (PDNDClient).
+class SingleFlight:
+    def __init__(self):
+        self.calls = 0
+        self.collapsed = 0
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        with self._lock:
+            self.calls += 1
+            call = self._in_flight.get(key)
+            leader = call is None
+            if leader:
+                call = self._in_flight[key] = _Call()
+            else:
+                self.collapsed += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+            call.done.set()
+        return call.result
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"calls": self.calls, "collapsed": self.collapsed, "in_flight": len(self._in_flight)}
+
+
+# Versione per asyncio (AsyncPDNDClient): le chiamate accorpate attendono lo stesso future.
+# Se la chiamata che esegue fn viene cancellata, la cancellazione non si propaga a quelle in attesa:
+# la prima di esse esegue di nuovo fn e le altre ne attendono l'esito.
+class AsyncSingleFlight:
+    def __init__(self):
+        self.calls = 0
+        self.collapsed = 0
+        self._in_flight = {}
+
+    async def do(self, key, fn):
+        self.calls += 1
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.collapsed += 1
+        while future is not None:
+            try:
+                return await asyncio.shield(future)
+            except asyncio.CancelledError:
+                if not future.cancelled():
+                    raise  # è stata cancellata questa chiamata, non quella accorpata
+            future = self._in_flight.get(key)
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # evita l'avviso "exception was never retrieved" se nessuno attende
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self._in_flight[key]
+
+    def stats(self) -> dict:
+        return {"calls": self.calls, "collapsed": self.collapsed, "in_flight": len(self._in_flight)}
@@ -0,0 +1,122 @@
+# pdnd_client/streaming.py
+
+import codecs
+import json
+from collections.abc import Iterable, Iterator
+
+_WHITESPACE = " \t\n\r"
+# Caratteri che, subito dopo un numero, indicano che il numero potrebbe continuare.
+_NUMBER_CONTINUATION = ".eE+-0123456789"
+_decoder = json.JSONDecoder()
+
+
+# La classe _JSONStreamReader legge un documento JSON da un iterabile di chunk di byte,
+# decodificandolo in modo incrementale. Il buffer contiene solo la parte non ancora
+# consumata del documento, quindi la memoria usata dipende dalla dimensione del singolo
+# valore letto e non da quella dell'intera risposta.
+class _JSONStreamReader:
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+
+    # Aggiunge al buffer almeno min_size caratteri (o fino alla fine dello stream),
+    # scartando la parte già consumata.
+    def _fill(self, min_size: int = 1) -> bool:
+        if self.eof:
+            return False
+        pending = [self.buffer[self.pos:]]
+        added = 0
+        while added < min_size:
+            try:
+                chunk = next(self._chunks)
+            except StopIteration:
+                pending.append(self._utf8.decode(b"", final=True))
+                self.eof = True
+                break
+            text = self._utf8.decode(chunk)
+            pending.append(text)
+            added += len(text)
+        self.buffer = "".join(pending)
+        self.pos = 0
+        return True
+
+    # Restituisce il prossimo carattere significativo senza consumarlo (None a fine stream).
+    def peek(self) -> str | None:
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                return None
+
+    def expect(self, char: str):
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"JSON non valido: atteso '{char}', trovato {found!r}")
+        self.pos += 1
+
+    # Decodifica il prossimo valore JSON completo.
+    # Se il buffer non contiene ancora tutto il valore, legge altri chunk raddoppiando la
+    # quantità richiesta, così che anche i valori grandi vengano decodificati in tempo lineare.
+    def read_value(self):
+        if self.peek() is None:
+            raise ValueError("JSON non valido: fine inattesa dello stream")
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buffer, self.pos)
+                # Un letterale alla fine del buffer, o un numero seguito da fine buffer, '.', 'e'
+                # o da un segno (es. "1." + "5"), potrebbe continuare nel chunk successivo.
+                if self.eof or not self._may_continue(value, end):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+            self._fill(max(len(self.buffer) - self.pos, 1))
+
+    def _may_continue(self, value, end: int) -> bool:
+        if end == len(self.buffer):
+            return True
+        is_number = isinstance(value, (int, float)) and not isinstance(value, bool)
+        return is_number and self.buffer[end] in _NUMBER_CONTINUATION
+
+
+# Restituisce uno alla volta gli elementi di un array JSON letto da chunk di byte.
+# Se path è None l'array deve essere il valore principale del documento, altrimenti path
+# indica le chiavi degli oggetti da attraversare per raggiungerlo (es. "data.items" oppure
+# ["data", "items"]). Se il percorso non esiste non viene restituito alcun elemento.
+# I valori che non fanno parte del percorso vengono decodificati e scartati.
+def iter_json_records(chunks: Iterable[bytes], path=None) -> Iterator:
+    if isinstance(path, str):
+        path = [part for part in path.split(".") if part]
+    reader = _JSONStreamReader(chunks)
+
+    for component in path or []:
+        reader.expect("{")
+        while True:
+            if reader.peek() == "}":
+                return
+            key = reader.read_value()
+            reader.expect(":")
+            if key == component:
+                break
+            reader.read_value()
+            if reader.peek() == ",":
+                reader.pos += 1
+
+    reader.expect("[")
+    if reader.peek() == "]":
+        return
+    while True:
+        yield reader.read_value()
+        char = reader.peek()
+        if char == ",":
+            reader.pos += 1
+        elif char == "]":
+            return
+        else:
+            raise ValueError(f"JSON non valido: atteso ',' o ']', trovato {char!r}")
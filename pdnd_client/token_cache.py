@@ -0,0 +1,106 @@
+# pdnd_client/token_cache.py
+
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+# Funzioni per la gestione del file del token condiviso tra più processi.
+# - La scrittura è atomica: il contenuto viene scritto in un file temporaneo nella stessa
+#   cartella e poi sostituito con os.replace, così un lettore vede sempre il file
+#   precedente o quello nuovo, mai uno scritto a metà.
+# - token_file_lock() acquisisce un lock esclusivo (advisory) su un file ".lock" accanto al
+#   file del token: chi deve rinnovare il token lo prende, rilegge il file e richiede un nuovo
+#   token solo se nessun altro processo lo ha già fatto nel frattempo.
+# - read_token_file() tiene in memoria il contenuto già letto e rilegge il JSON solo quando
+#   cambiano mtime, dimensione o inode del file.
+
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+# Legge il file del token e restituisce il dizionario {"token": ..., "exp": ...}
+# oppure None se il file non esiste o non è valido.
+def read_token_file(path: str) -> dict | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+
+    signature = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    with _cache_lock:
+        cached = _cache.get(path)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    except (json.JSONDecodeError, IOError):
+        return None
+
+    if not isinstance(data, dict) or "token" not in data or "exp" not in data:
+        data = None
+    with _cache_lock:
+        _cache[path] = (signature, data)
+    return data
+
+
+# Scrive il token e la sua scadenza nel file in modo atomico.
+def write_token_file(path: str, token: str, exp: str) -> bool:
+    data = json.dumps({"token": token, "exp": exp}, ensure_ascii=False)
+    return atomic_write(path, data.encode("utf-8"))
+
+
+# Scrive il contenuto in un file temporaneo nella stessa cartella e lo sostituisce
+# al file di destinazione con os.replace.
+def atomic_write(path: str, data: bytes) -> bool:
+    directory = os.path.dirname(path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=".pdnd_", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+    return True
+
+
+# Lock esclusivo tra processi (e tra thread) legato al file del token.
+@contextmanager
+def token_file_lock(path: str):
+    lock_path = f"{path}.lock"
+    directory = os.path.dirname(lock_path)
+    if directory and not os.path.exists(directory):
+        os.makedirs(directory, exist_ok=True)
+
+    with open(lock_path, "a+") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+        else:
+            lock_file.seek(0)
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
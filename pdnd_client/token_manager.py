@@ -0,0 +1,189 @@
+# pdnd_client/token_manager.py
+
+import threading
+import time
+from datetime import datetime
+from pdnd_client.token_cache import read_token_file, token_file_lock, write_token_file
+
+DEFAULT_REFRESH_SKEW = 60  # secondi di anticipo rispetto a exp
+DEFAULT_RETRY_INTERVAL = 5  # secondi di attesa dopo un refresh in background fallito
+
+# Converte una scadenza (timestamp, stringa "YYYY-MM-DD HH:MM:SS" o datetime) in timestamp.
+def exp_to_timestamp(exp) -> float | None:
+    if exp is None:
+        return None
+    if isinstance(exp, (int, float)):
+        return float(exp)
+    if isinstance(exp, str):
+        exp = datetime.strptime(exp, "%Y-%m-%d %H:%M:%S")
+    if isinstance(exp, datetime):
+        return exp.timestamp()
+    raise ValueError("L'exp deve essere un intero, una stringa o un oggetto datetime")
+
+
+# La classe TokenManager gestisce il ciclo di vita del voucher rilasciato da un JWTGenerator.
+# Il token viene rinnovato in anticipo rispetto alla scadenza (refresh_skew secondi prima di exp):
+# - se il token è ancora valido ma nella finestra di rinnovo, il refresh parte in background
+#   e il chiamante riceve subito il token corrente;
+# - se il token è scaduto, il chiamante attende il nuovo token.
+# I refresh concorrenti vengono accorpati in un'unica richiesta al server di autenticazione
+# (single-flight): i thread che arrivano durante un refresh attendono il suo esito.
+# Con start() viene avviato un thread che rinnova il token prima della scadenza anche
+# in assenza di richieste. Il manager è thread-safe e può essere usato da PDNDClient
+# tramite set_token_manager().
+# Se viene indicato token_file, il token è condiviso anche tra processi: il rinnovo avviene
+# sotto lock sul file e un processo che trova nel file un token già rinnovato da un altro
+# lo riutilizza invece di richiederne uno nuovo.
+class TokenManager:
+    def __init__(self, jwt_generator, refresh_skew: float = DEFAULT_REFRESH_SKEW,
+                 retry_interval: float = DEFAULT_RETRY_INTERVAL, token_file: str = None):
+        self.jwt_generator = jwt_generator
+        self.token_file = token_file
+        self.refresh_skew = refresh_skew
+        self.retry_interval = retry_interval
+        self.token = None
+        self.token_exp = None  # timestamp
+        self.last_error = None
+        self.refresh_count = 0
+        self._refreshing = False
+        self._next_background_attempt = 0.0
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._scheduler = None
+
+    # Imposta un token già disponibile (es. letto da file con load_token).
+    def set_token(self, token: str, exp) -> bool:
+        with self._cond:
+            self.token = token
+            self.token_exp = exp_to_timestamp(exp)
+        return True
+
+    def get_expiration(self) -> float | None:
+        return self.token_exp
+
+    # Restituisce un token valido, rinnovandolo se necessario.
+    def get_token(self) -> str:
+        now = time.time()
+        with self._cond:
+            token, exp = self.token, self.token_exp
+            if token and exp and now < exp - self.refresh_skew:
+                return token
+            if token and exp and now < exp:
+                self._start_background_refresh(now)
+                return token
+        return self.refresh(stale_token=token)
+
+    # Richiede un nuovo token, a meno che un altro thread non l'abbia già rinnovato
+    # rispetto a stale_token (il token che il chiamante considera non più valido).
+    def refresh(self, stale_token: str = None) -> str:
+        with self._cond:
+            while self._refreshing:
+                self._cond.wait()
+            if self.token and self.token != stale_token and self._is_valid():
+                return self.token
+            self._refreshing = True
+
+        try:
+            if self.token_file:
+                token, exp = self._refresh_from_file(stale_token)
+            else:
+                token, exp = self._request_token()
+        except Exception as e:
+            with self._cond:
+                self.last_error = e
+                self._refreshing = False
+                self._cond.notify_all()
+            raise
+
+        with self._cond:
+            self.token = token
+            self.token_exp = exp
+            self.last_error = None
+            self.refresh_count += 1
+            self._refreshing = False
+            self._cond.notify_all()
+        return token
+
+    def _request_token(self) -> tuple[str, float]:
+        result = self.jwt_generator.request_token()
+        if not result or not result[0]:
+            raise Exception("❌ Impossibile ottenere un nuovo token dal server di autenticazione")
+        token, exp = result
+        exp = exp_to_timestamp(exp)
+        if exp is None:
+            raise Exception("❌ Il token ricevuto non ha una scadenza")
+        return token, exp
+
+    # Con il lock sul file acquisito, rilegge il file: se un altro processo ha già rinnovato
+    # il token lo riutilizza, altrimenti ne richiede uno nuovo e lo salva.
+    def _refresh_from_file(self, stale_token: str) -> tuple[str, float]:
+        with token_file_lock(self.token_file):
+            data = read_token_file(self.token_file)
+            if data and data["token"] != stale_token:
+                try:
+                    exp = exp_to_timestamp(data["exp"])
+                except ValueError:
+                    exp = None
+                if exp is not None and time.time() < exp - self.refresh_skew:
+                    return data["token"], exp
+
+            token, exp = self._request_token()
+            exp_str = datetime.fromtimestamp(int(exp)).strftime("%Y-%m-%d %H:%M:%S")
+            write_token_file(self.token_file, token, exp_str)
+            return token, exp
+
+    def _is_valid(self) -> bool:
+        return bool(self.token) and self.token_exp is not None and time.time() < self.token_exp
+
+    # Avvia un refresh in background, se non ce n'è già uno in corso.
+    # Va chiamato con il lock acquisito.
+    def _start_background_refresh(self, now: float):
+        if self._refreshing or now < self._next_background_attempt:
+            return
+        self._next_background_attempt = now + self.retry_interval
+        stale_token = self.token
+        threading.Thread(target=self._background_refresh, args=(stale_token,), daemon=True).start()
+
+    def _background_refresh(self, stale_token: str):
+        try:
+            self.refresh(stale_token=stale_token)
+        except Exception:
+            pass  # l'errore resta in last_error, il token corrente è ancora valido
+
+    # Avvia il thread che rinnova il token refresh_skew secondi prima della scadenza.
+    def start(self) -> bool:
+        if self._scheduler and self._scheduler.is_alive():
+            return True
+        self._stop.clear()
+        self._scheduler = threading.Thread(target=self._run_scheduler, daemon=True)
+        self._scheduler.start()
+        return True
+
+    def stop(self) -> bool:
+        self._stop.set()
+        if self._scheduler:
+            self._scheduler.join()
+            self._scheduler = None
+        return True
+
+    def _run_scheduler(self):
+        while not self._stop.is_set():
+            with self._cond:
+                exp = self.token_exp if self.token else None
+            delay = 0 if exp is None else exp - self.refresh_skew - time.time()
+            if delay > 0:
+                self._stop.wait(delay)
+                continue
+            try:
+                self.refresh(stale_token=self.token)
+            except Exception:
+                pass  # l'errore resta in last_error, si riprova dopo retry_interval
+            self._stop.wait(self.retry_interval)
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
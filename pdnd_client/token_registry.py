@@ -0,0 +1,103 @@
+# pdnd_client/token_registry.py
+
+import threading
+import time
+from collections import OrderedDict
+from pdnd_client.token_manager import DEFAULT_REFRESH_SKEW, TokenManager
+
+DEFAULT_MAX_SIZE = 512
+
+# La classe TokenRegistry gestisce i token di più finalità (purposeId) con un unico processo.
+# A partire da un JWTGenerator di base (chiave, kid, issuer e ambiente già configurati)
+# crea un TokenManager per ogni chiave (env, clientId, purposeId), senza rileggere la
+# configurazione né ricreare il generatore da zero per ogni finalità.
+# Il registro ha una dimensione massima: quando viene superata sono rimosse prima le voci
+# con token scaduto e poi quelle usate meno di recente (LRU).
+# Le statistiche (hits, misses, refreshes, evictions) sono disponibili con stats().
+# PDNDClient può usare il registro con set_token_registry() e scegliere il token
+# per ogni chiamata passando purpose_id a get_api().
+class TokenRegistry:
+    def __init__(self, jwt_generator, max_size: int = DEFAULT_MAX_SIZE,
+                 refresh_skew: float = DEFAULT_REFRESH_SKEW):
+        if max_size < 1:
+            raise ValueError("La dimensione del registro deve essere maggiore di zero.")
+        self.jwt_generator = jwt_generator
+        self.max_size = max_size
+        self.refresh_skew = refresh_skew
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._evicted_refreshes = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _key(self, purpose_id: str = None, env: str = None, client_id: str = None) -> tuple:
+        return (
+            env or self.jwt_generator.env,
+            client_id or self.jwt_generator.clientId,
+            purpose_id or self.jwt_generator.purposeId
+        )
+
+    # Restituisce il TokenManager per la finalità indicata, creandolo se necessario.
+    # Se purpose_id, env o client_id non sono indicati, vengono usati quelli del generatore di base.
+    def get_manager(self, purpose_id: str = None, env: str = None, client_id: str = None) -> TokenManager:
+        key = self._key(purpose_id, env, client_id)
+        if not key[2]:
+            raise ValueError("Purpose ID non specificato.")
+
+        with self._lock:
+            manager = self._entries.get(key)
+            if manager is not None:
+                self._entries.move_to_end(key)
+                if manager.token and manager.token_exp and time.time() < manager.token_exp:
+                    self.hits += 1
+                else:
+                    self.misses += 1
+                return manager
+
+            self.misses += 1
+            generator = self.jwt_generator.for_purpose(key[2], env=key[0], client_id=key[1])
+            manager = TokenManager(generator, refresh_skew=self.refresh_skew)
+            self._entries[key] = manager
+            self._evict()
+            return manager
+
+    # Restituisce un token valido per la finalità indicata.
+    def get_token(self, purpose_id: str = None, env: str = None, client_id: str = None) -> str:
+        return self.get_manager(purpose_id, env, client_id).get_token()
+
+    # Rimuove le voci in eccesso: prima quelle con token scaduto, poi le meno usate di recente.
+    # Va chiamato con il lock acquisito.
+    def _evict(self):
+        if len(self._entries) <= self.max_size:
+            return
+        now = time.time()
+        for key in [k for k, m in self._entries.items() if not m.token_exp or m.token_exp <= now]:
+            if len(self._entries) <= self.max_size:
+                return
+            if self._entries[key] is next(reversed(self._entries.values())):
+                continue  # la voce appena inserita non ha ancora un token
+            self._remove(key)
+        while len(self._entries) > self.max_size:
+            self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: tuple):
+        manager = self._entries.pop(key)
+        self._evicted_refreshes += manager.refresh_count
+        self.evictions += 1
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> dict:
+        with self._lock:
+            refreshes = self._evicted_refreshes + sum(m.refresh_count for m in self._entries.values())
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "hits": self.hits,
+                "misses": self.misses,
+                "refreshes": refreshes,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / total if total else 0.0
+            }
@@ -0,0 +1,130 @@
+# pdnd_client/transport.py
+
+import threading
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING as URLLIB3_ACCEPT_ENCODING
+
+# Valori predefiniti del pool di connessioni e dei timeout (in secondi).
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 30.0
+
+# Codifiche di compressione che il transport sa decomprimere in streaming: gzip e deflate sempre,
+# br e zstd solo se sono installati i pacchetti brotli e zstandard (rilevati da urllib3).
+ACCEPT_ENCODING = ", ".join(encoding.strip() for encoding in URLLIB3_ACCEPT_ENCODING.split(","))
+
+# La classe Transport incapsula una requests.Session persistente con connessioni keep-alive.
+# Le connessioni TCP/TLS vengono riutilizzate tra una chiamata e l'altra, evitando un nuovo
+# handshake per ogni richiesta verso il gateway o verso il server di autenticazione.
+# La dimensione del pool può essere configurata in modo globale oppure per singolo host,
+# e a ogni richiesta vengono applicati i timeout di connessione e di lettura.
+# Un'unica istanza può essere condivisa da più PDNDClient e JWTGenerator (è thread-safe)
+# e va chiusa esplicitamente con close() oppure usata come context manager.
+class Transport:
+    def __init__(self, pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+                 pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+                 connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+                 read_timeout: float = DEFAULT_READ_TIMEOUT,
+                 pool_block: bool = False):
+        if pool_connections < 1 or pool_maxsize < 1:
+            raise ValueError("La dimensione del pool deve essere maggiore di zero.")
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.pool_block = pool_block
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.host_pools = {}
+        self.closed = False
+        self._lock = threading.Lock()
+        self.session = self._build_session()
+
+    # Crea la sessione e monta gli adapter con il pool predefinito per http e https.
+    def _build_session(self) -> requests.Session:
+        session = requests.Session()
+        adapter = self._build_adapter(self.pool_maxsize)
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        return session
+
+    def _build_adapter(self, pool_maxsize: int) -> HTTPAdapter:
+        return HTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=pool_maxsize,
+            pool_block=self.pool_block
+        )
+
+    # Imposta la dimensione del pool per uno specifico host (es. "auth.interop.pagopa.it"
+    # oppure "https://gateway.example.it:8443").
+    # Se lo schema non è indicato viene usato https.
+    def set_host_pool(self, host: str, pool_maxsize: int) -> bool:
+        if pool_maxsize < 1:
+            raise ValueError("La dimensione del pool deve essere maggiore di zero.")
+        prefix = host if "://" in host else f"https://{host}"
+        parts = urlsplit(prefix)
+        if not parts.netloc:
+            raise ValueError(f"Host non valido: {host}")
+        prefix = f"{parts.scheme}://{parts.netloc}/"
+        with self._lock:
+            self._ensure_open()
+            self.host_pools[prefix] = pool_maxsize
+            self.session.mount(prefix, self._build_adapter(pool_maxsize))
+        return True
+
+    # Imposta i timeout di connessione e di lettura applicati a tutte le richieste.
+    def set_timeouts(self, connect_timeout: float, read_timeout: float) -> bool:
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        return True
+
+    def get_timeout(self) -> tuple[float, float]:
+        return self.connect_timeout, self.read_timeout
+
+    # Esegue una richiesta HTTP sulla sessione condivisa.
+    # Se non viene passato un timeout esplicito, usa quelli configurati nel transport.
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        self._ensure_open()
+        kwargs.setdefault("timeout", self.get_timeout())
+        return self.session.request(method, url, **kwargs)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def _ensure_open(self):
+        if self.closed:
+            raise RuntimeError("Il transport è stato chiuso.")
+
+    # Chiude la sessione e rilascia tutte le connessioni del pool.
+    def close(self) -> bool:
+        with self._lock:
+            if not self.closed:
+                self.session.close()
+                self.closed = True
+        return True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+
+_default_transport = None
+_default_lock = threading.Lock()
+
+# Restituisce il transport condiviso a livello di processo, creandolo alla prima richiesta.
+# Viene usato da PDNDClient e JWTGenerator quando non ne viene impostato uno esplicito,
+# così che anche istanze diverse riutilizzino le stesse connessioni.
+def get_default_transport() -> Transport:
+    global _default_transport
+    with _default_lock:
+        if _default_transport is None or _default_transport.closed:
+            _default_transport = Transport()
+        return _default_transport
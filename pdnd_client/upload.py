@@ -0,0 +1,58 @@
+# pdnd_client/upload.py
+
+from collections.abc import AsyncIterable, Iterable
+from pdnd_client import jsonlib
+
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+
+# La classe RequestBody prepara il body delle richieste POST/PUT/PATCH:
+# - dict o list: serializzati in JSON (Content-Type: application/json);
+# - str, bytes, bytearray: inviati così come sono;
+# - file aperti in modalità binaria: letti e inviati a blocchi, senza caricarli in memoria;
+# - generatori o iterabili di bytes/str: inviati con Transfer-Encoding: chunked.
+# replayable indica se il body può essere inviato di nuovo (retry, rinnovo del token su 401):
+# lo sono i body in memoria e i file su cui è possibile fare seek; i generatori no.
+class RequestBody:
+    def __init__(self, body, content_type: str = None):
+        self.headers = {}
+        self.replayable = True
+        self._position = None
+
+        if body is None:
+            self.data = None
+        elif isinstance(body, (dict, list)):
+            self.data = jsonlib.dumps(body).encode("utf-8")
+            content_type = content_type or "application/json"
+        elif isinstance(body, str):
+            self.data = body.encode("utf-8")
+        elif isinstance(body, (bytes, bytearray, memoryview)):
+            self.data = bytes(body)
+        elif hasattr(body, "read"):
+            self.data = body
+            try:
+                self._position = body.tell() if body.seekable() else None
+            except (AttributeError, OSError):
+                self._position = None
+            self.replayable = self._position is not None
+        elif isinstance(body, (Iterable, AsyncIterable)):
+            self.data = _encode_chunks(body) if isinstance(body, Iterable) else body
+            self.replayable = False
+        else:
+            raise ValueError("Il body deve essere un dizionario, una stringa, dei byte, un file o un generatore.")
+
+        if content_type:
+            self.headers["Content-Type"] = content_type
+
+    # Riporta il file alla posizione iniziale prima di un nuovo invio.
+    def rewind(self):
+        if self._position is not None:
+            self.data.seek(self._position)
+
+
+def _encode_chunks(chunks):
+    for chunk in chunks:
+        if isinstance(chunk, str):
+            chunk = chunk.encode("utf-8")
+        if chunk:
+            yield chunk
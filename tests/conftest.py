@@ -0,0 +1,26 @@
+from datetime import timedelta
+from unittest.mock import Mock
+import pytest
+from pdnd_client.client import PDNDClient
+
+# Crea un PDNDClient con token e URL di test. Le altre impostazioni vengono passate per nome
+# e applicate con il setter corrispondente, es. make_client(retry_policy=policy) -> set_retry_policy(policy).
+@pytest.fixture
+def make_client():
+    def make(url="https://example.com/api", **settings):
+        client = PDNDClient()
+        client.set_token("test-token")
+        client.set_api_url(url)
+        for name, value in settings.items():
+            getattr(client, f"set_{name}")(value)
+        return client
+    return make
+
+# Crea una risposta finta con gli attributi letti dal client (ok, status_code, text, content, headers, elapsed).
+@pytest.fixture
+def make_response():
+    def make(status_code=200, text="OK", headers=None, **attributes):
+        attributes.setdefault("content", text.encode())
+        attributes.setdefault("elapsed", timedelta(milliseconds=20))
+        return Mock(ok=status_code < 400, status_code=status_code, text=text, headers=headers or {}, **attributes)
+    return make
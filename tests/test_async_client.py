@@ -0,0 +1,113 @@
+import asyncio
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from httpx._decoders import SUPPORTED_DECODERS
+from pdnd_client.async_client import AsyncPDNDClient, AsyncTransport
+
+# Crea un AsyncTransport che risponde tramite un handler locale invece che via rete.
+def mock_transport(handler):
+    transport = AsyncTransport()
+    transport.client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return transport
+
+def test_async_get_api_success():
+    def handler(request):
+        assert request.headers["Authorization"] == "Bearer test-token"
+        assert request.url.params["id"] == "1234"
+        return httpx.Response(200, text='{"ok": true}')
+
+    async def run():
+        async with AsyncPDNDClient() as client:
+            client.set_transport(mock_transport(handler))
+            client.set_token("test-token")
+            client.set_api_url("https://example.com/api")
+            client.set_filters("id=1234")
+            return await client.get_api()
+
+    assert asyncio.run(run()) == (200, '{"ok": true}')
+
+def test_async_get_api_failure():
+    async def run():
+        client = AsyncPDNDClient()
+        client.set_transport(mock_transport(lambda request: httpx.Response(500, text="boom")))
+        client.set_token("test-token")
+        client.set_api_url("https://example.com/api")
+        await client.get_api()
+
+    with pytest.raises(Exception, match="boom"):
+        asyncio.run(run())
+
+# Il semaforo limita il numero di richieste contemporaneamente in volo.
+def test_async_concurrency_limit():
+    in_flight = {"now": 0, "max": 0}
+
+    async def handler(request):
+        in_flight["now"] += 1
+        in_flight["max"] = max(in_flight["max"], in_flight["now"])
+        await asyncio.sleep(0.01)
+        in_flight["now"] -= 1
+        return httpx.Response(200, text="OK")
+
+    async def run():
+        client = AsyncPDNDClient(concurrency=3)
+        client.set_transport(mock_transport(handler))
+        client.set_token("test-token")
+        client.set_api_url("https://example.com/api")
+        return await asyncio.gather(*(client.get_api() for _ in range(12)))
+
+    results = asyncio.run(run())
+    assert len(results) == 12
+    assert in_flight["max"] == 3
+
+def test_async_get_api_coalescing():
+    calls = []
+
+    async def handler(request):
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return httpx.Response(200, text="OK")
+
+    async def run():
+        client = AsyncPDNDClient()
+        client.set_transport(mock_transport(handler))
+        client.set_coalescing(True)
+        client.set_token("test-token")
+        client.set_api_url("https://example.com/api")
+        return await asyncio.gather(*(client.get_api() for _ in range(5))), client.single_flight.stats()
+
+    results, stats = asyncio.run(run())
+    assert results == [(200, "OK")] * 5
+    assert calls == [1] and stats["collapsed"] == 4
+
+def test_async_send_api_streams_generator_body():
+    async def handler(request):
+        body = b"".join([chunk async for chunk in request.stream])
+        return httpx.Response(200, text=f"{request.method} {body.decode().replace(' ', '')}")
+
+    async def run():
+        async def chunks():
+            yield b"a"
+            yield b"b"
+
+        async with AsyncPDNDClient() as client:
+            client.set_transport(mock_transport(handler))
+            client.set_token("test-token")
+            client.set_api_url("https://example.com/api")
+            return await client.post_api(chunks()), await client.put_api({"id": 1})
+
+    assert asyncio.run(run()) == ((200, "POST ab"), (200, 'PUT {"id":1}'))
+
+# I metodi del solo client sincrono non sono esposti dal client asincrono.
+def test_async_client_does_not_expose_sync_only_methods():
+    client = AsyncPDNDClient()
+    for name in ("set_token_manager", "set_rate_limiter", "set_response_cache", "get_api_many", "paginate",
+                 "stream_api", "download_api"):
+        assert not hasattr(client, name)
+
+# Il client asincrono richiede solo le codifiche che httpx sa decodificare.
+def test_async_accept_encoding_matches_httpx_decoders():
+    client = AsyncPDNDClient()
+    accepted = client._build_api_request("token", "https://example.com")[1]["Accept-Encoding"].split(", ")
+    assert "gzip" in accepted and set(accepted) <= set(SUPPORTED_DECODERS)
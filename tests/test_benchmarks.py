@@ -0,0 +1,30 @@
+import json
+from benchmarks import run
+from benchmarks.server import StandInServer
+from pdnd_client.client import PDNDClient
+
+def test_stand_in_server_simulates_throttling_and_errors():
+    with StandInServer(payload_size=512, throttle_every=2) as server:
+        client = PDNDClient()
+        client.set_token("test-token")
+        assert client.get_status(server.url + "/api")[0] == 200
+        assert client.get_status(server.url + "/api")[0] == 429
+        assert client.get_status(server.url + "/api?status=503")[0] == 503
+        assert server.counters["throttled"] == 1
+
+def test_percentile_nearest_rank():
+    samples = list(range(1, 101))
+    assert [run.percentile(samples, q) for q in (50, 95, 99)] == [50, 95, 99]
+    assert run.percentile([], 50) == 0.0
+
+def test_run_emits_comparable_json(tmp_path):
+    output = tmp_path / "result.json"
+    run.main(["--iterations", "10", "--concurrency", "2", "--only", "get_api", "load_token",
+              "--output", str(output), "--quiet"])
+    report = json.loads(output.read_text())
+    assert [r["name"] for r in report["results"]] == ["get_api", "load_token"]
+    assert all(r["errors"] == 0 and r["iterations"] == 10 for r in report["results"])
+    assert set(report["results"][0]["latency"]) >= {"p50", "p95", "p99"}
+
+    rows = run.compare(report, report)
+    assert [row["throughput_ratio"] for row in rows] == [1.0, 1.0]
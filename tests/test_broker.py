@@ -0,0 +1,73 @@
+import os
+import time
+import pytest
+from unittest.mock import patch, Mock
+from pdnd_client.broker import BrokerTokenSource, TokenBroker, default_socket_path
+from pdnd_client.client import PDNDClient
+from pdnd_client.exceptions import PdndTokenError
+from pdnd_client.jwt_generator import JWTGenerator
+from pdnd_client.token_registry import TokenRegistry
+
+# Ogni richiesta al server di autenticazione rilascia un token diverso.
+class FakeGenerator(JWTGenerator):
+    requests = []
+
+    def request_token(self):
+        FakeGenerator.requests.append(self.purposeId)
+        return f"{self.purposeId}-{len(FakeGenerator.requests)}", int(time.time()) + 600
+
+@pytest.fixture
+def broker(tmp_path):
+    FakeGenerator.requests = []
+    registry = TokenRegistry(FakeGenerator({"clientId": "client", "purposeId": "p1"}))
+    with TokenBroker(registry, str(tmp_path / "broker.sock"), purposes=["p1", "p2"]) as broker:
+        yield broker
+
+def test_broker_serves_cached_tokens(broker):
+    source = BrokerTokenSource(broker.socket_path, "p1")
+    token = source.get_token()
+    assert token.startswith("p1-")
+    assert source.get_token() == token
+    assert source.get_manager("p2").get_token().startswith("p2-")
+    assert FakeGenerator.requests.count("p1") == 1
+    assert source.stats()["size"] == 2
+    source.close()
+
+def test_refresh_replaces_stale_token(broker):
+    source = BrokerTokenSource(broker.socket_path, "p1")
+    stale = source.get_token()
+    fresh = source.refresh(stale_token=stale)
+    assert fresh != stale
+    assert source.get_token() == fresh
+    source.close()
+
+def test_unknown_purpose_and_missing_broker(broker, tmp_path):
+    with pytest.raises(PdndTokenError):
+        BrokerTokenSource(broker.socket_path, "altro").get_token()
+    with pytest.raises(PdndTokenError):
+        BrokerTokenSource(str(tmp_path / "assente.sock"), "p1").get_token()
+
+def test_client_uses_broker_as_token_source(broker):
+    source = BrokerTokenSource(broker.socket_path, "p1")
+    client = PDNDClient()
+    client.set_api_url("https://example.com/api")
+    client.set_token_registry(source)
+    response = Mock(ok=True, status_code=200, text="OK", headers={})
+    with patch("pdnd_client.transport.Transport.get", return_value=response) as mock_get:
+        client.get_api(purpose_id="p2")
+    assert mock_get.call_args.kwargs["headers"]["Authorization"].startswith("Bearer p2-")
+    source.close()
+
+# Il client rifiuta un broker in esecuzione con un altro utente.
+def test_client_rejects_socket_of_another_user(broker):
+    source = BrokerTokenSource(broker.socket_path, "p1")
+    with patch("pdnd_client.broker.os.getuid", return_value=12345):
+        with pytest.raises(PdndTokenError, match="altro utente"):
+            source.get_token()
+    source.close()
+
+def test_default_socket_is_in_a_private_directory(monkeypatch, tmp_path):
+    monkeypatch.setenv("XDG_RUNTIME_DIR", str(tmp_path))
+    assert default_socket_path() == str(tmp_path / "pdnd_broker.sock")
+    monkeypatch.delenv("XDG_RUNTIME_DIR")
+    assert f"pdnd-{os.getuid()}" in default_socket_path()
@@ -0,0 +1,52 @@
+import time
+from unittest.mock import patch
+from pdnd_client.cache import ResponseCache, cache_key, freshness
+
+def test_fresh_response_served_from_cache(make_client, make_response):
+    client = make_client(response_cache=ResponseCache())
+    with patch("pdnd_client.transport.Transport.get",
+               return_value=make_response(headers={"Cache-Control": "max-age=60"})) as mock_get:
+        assert client.get_api() == (200, "OK")
+        assert client.get_api() == (200, "OK")
+        assert mock_get.call_count == 1
+        client.get_api(use_cache=False)
+        assert mock_get.call_count == 2
+    assert client.response_cache.stats()["hits"] == 1
+
+# Una risposta scaduta con ETag viene riconvalidata e, su 304, servita dalla cache.
+def test_conditional_revalidation_with_etag(make_client, make_response):
+    cache = ResponseCache()
+    client = make_client(response_cache=cache)
+    replies = [make_response(text="payload", headers={"ETag": '"v1"', "Cache-Control": "no-cache"}), make_response(304, "")]
+    with patch("pdnd_client.transport.Transport.get", side_effect=replies) as mock_get:
+        assert client.get_api() == (200, "payload")
+        assert client.get_api() == (200, "payload")
+    assert mock_get.call_args.kwargs["headers"]["If-None-Match"] == '"v1"'
+    assert cache.stats()["revalidations"] == 1
+
+def test_no_store_and_filter_normalization():
+    assert freshness({"Cache-Control": "no-store"}) is None
+    assert cache_key("u", {"a": 1, "b": 2}, "p") == cache_key("u", {"b": 2, "a": 1}, "p")
+    assert cache_key("u", {"a": 1}, "p1") != cache_key("u", {"a": 1}, "p2")
+
+def test_memory_limit_and_disk_tier(tmp_path):
+    cache = ResponseCache(max_bytes=10, directory=str(tmp_path))
+    headers = {"Cache-Control": "max-age=60"}
+    cache.store("a", 200, "123456", headers)
+    cache.store("b", 200, "123456", headers)
+    assert cache.stats()["entries"] == 1 and cache.current_bytes == 6
+    # La voce rimossa dalla memoria è ancora disponibile su disco
+    assert ResponseCache(directory=str(tmp_path)).get("a").body == "123456"
+
+# clear() svuota anche le voci presenti solo su disco.
+def test_clear_removes_disk_entries(tmp_path):
+    ResponseCache(directory=str(tmp_path)).store("old", 200, "vecchia", {"Cache-Control": "max-age=60"})
+    cache = ResponseCache(max_bytes=3, directory=str(tmp_path))
+    cache.store("big", 200, "troppo grande", {"Cache-Control": "max-age=60"})
+    cache.clear()
+    assert cache.get("old") is None and cache.get("big") is None
+    assert list(tmp_path.iterdir()) == []
+
+def test_expires_header():
+    expires = time.strftime("%a, %d %b %Y %H:%M:%S GMT", time.gmtime(time.time() + 120))
+    assert freshness({"Expires": expires}) > time.time() + 100
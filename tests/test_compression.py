@@ -0,0 +1,30 @@
+import json
+from pdnd_client.client import PDNDClient
+from pdnd_client.metrics import Instrumentation
+from pdnd_client.transport import ACCEPT_ENCODING
+from benchmarks.server import StandInServer
+
+def test_accept_encoding_header():
+    client = PDNDClient()
+    assert client._build_api_request("token", "https://example.com")[1]["Accept-Encoding"] == ACCEPT_ENCODING
+    assert "gzip" in ACCEPT_ENCODING
+    client.set_compression(False)
+    assert client._build_api_request("token", "https://example.com")[1]["Accept-Encoding"] == "identity"
+
+# Il body arriva compresso ma viene restituito decompresso, anche in streaming;
+# l'instrumentation riporta i byte ricevuti e quelli decompressi.
+def test_compressed_response_is_decoded_and_measured(make_client):
+    instrumentation = Instrumentation()
+    with StandInServer(payload_size=64 * 1024, compress=True) as server:
+        client = make_client(server.url + "/api", instrumentation=instrumentation)
+        status_code, body = client.get_api()
+        streamed = b"".join(client.stream_api(chunk_size=4096))
+        host = server.url.split("//")[1]
+
+    assert status_code == 200
+    assert json.loads(body) == json.loads(streamed)
+    metrics = instrumentation.metrics
+    received = metrics.get_counter("received_bytes", host=host, encoding="gzip")
+    decoded = metrics.get_counter("decoded_bytes", host=host, encoding="gzip")
+    assert decoded == 2 * len(streamed)
+    assert 0 < received < decoded / 5
@@ -0,0 +1,42 @@
+import json
+import pytest
+from unittest.mock import patch, Mock
+from pdnd_client import jsonlib
+from pdnd_client.client import PDNDClient
+
+@pytest.fixture
+def restore_backend():
+    backend = jsonlib._backend
+    yield
+    jsonlib._backend = backend
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_backends_round_trip(name, restore_backend):
+    if name == "orjson":
+        pytest.importorskip("orjson")
+    jsonlib.set_backend(name)
+    assert jsonlib.get_backend() == name
+    data = {"città": "Roma", "valori": [1, 2]}
+    assert jsonlib.loads(jsonlib.dumps(data)) == data
+    assert jsonlib.loads(jsonlib.dumps(data).encode("utf-8")) == data
+    assert jsonlib.dumps(data, pretty=True) == json.dumps(data, indent=2, ensure_ascii=False)
+
+def test_custom_backend(restore_backend):
+    backend = Mock(loads=Mock(return_value={"ok": True}))
+    jsonlib.set_backend(backend)
+    assert jsonlib.loads("{}") == {"ok": True}
+    with pytest.raises(ValueError):
+        jsonlib.set_backend("yaml")
+
+# get_api_json decodifica il body una sola volta; get_api restituisce il testo originale anche in debug.
+def test_get_api_json_decodes_once():
+    response = Mock(ok=True, status_code=200, text='{"items": [1, 2]}', headers={})
+    client = PDNDClient()
+    client.set_token("test-token")
+    client.set_api_url("https://example.com/api")
+    client.set_debug(True)
+    with patch("pdnd_client.transport.Transport.get", return_value=response):
+        with patch("pdnd_client.jsonlib.loads", wraps=jsonlib.loads) as loads:
+            assert client.get_api_json() == (200, {"items": [1, 2]})
+            assert client.get_api() == (200, '{"items": [1, 2]}')
+    assert loads.call_count == 1
@@ -0,0 +1,73 @@
+import base64
+import json
+import os
+import time
+import pytest
+from unittest.mock import patch, Mock
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
+from pdnd_client import jwt_generator
+from pdnd_client.jwt_generator import JWTGenerator
+
+# Scrive una chiave RSA di test e restituisce la configurazione del generatore.
+def write_key(path):
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    path.write_bytes(key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption()
+    ))
+
+@pytest.fixture
+def config(tmp_path):
+    key_path = tmp_path / "key.pem"
+    write_key(key_path)
+    return {
+        "kid": "kid",
+        "issuer": "issuer",
+        "clientId": "clientId",
+        "purposeId": "purposeId",
+        "privKeyPath": str(key_path)
+    }
+
+def token_response(exp):
+    payload = base64.urlsafe_b64encode(json.dumps({"exp": exp}).encode()).decode().rstrip("=")
+    return Mock(status_code=200, json=Mock(return_value={"access_token": f"h.{payload}.s"}))
+
+def test_request_token_returns_token_and_exp(config):
+    exp = int(time.time()) + 600
+    with patch("pdnd_client.transport.Transport.post", return_value=token_response(exp)) as mock_post:
+        token, token_exp = JWTGenerator(config).request_token()
+    assert token_exp == exp
+    assert token.startswith("h.")
+    assert mock_post.call_args.kwargs["data"]["client_id"] == "clientId"
+
+# La chiave viene caricata una sola volta e ricaricata solo quando il file cambia.
+def test_private_key_is_cached_until_file_changes(config, tmp_path):
+    jwt_generator._key_cache.clear()
+    generator = JWTGenerator(config)
+    with patch.object(jwt_generator.serialization, "load_pem_private_key",
+                      wraps=serialization.load_pem_private_key) as mock_load:
+        generator._get_client_assertion()
+        generator._get_client_assertion()
+        assert mock_load.call_count == 1
+        write_key(tmp_path / "key.pem")
+        os.utime(config["privKeyPath"], ns=(time.time_ns(), time.time_ns() + 10**9))
+        generator._get_client_assertion()
+        assert mock_load.call_count == 2
+
+def test_client_assertion_reuse(config):
+    generator = JWTGenerator(config)
+    first, _ = generator._get_client_assertion()
+    assert generator._get_client_assertion()[0] != first
+
+    generator.set_reuse_assertion(True)
+    first, _ = generator._get_client_assertion()
+    assert generator._get_client_assertion()[0] == first
+    # Un generatore per un'altra finalità non riusa il client_assertion
+    assert generator.for_purpose("other")._get_client_assertion()[0] != first
+
+def test_missing_private_key(config):
+    config["privKeyPath"] = "/non/esiste.pem"
+    with pytest.raises(FileNotFoundError):
+        JWTGenerator(config).request_token()
@@ -0,0 +1,32 @@
+import json
+import subprocess
+import sys
+from benchmarks import import_time
+from pdnd_client._lazy import LazyModule
+
+HEAVY = ("requests", "urllib3", "jwt", "cryptography")
+
+def loaded_after(code):
+    check = f"import sys, json; {code}; print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))"
+    output = subprocess.run([sys.executable, "-c", check], cwd=import_time.ROOT, capture_output=True,
+                            text=True, check=True).stdout
+    return json.loads(output)
+
+def test_importing_the_client_does_not_load_heavy_dependencies():
+    assert loaded_after("import main, pdnd_client.client, pdnd_client.jwt_generator") == []
+
+def test_signing_stack_is_loaded_on_first_use():
+    assert {"jwt", "cryptography"} <= set(loaded_after("from pdnd_client import jwt_generator; jwt_generator.jwt.encode"))
+
+def test_lazy_module_imports_on_first_access():
+    module = LazyModule("json")
+    assert "non caricato" in repr(module)
+    assert module.dumps([1]) == "[1]"
+    assert "non caricato" not in repr(module)
+
+def test_cli_token_only_prints_cached_token(tmp_path):
+    exit_code = import_time.main(["--runs", "1", "--only", "cli_token_only", "--output", str(tmp_path / "r.json"),
+                               "--quiet", "--budget", "100000"])
+    assert exit_code == 0
+    result = json.loads((tmp_path / "r.json").read_text())["results"][0]
+    assert result["name"] == "cli_token_only" and result["net_ms"] >= 0
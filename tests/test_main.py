@@ -0,0 +1,59 @@
+import io
+import json
+import time
+import pytest
+from unittest.mock import patch, Mock
+from main import read_batch, run_batch
+
+# La prima richiesta è la più lenta: in ordine di input i risultati restano comunque ordinati.
+def fake_get(url, headers=None, verify=True):
+    if "id=0" in url:
+        time.sleep(0.05)
+    if "id=2" in url:
+        return Mock(ok=False, status_code=404, text="missing", headers={})
+    return Mock(ok=True, status_code=200, text=json.dumps({"url": url}), headers={})
+
+def test_read_batch_parses_jsonl():
+    lines = ['{"url": "https://a", "filters": {"id": 1}}', "", '{"filters": "id=2"}']
+    assert list(read_batch(lines)) == [("https://a", {"id": 1}), (None, "id=2")]
+    assert [type(item) for item in read_batch(["non json", "[1]"])] == [ValueError, ValueError]
+
+# Una riga non valida diventa un record di errore e il batch prosegue.
+def test_run_batch_reports_invalid_lines(make_client):
+    lines = [json.dumps({"filters": {"id": 1}}), "non json", json.dumps({"filters": {"id": 3}})]
+    out = io.StringIO()
+    with patch("pdnd_client.transport.Transport.get", side_effect=fake_get):
+        summary = run_batch(make_client(), read_batch(lines), concurrency=2, order="input", out=out)
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert [r["index"] for r in results] == [0, 1, 2]
+    assert "Riga 2" in results[1]["error"] and results[2]["status_code"] == 200
+    assert (summary["total"], summary["ok"], summary["errors"], summary["invalid"]) == (3, 2, 0, 1)
+
+# Le righe non valide non vengono inviate: non abbassano i percentili delle latenze.
+def test_run_batch_invalid_lines_do_not_skew_latencies(make_client):
+    lines = [json.dumps({"filters": {"id": 0}}), "non json", "[1]"]
+    with patch("pdnd_client.transport.Transport.get", side_effect=fake_get):
+        summary = run_batch(make_client(), read_batch(lines), out=io.StringIO())
+    assert (summary["total"], summary["ok"], summary["invalid"]) == (3, 1, 2)
+    assert summary["latency_ms"]["p50"] >= 50
+
+@pytest.mark.parametrize("order", ["input", "completion"])
+def test_run_batch_writes_ndjson_and_summary(order, make_client):
+    lines = [json.dumps({"filters": {"id": i}}) for i in range(4)]
+    out = io.StringIO()
+    with patch("pdnd_client.transport.Transport.get", side_effect=fake_get):
+        summary = run_batch(make_client(), read_batch(lines), concurrency=4, order=order, out=out)
+
+    results = [json.loads(line) for line in out.getvalue().splitlines()]
+    indexes = [r["index"] for r in results]
+    assert sorted(indexes) == [0, 1, 2, 3]
+    if order == "input":
+        assert indexes == [0, 1, 2, 3]
+    else:
+        assert indexes[-1] == 0
+    assert results[indexes.index(1)]["body"] == {"url": "https://example.com/api?id=1"}
+    assert results[indexes.index(2)]["status_code"] == 404
+    assert (summary["total"], summary["ok"], summary["errors"], summary["invalid"]) == (4, 3, 1, 0)
+    assert summary["status_codes"] == {"200": 3}
+    assert summary["latency_ms"]["p99"] >= 50
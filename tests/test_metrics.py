@@ -0,0 +1,98 @@
+from unittest.mock import patch, Mock, PropertyMock
+import pytest
+import requests
+from pdnd_client.cache import ResponseCache
+from pdnd_client.exceptions import PdndException
+from pdnd_client.jwt_generator import JWTGenerator
+from pdnd_client.metrics import Instrumentation, Metrics
+from pdnd_client.retry import CircuitBreakers, RetryPolicy
+
+def test_histograms_and_counters_export_prometheus():
+    metrics = Metrics(buckets=(0.1, 1))
+    metrics.observe("request_send", 0.05, host="a")
+    metrics.observe("request_send", 0.5, host="a")
+    metrics.inc("requests", host="a", status="200")
+    text = metrics.to_prometheus()
+    assert "# TYPE pdnd_request_send_seconds histogram" in text
+    assert 'pdnd_request_send_seconds_bucket{host="a",le="0.1"} 1' in text
+    assert 'pdnd_request_send_seconds_bucket{host="a",le="+Inf"} 2' in text
+    assert 'pdnd_request_send_seconds_count{host="a"} 2' in text
+    assert 'pdnd_requests_total{host="a",status="200"} 1' in text
+
+def test_get_api_emits_spans_and_counters(make_client, make_response):
+    instrumentation = Instrumentation()
+    events = []
+    instrumentation.add_hook(lambda name, duration, attrs: events.append((name, attrs)))
+    replies = [make_response(200, "OK"), make_response(404, "missing")]
+    with patch("pdnd_client.transport.Transport.get", side_effect=replies) as mock_get:
+        client = make_client(instrumentation=instrumentation)
+        assert client.get_api() == (200, "OK")
+        try:
+            client.get_api()
+        except Exception:
+            pass
+    assert mock_get.call_args.kwargs["stream"] is True
+    assert [name for name, _ in events[:3]] == ["request_send", "ttfb", "body_read"]
+    assert events[0][1] == {"host": "example.com"}
+    metrics = instrumentation.metrics
+    assert metrics.get_counter("requests", host="example.com", status="200") == 1
+    assert metrics.get_counter("errors", status="404") == 1
+    assert metrics.get_histogram("ttfb", host="example.com")["sum"] == 0.04
+
+# Un errore nella lettura del body deve essere ritentato e contato come errore di rete,
+# come avviene senza instrumentation (dove requests legge il body dentro get()).
+@pytest.mark.parametrize("instrumented", [False, True])
+def test_body_read_error_is_a_network_error(instrumented, make_client, make_response):
+    error = requests.exceptions.ChunkedEncodingError("connessione interrotta")
+    response = make_response(200, "OK")
+    type(response).content = PropertyMock(side_effect=error)
+    instrumentation = Instrumentation() if instrumented else None
+    breakers = CircuitBreakers(failure_threshold=3)
+    client = make_client(retry_policy=RetryPolicy(backoff_base=0, jitter=False),
+                         circuit_breaker=breakers, instrumentation=instrumentation)
+
+    # Senza stream=True requests legge il body dentro get() e l'errore emerge da lì.
+    def get(*args, stream=False, **kwargs):
+        if not stream:
+            raise error
+        return response
+
+    with patch("pdnd_client.transport.Transport.get", side_effect=get) as mock_get:
+        with pytest.raises(PdndException):
+            client.get_api()
+    assert mock_get.call_count == 3
+    assert breakers.get("example.com").state == "open"
+    if instrumented:
+        assert response.close.call_count == 3
+        assert instrumentation.metrics.get_counter("errors", status="network") == 3
+
+def test_failing_hook_does_not_break_the_call(make_client, make_response):
+    instrumentation = Instrumentation()
+    instrumentation.add_hook(Mock(side_effect=RuntimeError("hook")))
+    with patch("pdnd_client.transport.Transport.get", return_value=make_response(200, "OK")):
+        assert make_client(instrumentation=instrumentation).get_api() == (200, "OK")
+
+def test_cache_hits_are_counted(make_client, make_response):
+    instrumentation = Instrumentation()
+    reply = make_response(200, "OK", {"Cache-Control": "max-age=60"})
+    with patch("pdnd_client.transport.Transport.get", return_value=reply):
+        client = make_client(instrumentation=instrumentation)
+        client.set_response_cache(ResponseCache())
+        client.get_api()
+        client.get_api()
+    assert instrumentation.metrics.get_counter("cache", outcome="miss") == 1
+    assert instrumentation.metrics.get_counter("cache", outcome="hit") == 1
+
+def test_token_refresh_and_load_spans(tmp_path, make_client):
+    instrumentation = Instrumentation()
+    generator = JWTGenerator({"kid": "kid", "issuer": "i", "clientId": "c", "purposeId": "p", "privKeyPath": "k"})
+    generator.set_instrumentation(instrumentation)
+    with patch.object(JWTGenerator, "_request_token", return_value=("tok", 123)):
+        assert generator.request_token() == ("tok", 123)
+    assert instrumentation.metrics.get_counter("token_refreshes") == 1
+    assert instrumentation.metrics.get_histogram("token_refresh")["count"] == 1
+
+    client = make_client(instrumentation=instrumentation)
+    client.save_token("tok", "2099-01-01 00:00:00", str(tmp_path / "token.json"))
+    client.load_token(str(tmp_path / "token.json"))
+    assert instrumentation.metrics.get_histogram("token_load")["count"] == 1
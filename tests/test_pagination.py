@@ -0,0 +1,96 @@
+import json
+import threading
+from unittest.mock import patch, Mock
+from urllib.parse import urlsplit, parse_qs
+from pdnd_client.client import PDNDClient
+from pdnd_client.pagination import (
+    CursorPagination, LinkHeaderPagination, NextLinkPagination, OffsetPagination, PageNumberPagination
+)
+
+ITEMS = list(range(23))
+
+# Finto server paginato: risponde in base ai parametri della query.
+def fake_get(url, headers=None, verify=True):
+    query = {k: v[0] for k, v in parse_qs(urlsplit(url).query).items()}
+    response = Mock(ok=True, status_code=200, headers={})
+    if "offset" in query:
+        start, size = int(query["offset"]), int(query["limit"])
+        body = {"items": ITEMS[start:start + size]}
+    elif "page" in query:
+        start = (int(query["page"]) - 1) * 10
+        body = ITEMS[start:start + 10]
+    else:
+        start = int(query.get("cursor", 0))
+        body = {"items": ITEMS[start:start + 10]}
+        if start + 10 < len(ITEMS):
+            body["next_cursor"] = str(start + 10)
+            body["links"] = {"next": f"/api?cursor={start + 10}"}
+            response.headers = {"Link": f'<https://example.com/api?cursor={start + 10}>; rel="next"'}
+    response.content = json.dumps(body).encode()
+    return response
+
+def paginate(strategy, **kwargs):
+    client = PDNDClient()
+    client.set_token("test-token")
+    client.set_api_url("https://example.com/api")
+    with patch("pdnd_client.transport.Transport.get", side_effect=fake_get) as mock_get:
+        items = list(client.paginate(strategy, **kwargs))
+    return items, mock_get.call_count
+
+def test_all_strategies_return_every_item():
+    strategies = [
+        OffsetPagination(limit=10, items_path="items"),
+        PageNumberPagination(),
+        CursorPagination(items_path="items"),
+        NextLinkPagination(next_path="links.next", items_path="items"),
+        LinkHeaderPagination(items_path="items"),
+    ]
+    for strategy in strategies:
+        for prefetch in (True, False):
+            assert paginate(strategy, prefetch=prefetch)[0] == ITEMS
+
+def test_max_pages_and_max_items():
+    items, calls = paginate(OffsetPagination(limit=10, items_path="items"), max_pages=2)
+    assert items == ITEMS[:20] and calls == 2
+    items, _ = paginate(OffsetPagination(limit=10, items_path="items"), max_items=5, prefetch=False)
+    assert items == ITEMS[:5]
+
+# Il gateway restituisce al massimo 7 elementi per pagina anche se ne sono richiesti 10:
+# la paginazione prosegue fino alla pagina vuota o, se la risposta lo riporta, fino al totale.
+def test_offset_continues_when_server_caps_page_size():
+    def capped_get(url, headers=None, verify=True):
+        query = {k: v[0] for k, v in parse_qs(urlsplit(url).query).items()}
+        start = int(query["offset"])
+        body = {"items": ITEMS[start:start + 7]}
+        if "total" in query:
+            body["total"] = len(ITEMS)
+        return Mock(ok=True, status_code=200, headers={}, content=json.dumps(body).encode())
+
+    client = PDNDClient()
+    client.set_token("test-token")
+    client.set_api_url("https://example.com/api")
+    with patch("pdnd_client.transport.Transport.get", side_effect=capped_get) as mock_get:
+        assert list(client.paginate(OffsetPagination(limit=10, items_path="items"))) == ITEMS
+        assert mock_get.call_count == 5
+        mock_get.reset_mock()
+        pages = client.paginate(OffsetPagination(limit=10, items_path="items"), filters={"total": 1})
+        assert list(pages) == ITEMS
+        assert mock_get.call_count == 4
+
+# La pagina successiva viene richiesta mentre il chiamante elabora quella corrente.
+def test_next_page_is_prefetched():
+    client = PDNDClient()
+    client.set_token("test-token")
+    client.set_api_url("https://example.com/api")
+    second_page_requested = threading.Event()
+
+    def tracking_get(url, headers=None, verify=True):
+        if "offset=10" in url:
+            second_page_requested.set()
+        return fake_get(url, headers, verify)
+
+    with patch("pdnd_client.transport.Transport.get", side_effect=tracking_get):
+        pages = client.paginate(OffsetPagination(limit=10, items_path="items"))
+        assert next(pages) == 0
+        assert second_page_requested.wait(1)
+        pages.close()
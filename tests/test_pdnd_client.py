@@ -26,8 +26,8 @@ def test_get_status_success(client):
     mock_response.text = "OK"
 
 
-    # Simula il metodo requests.get per restituire una risposta predefinita
-    with patch("pdnd_client.client.requests.get", return_value=mock_response) as mock_get:
+    # Simula il metodo get del transport per restituire una risposta predefinita
+    with patch("pdnd_client.transport.Transport.get", return_value=mock_response) as mock_get:
         status_code, text = client.get_status("https://example.com/status")
         mock_get.assert_called_once_with(
             "https://example.com/status",
@@ -43,7 +43,49 @@ def test_get_status_failure(client):
     mock_response.status_code = 404
     mock_response.text = "Not Found"
 
-    with patch("pdnd_client.client.requests.get", return_value=mock_response):
+    with patch("pdnd_client.transport.Transport.get", return_value=mock_response):
         status_code, text = client.get_status("https://example.com/invalid")
         assert status_code == 404
         assert text == "Not Found"
+
+# Test per get_api_many: ogni risultato riporta l'indice della richiesta di input
+# e un errore su una singola chiamata non interrompe le altre.
+def test_get_api_many_reports_per_item_results():
+    client = PDNDClient()
+    client.set_token("test-token")
+
+    def fake_get(url, headers=None, verify=True):
+        response = Mock()
+        response.ok = "fail" not in url
+        response.status_code = 200 if response.ok else 500
+        response.text = url
+        return response
+
+    calls = [
+        ("https://example.com/api", {"cf": "AAA"}),
+        ("https://example.com/fail", "cf=BBB"),
+        ("https://example.com/api", None),
+    ]
+    with patch("pdnd_client.transport.Transport.get", side_effect=fake_get):
+        results = sorted(client.get_api_many(calls, max_workers=2), key=lambda r: r.index)
+
+    assert [r.index for r in results] == [0, 1, 2]
+    assert results[0].ok and results[0].body == "https://example.com/api?cf=AAA"
+    assert not results[1].ok and results[1].status_code is None
+    assert "https://example.com/fail?cf=BBB" in str(results[1].error)
+    assert results[2].body == "https://example.com/api"
+
+# Un elemento malformato produce un risultato con errore per il suo indice e il batch prosegue.
+def test_get_api_many_reports_malformed_items():
+    client = PDNDClient()
+    client.set_token("test-token")
+    calls = [("https://example.com/api", None), "https://example.com/api", ("a", None, "p", "extra"),
+             ("https://example.com/api", "cf=CCC")]
+    response = Mock(ok=True, status_code=200, text="OK")
+    with patch("pdnd_client.transport.Transport.get", return_value=response) as mock_get:
+        results = sorted(client.get_api_many(calls, max_workers=2), key=lambda r: r.index)
+
+    assert [r.index for r in results] == [0, 1, 2, 3]
+    assert [r.ok for r in results] == [True, False, False, True]
+    assert isinstance(results[1].error, ValueError) and "Richiesta 1" in str(results[1].error)
+    assert mock_get.call_count == 2
@@ -0,0 +1,86 @@
+import time
+import pytest
+from unittest.mock import patch, Mock
+from pdnd_client.client import PDNDClient
+from pdnd_client.exceptions import PdndException, PdndRateLimitError
+from pdnd_client.rate_limit import RateLimiter, get_default_rate_limiter, parse_rate_limit_reset
+
+KEY = ("example.com", "purpose")
+
+def test_token_bucket_limits_rate():
+    limiter = RateLimiter(rate=50, burst=1)
+    started = time.monotonic()
+    for _ in range(6):
+        limiter.acquire(KEY)
+        limiter.release(KEY, 200)
+    assert time.monotonic() - started >= 0.09
+
+# AIMD: dimezzamento della concorrenza su 429, risalita graduale sulle risposte positive.
+def test_adaptive_concurrency():
+    limiter = RateLimiter(rate=1000, burst=1000, max_concurrency=8)
+    limiter.acquire(KEY)
+    limiter.release(KEY, 429)
+    assert limiter.stats(KEY)["concurrency"] == 4
+    for _ in range(40):
+        limiter.acquire(KEY)
+        limiter.release(KEY, 200)
+    assert limiter.stats(KEY)["concurrency"] == 8
+
+# Senza rate esplicito non c'è un limite fisso di richieste al secondo: decidono i 429 e gli header.
+def test_default_limiter_has_no_fixed_rate():
+    limiter = RateLimiter(max_concurrency=4)
+    started = time.monotonic()
+    for _ in range(200):
+        limiter.acquire(KEY)
+        limiter.release(KEY, 200)
+    assert time.monotonic() - started < 0.5
+    limiter.acquire(KEY)
+    limiter.release(KEY, 429)
+    assert limiter.stats(KEY)["concurrency"] == 2 and limiter.stats(KEY)["rate"] is None
+
+def test_concurrency_limit_blocks_extra_callers():
+    limiter = RateLimiter(rate=1000, burst=1000, max_concurrency=1)
+    limiter.acquire(KEY)
+    assert limiter.acquire(KEY, timeout=0.05) is False
+    limiter.release(KEY, 200)
+    assert limiter.acquire(KEY, timeout=0.05) is True
+
+def test_retry_after_and_rate_limit_headers_pause_calls():
+    limiter = RateLimiter(rate=1000, burst=1000)
+    limiter.acquire(KEY)
+    limiter.release(KEY, 429, {"Retry-After": "0.2"})
+    assert limiter.acquire(KEY, timeout=0.05) is False
+    assert limiter.acquire(KEY, timeout=0.5) is True
+    assert parse_rate_limit_reset({"RateLimit-Remaining": "0", "RateLimit-Reset": "3"}) == 3
+    assert parse_rate_limit_reset({"X-RateLimit-Remaining": "5", "X-RateLimit-Reset": "3"}) is None
+
+def test_get_api_raises_structured_rate_limit_error():
+    client = PDNDClient()
+    client.set_token("test-token")
+    client.set_api_url("https://example.com/api")
+    client.set_rate_limiter(RateLimiter())
+    response = Mock(ok=False, status_code=429, text="Too Many Requests", headers={"Retry-After": "7"})
+    with patch("pdnd_client.transport.Transport.get", return_value=response):
+        with pytest.raises(PdndRateLimitError) as error:
+            client.get_api()
+    assert error.value.retry_after == 7 and error.value.status_code == 429
+    assert isinstance(error.value, PdndException)
+    assert client.rate_limiter.stats(("example.com", None))["throttled"] == 1
+
+# La chiave del limitatore è (host, purposeId): cambiare token non crea un nuovo stato.
+def test_limiter_key_does_not_depend_on_token():
+    client = PDNDClient()
+    client.set_api_url("https://example.com/api")
+    limiter = RateLimiter()
+    client.set_rate_limiter(limiter)
+    response = Mock(ok=True, status_code=200, text="OK", headers={})
+    with patch("pdnd_client.transport.Transport.get", return_value=response):
+        for token in ("token-1", "token-2", "token-3"):
+            client.get_api(token)
+    assert list(limiter._buckets) == [("example.com", None)]
+
+def test_default_rate_limiter_is_shared():
+    first, second = PDNDClient(), PDNDClient()
+    first.set_rate_limiter()
+    second.set_rate_limiter(True)
+    assert first.rate_limiter is second.rate_limiter is get_default_rate_limiter()
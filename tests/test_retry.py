@@ -0,0 +1,81 @@
+import pytest
+from unittest.mock import patch, Mock
+from pdnd_client.exceptions import PdndCircuitOpenError, PdndException, PdndRateLimitError, PdndTokenError
+from pdnd_client.jwt_generator import JWTGenerator
+from pdnd_client.retry import CircuitBreaker, CircuitBreakers, RetryPolicy, call_with_retry
+
+NO_BACKOFF = RetryPolicy(backoff_base=0, jitter=False)
+
+def test_backoff_is_capped_and_jittered():
+    policy = RetryPolicy(backoff_base=1, backoff_max=4, jitter=False)
+    assert [policy.backoff(n) for n in (1, 2, 3, 4)] == [1, 2, 4, 4]
+    assert 0 <= RetryPolicy(backoff_base=1).backoff(3) <= 4
+    assert RetryPolicy(max_attempts=5, deadline=1).next_delay(1, elapsed=0.9, retry_after=0.5) is None
+
+# Un Retry-After troppo lungo non blocca il chiamante: la chiamata non viene ritentata.
+def test_long_retry_after_is_not_waited(make_client, make_response):
+    policy = RetryPolicy.idempotent()
+    assert policy.deadline is not None
+    assert policy.next_delay(1, 0, retry_after=3600) is None
+    assert policy.next_delay(1, 0, retry_after=2) == 2
+    with patch("pdnd_client.transport.Transport.get",
+               return_value=make_response(429, "slow down", {"Retry-After": "3600"})) as mock_get:
+        with pytest.raises(PdndRateLimitError) as error:
+            make_client(retry_policy=policy).get_api()
+    assert mock_get.call_count == 1 and error.value.retry_after == 3600
+
+def test_get_api_retries_transient_errors(make_client, make_response):
+    replies = [make_response(502, "bad gateway"), make_response(200, "OK")]
+    with patch("pdnd_client.transport.Transport.get", side_effect=replies) as mock_get:
+        assert make_client(retry_policy=NO_BACKOFF).get_api() == (200, "OK")
+    assert mock_get.call_count == 2
+
+def test_structured_error_after_retries_exhausted(make_client, make_response):
+    with patch("pdnd_client.transport.Transport.get", return_value=make_response(503, "down")):
+        with pytest.raises(PdndException) as error:
+            make_client(retry_policy=NO_BACKOFF).get_api()
+    assert (error.value.status_code, error.value.attempts) == (503, 3)
+    assert error.value.elapsed is not None
+
+# Dopo failure_threshold errori consecutivi il circuito si apre e le chiamate falliscono subito.
+def test_circuit_breaker_fails_fast(make_client, make_response):
+    breakers = CircuitBreakers(failure_threshold=2, reset_timeout=60)
+    client = make_client(retry_policy=RetryPolicy(max_attempts=1), circuit_breaker=breakers)
+    with patch("pdnd_client.transport.Transport.get", return_value=make_response(500, "error")) as mock_get:
+        for _ in range(2):
+            with pytest.raises(PdndException):
+                client.get_api()
+        with pytest.raises(PdndCircuitOpenError):
+            client.get_api()
+    assert mock_get.call_count == 2
+    assert breakers.get("example.com").state == "open"
+
+def test_circuit_breaker_half_open_trial():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    assert breaker.allow() is True
+    assert breaker.allow() is False  # una sola chiamata di prova alla volta
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+# Un'eccezione diversa da PdndException durante la chiamata di prova non blocca il circuito.
+def test_half_open_trial_is_released_on_unexpected_errors():
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record_failure()
+    with pytest.raises(RuntimeError):
+        call_with_retry(Mock(side_effect=RuntimeError("Il transport è stato chiuso.")), breaker=breaker)
+    assert breaker.allow() is True
+
+def test_connection_errors_are_retried(make_response):
+    send = Mock(side_effect=[PdndException("reset"), make_response(200)])
+    assert call_with_retry(send, RetryPolicy(backoff_base=0)).pdnd_attempts == 2
+
+def test_request_token_raises_structured_error(make_response):
+    generator = JWTGenerator({})
+    generator._build_token_request = lambda: ({}, {}, 0)
+    generator.set_retry_policy(RetryPolicy(max_attempts=2, backoff_base=0))
+    with patch("pdnd_client.transport.Transport.post", return_value=make_response(503, "boom")) as mock_post:
+        with pytest.raises(PdndTokenError) as error:
+            generator.request_token()
+    assert mock_post.call_count == 2
+    assert (error.value.status_code, error.value.body, error.value.attempts) == (503, "boom", 2)
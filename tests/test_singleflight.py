@@ -0,0 +1,101 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import patch, Mock
+from pdnd_client.client import PDNDClient
+from pdnd_client.singleflight import AsyncSingleFlight, SingleFlight
+
+def test_concurrent_identical_calls_are_collapsed():
+    flight = SingleFlight()
+    calls = []
+    release = threading.Event()
+
+    def slow():
+        calls.append(1)
+        release.wait(1)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow))) for _ in range(5)]
+    for thread in threads:
+        thread.start()
+    while flight.stats()["calls"] < 5:
+        time.sleep(0.001)
+    release.set()
+    for thread in threads:
+        thread.join()
+    assert calls == [1]
+    assert results == ["result"] * 5
+    assert flight.stats() == {"calls": 5, "collapsed": 4, "in_flight": 0}
+
+def test_errors_are_shared_and_key_released():
+    flight = SingleFlight()
+    with pytest.raises(ValueError):
+        flight.do("k", lambda: (_ for _ in ()).throw(ValueError("boom")))
+    assert flight.do("k", lambda: 1) == 1
+
+def test_get_api_coalescing_by_final_url():
+    client = PDNDClient()
+    client.set_token("test-token")
+    client.set_coalescing(True)
+    release = threading.Event()
+
+    def slow_get(url, headers=None, verify=True):
+        release.wait(1)
+        return Mock(ok=True, status_code=200, text=url)
+
+    results = []
+
+    def call(cf):
+        results.append(client._fetch_api(url="https://example.com/api", filters={"cf": cf}))
+
+    with patch("pdnd_client.transport.Transport.get", side_effect=slow_get) as mock_get:
+        threads = [threading.Thread(target=call, args=(cf,)) for cf in ["A", "A", "A", "B"]]
+        for thread in threads:
+            thread.start()
+        while client.single_flight.stats()["calls"] < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+    assert mock_get.call_count == 2
+    assert client.single_flight.collapsed == 2
+
+def test_async_single_flight():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "result"
+
+    async def run():
+        return await asyncio.gather(*(flight.do("k", slow) for _ in range(4)))
+
+    assert asyncio.run(run()) == ["result"] * 4
+    assert calls == [1] and flight.collapsed == 3
+
+# La cancellazione della chiamata che esegue fn non viene propagata a quelle accorpate.
+def test_async_single_flight_leader_cancellation():
+    flight = AsyncSingleFlight()
+    calls = []
+
+    async def slow():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def run():
+        leader = asyncio.create_task(flight.do("k", slow))
+        await asyncio.sleep(0)
+        followers = [asyncio.create_task(flight.do("k", slow)) for _ in range(3)]
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        return leader, await asyncio.gather(*followers)
+
+    leader, results = asyncio.run(run())
+    assert leader.cancelled()
+    assert results == ["result"] * 3
+    assert len(calls) == 2
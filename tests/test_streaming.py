@@ -0,0 +1,65 @@
+import json
+import pytest
+from unittest.mock import patch, Mock
+from pdnd_client.client import PDNDClient
+from pdnd_client.streaming import iter_json_records
+
+# Divide il documento in chunk di dimensione fissa, anche a metà di un carattere UTF-8.
+def chunked(document, size):
+    data = document.encode("utf-8")
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+RECORDS = [{"cf": "RSSMRA80A01H501U", "nome": "Niccolò"}, 12345, "città", [1, 2], None, True]
+
+@pytest.mark.parametrize("size", [1, 3, 7, 1024])
+def test_iter_top_level_array(size):
+    document = json.dumps(RECORDS, ensure_ascii=False)
+    assert list(iter_json_records(chunked(document, size))) == RECORDS
+
+@pytest.mark.parametrize("size", [1, 5, 1024])
+def test_iter_nested_array(size):
+    document = json.dumps({"meta": {"total": 6, "skip": [1, {"a": "}"}]}, "data": {"items": RECORDS}})
+    assert list(iter_json_records(chunked(document, size), "data.items")) == RECORDS
+
+@pytest.mark.parametrize("chunks, expected", [
+    ([b"[1.", b"5]"], [1.5]),
+    ([b"[1.5e", b"10]"], [1.5e10]),
+    ([b"[2E", b"-3, 4]"], [2e-3, 4]),
+    ([b"[-", b"7.2", b"5]"], [-7.25]),
+])
+def test_number_split_across_chunks(chunks, expected):
+    assert list(iter_json_records(chunks)) == expected
+
+def test_nested_number_split_across_chunks():
+    assert list(iter_json_records([b'{"a":[1.', b'5]}'], "a")) == [1.5]
+
+def test_missing_path_and_empty_array():
+    assert list(iter_json_records([b'{"data": {}}'], "data.items")) == []
+    assert list(iter_json_records([b" [ ] "])) == []
+
+def test_invalid_document():
+    with pytest.raises(ValueError):
+        list(iter_json_records([b'{"items": 1}']))
+
+def streaming_client(document):
+    client = PDNDClient()
+    client.set_token("test-token")
+    client.set_api_url("https://example.com/api")
+    response = Mock(ok=True, status_code=200)
+    response.iter_content = lambda chunk_size: iter(chunked(document, chunk_size))
+    return client, response
+
+def test_iter_api_records_streams_response():
+    client, response = streaming_client(json.dumps({"items": RECORDS}))
+    with patch("pdnd_client.transport.Transport.get", return_value=response) as mock_get:
+        assert list(client.iter_api_records("items", chunk_size=4)) == RECORDS
+    assert mock_get.call_args.kwargs["stream"] is True
+    response.close.assert_called_once()
+
+def test_download_api_writes_file(tmp_path):
+    document = json.dumps(RECORDS)
+    client, response = streaming_client(document)
+    target = tmp_path / "extract.json"
+    with patch("pdnd_client.transport.Transport.get", return_value=response):
+        assert client.download_api(str(target), chunk_size=8) == (200, len(document))
+    assert json.loads(target.read_text()) == RECORDS
@@ -0,0 +1,71 @@
+import json
+import os
+import threading
+import time
+from pdnd_client.client import PDNDClient
+from pdnd_client.token_cache import read_token_file, token_file_lock, write_token_file
+from pdnd_client.token_manager import TokenManager
+
+def test_save_and_load_token_roundtrip(tmp_path):
+    file = str(tmp_path / "nested" / "token.json")
+    client = PDNDClient()
+    client.save_token("abc", "2099-01-01 00:00:00", file)
+    assert client.load_token(file) == ("abc", "2099-01-01 00:00:00")
+    # Nessun file temporaneo residuo dopo la scrittura atomica
+    assert os.listdir(tmp_path / "nested") == ["token.json"]
+
+# Il JSON viene riletto solo quando il file cambia.
+def test_read_token_file_uses_mtime_cache(tmp_path):
+    file = str(tmp_path / "token.json")
+    write_token_file(file, "first", "2099-01-01 00:00:00")
+    data = read_token_file(file)
+    assert read_token_file(file) is data
+    write_token_file(file, "second", "2099-01-01 00:00:00")
+    assert read_token_file(file)["token"] == "second"
+
+def test_load_token_on_corrupted_file(tmp_path):
+    file = tmp_path / "token.json"
+    file.write_text('{"token": "abc"', encoding="utf-8")
+    assert PDNDClient().load_token(str(file)) == [None, None]
+
+# Più manager (uno per processo) che condividono lo stesso file: solo il primo richiede il token,
+# gli altri attendono il lock e rileggono il token dal file.
+def test_token_managers_share_refresh_through_file(tmp_path):
+    file = str(tmp_path / "token.json")
+    calls = []
+
+    class Generator:
+        def request_token(self):
+            calls.append(1)
+            time.sleep(0.05)
+            return f"token-{len(calls)}", int(time.time()) + 600
+
+    managers = [TokenManager(Generator(), token_file=file) for _ in range(5)]
+    tokens = []
+    threads = [threading.Thread(target=lambda m=m: tokens.append(m.get_token())) for m in managers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(calls) == 1
+    assert set(tokens) == {"token-1"}
+    with open(file, encoding="utf-8") as f:
+        assert json.load(f)["token"] == "token-1"
+
+def test_token_file_lock_is_exclusive(tmp_path):
+    file = str(tmp_path / "token.json")
+    events = []
+
+    def worker(name):
+        with token_file_lock(file):
+            events.append(("in", name))
+            time.sleep(0.02)
+            events.append(("out", name))
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    for i in range(0, len(events), 2):
+        assert events[i][0] == "in" and events[i + 1] == ("out", events[i][1])
@@ -0,0 +1,64 @@
+import threading
+import time
+from unittest.mock import patch, Mock
+from pdnd_client.client import PDNDClient
+from pdnd_client.token_manager import TokenManager
+
+# Generatore di token finto: conta le richieste e rilascia token con durata configurabile.
+class FakeGenerator:
+    def __init__(self, lifetime=600, delay=0.0):
+        self.lifetime = lifetime
+        self.delay = delay
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def request_token(self):
+        time.sleep(self.delay)
+        with self.lock:
+            self.calls += 1
+            return f"token-{self.calls}", int(time.time()) + self.lifetime
+
+def test_concurrent_refreshes_are_collapsed():
+    generator = FakeGenerator(delay=0.05)
+    manager = TokenManager(generator)
+    tokens = []
+    threads = [threading.Thread(target=lambda: tokens.append(manager.get_token())) for _ in range(10)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert generator.calls == 1
+    assert set(tokens) == {"token-1"}
+
+# Nella finestra di rinnovo il chiamante riceve subito il token corrente
+# mentre il refresh avviene in background.
+def test_refresh_ahead_of_expiry_in_background():
+    generator = FakeGenerator(delay=0.05)
+    manager = TokenManager(generator, refresh_skew=60)
+    manager.set_token("old-token", int(time.time()) + 30)
+    assert manager.get_token() == "old-token"
+    deadline = time.time() + 2
+    while manager.token == "old-token" and time.time() < deadline:
+        time.sleep(0.01)
+    assert manager.get_token() == "token-1"
+    assert generator.calls == 1
+
+def test_get_api_retries_once_on_401():
+    generator = FakeGenerator()
+    manager = TokenManager(generator)
+    manager.set_token("revoked-token", int(time.time()) + 600)
+    client = PDNDClient()
+    client.set_token_manager(manager)
+    client.set_api_url("https://example.com/api")
+
+    def fake_get(url, headers=None, verify=True):
+        response = Mock()
+        response.ok = headers["Authorization"] != "Bearer revoked-token"
+        response.status_code = 200 if response.ok else 401
+        response.text = "OK" if response.ok else "Unauthorized"
+        return response
+
+    with patch("pdnd_client.transport.Transport.get", side_effect=fake_get) as mock_get:
+        assert client.get_api() == (200, "OK")
+    assert mock_get.call_count == 2
+    assert generator.calls == 1
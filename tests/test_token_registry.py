@@ -0,0 +1,49 @@
+import time
+from unittest.mock import patch, Mock
+from pdnd_client.client import PDNDClient
+from pdnd_client.jwt_generator import JWTGenerator
+from pdnd_client.token_registry import TokenRegistry
+
+# Generatore di base: i cloni per purposeId rilasciano token che includono env e purposeId.
+class FakeGenerator(JWTGenerator):
+    requests = []
+
+    def request_token(self):
+        FakeGenerator.requests.append((self.env, self.purposeId))
+        return f"{self.env}-{self.purposeId}", int(time.time()) + 600
+
+def make_registry(max_size=10):
+    FakeGenerator.requests = []
+    return TokenRegistry(FakeGenerator({"clientId": "client", "purposeId": "default"}), max_size=max_size)
+
+def test_registry_keys_tokens_by_env_and_purpose():
+    registry = make_registry()
+    assert registry.get_token("p1") == "produzione-p1"
+    assert registry.get_token("p1") == "produzione-p1"
+    assert registry.get_token("p1", env="collaudo") == "collaudo-p1"
+    assert registry.get_token() == "produzione-default"
+    assert FakeGenerator.requests == [("produzione", "p1"), ("collaudo", "p1"), ("produzione", "default")]
+    stats = registry.stats()
+    assert (stats["hits"], stats["misses"], stats["refreshes"]) == (1, 3, 3)
+
+def test_registry_evicts_expired_then_lru():
+    registry = make_registry(max_size=2)
+    registry.get_token("p1")
+    registry.get_token("p2")
+    registry.get_manager("p2").token_exp = time.time() - 1  # p2 scaduto
+    registry.get_token("p3")
+    assert len(registry) == 2
+    registry.get_token("p1")
+    registry.get_token("p4")  # rimuove p3, il meno usato di recente
+    assert registry.stats()["evictions"] == 2
+    assert [key[2] for key in registry._entries] == ["p1", "p4"]
+
+def test_get_api_uses_token_of_requested_purpose():
+    registry = make_registry()
+    client = PDNDClient()
+    client.set_token_registry(registry)
+    client.set_api_url("https://example.com/api")
+    response = Mock(ok=True, status_code=200, text="OK")
+    with patch("pdnd_client.transport.Transport.get", return_value=response) as mock_get:
+        client.get_api(purpose_id="p7")
+    assert mock_get.call_args.kwargs["headers"]["Authorization"] == "Bearer produzione-p7"
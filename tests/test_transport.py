@@ -0,0 +1,43 @@
+import pytest
+from unittest.mock import patch, Mock
+from pdnd_client.transport import Transport, get_default_transport
+from pdnd_client.client import PDNDClient
+from pdnd_client.jwt_generator import JWTGenerator
+
+# Test del transport HTTP condiviso: timeout, pool per host e ciclo di vita della sessione.
+def test_request_applies_default_timeouts():
+    transport = Transport(connect_timeout=2, read_timeout=7)
+    with patch.object(transport.session, "request", return_value=Mock()) as mock_request:
+        transport.get("https://example.com/api")
+        mock_request.assert_called_once_with("GET", "https://example.com/api", timeout=(2, 7))
+    transport.close()
+
+def test_set_host_pool_mounts_dedicated_adapter():
+    transport = Transport(pool_maxsize=4)
+    transport.set_host_pool("auth.interop.pagopa.it", 32)
+    adapter = transport.session.get_adapter("https://auth.interop.pagopa.it/token.oauth2")
+    assert adapter._pool_maxsize == 32
+    assert transport.session.get_adapter("https://example.com/")._pool_maxsize == 4
+    transport.close()
+
+def test_context_manager_closes_transport():
+    with Transport() as transport:
+        pass
+    assert transport.closed
+    with pytest.raises(RuntimeError):
+        transport.get("https://example.com/api")
+
+# Più client che condividono lo stesso transport usano la stessa sessione.
+def test_transport_shared_between_clients():
+    transport = Transport()
+    first, second = PDNDClient(), PDNDClient()
+    first.set_transport(transport)
+    second.set_transport(transport)
+    jwt_gen = JWTGenerator({})
+    jwt_gen.set_transport(transport)
+    assert first.get_transport() is second.get_transport() is jwt_gen.get_transport()
+    transport.close()
+
+def test_default_transport_is_shared():
+    assert PDNDClient().get_transport() is get_default_transport()
+    assert JWTGenerator({}).get_transport() is get_default_transport()
@@ -0,0 +1,85 @@
+import hashlib
+import io
+import json
+import pytest
+import time
+from unittest.mock import patch, Mock
+from benchmarks.server import StandInServer
+from pdnd_client.client import PDNDClient
+from pdnd_client.retry import RetryPolicy
+from pdnd_client.token_manager import TokenManager
+from pdnd_client.upload import RequestBody
+
+@pytest.fixture
+def server():
+    with StandInServer() as server:
+        yield server
+
+def test_request_body_types():
+    assert RequestBody({"a": 1}).headers == {"Content-Type": "application/json"}
+    assert RequestBody("testo").data == b"testo"
+    assert RequestBody(io.BytesIO(b"dati")).replayable
+    generated = RequestBody(chunk for chunk in ["a", b"b"])
+    assert not generated.replayable and list(generated.data) == [b"a", b"b"]
+    with pytest.raises(ValueError):
+        RequestBody(42)
+
+@pytest.mark.parametrize("method", ["POST", "PUT", "PATCH"])
+def test_send_api_bodies(server, method, make_client):
+    client = make_client(server.url + "/api")
+    payload = b"x" * 300_000
+
+    status, text = client.send_api(method, {"id": 1})
+    upload = json.loads(text)
+    assert (status, upload["method"], upload["content_type"]) == (200, method, "application/json")
+
+    upload = json.loads(client.send_api(method, io.BytesIO(payload))[1])
+    assert (upload["received"], upload["chunked"]) == (len(payload), False)
+
+    chunks = (payload[i:i + 65536] for i in range(0, len(payload), 65536))
+    upload = json.loads(client.send_api(method, chunks, content_type="application/octet-stream")[1])
+    assert upload["chunked"] is True
+    assert upload["sha256"] == hashlib.sha256(payload).hexdigest()
+
+def test_replayable_body_is_retried_from_the_start(make_client, make_response):
+    sent = []
+
+    def fake_request(method, url, **kwargs):
+        sent.append(kwargs["data"].read())
+        return make_response(503) if len(sent) == 1 else make_response(200)
+
+    client = make_client()
+    client.set_retry_policy(RetryPolicy(backoff_base=0, jitter=False))
+    with patch("pdnd_client.transport.Transport.request", side_effect=fake_request):
+        assert client.post_api(io.BytesIO(b"dati")) == (200, "OK")
+    assert sent == [b"dati", b"dati"]
+
+# Dopo il rinnovo del token su 401 il file viene reinviato dall'inizio, anche senza politica di retry.
+def test_file_body_is_rewound_after_401_refresh(make_response):
+    generator = Mock(request_token=Mock(return_value=("fresh-token", int(time.time()) + 600)))
+    manager = TokenManager(generator)
+    manager.set_token("revoked-token", int(time.time()) + 600)
+    client = PDNDClient()
+    client.set_api_url("https://example.com/api")
+    client.set_token_manager(manager)
+    sent = []
+
+    def fake_request(method, url, headers=None, **kwargs):
+        sent.append(kwargs["data"].read())
+        return make_response(401) if headers["Authorization"] == "Bearer revoked-token" else make_response(200)
+
+    with patch("pdnd_client.transport.Transport.request", side_effect=fake_request):
+        assert client.post_api(io.BytesIO(b"payload")) == (200, "OK")
+    assert sent == [b"payload", b"payload"]
+
+def test_generator_body_is_not_retried(make_client, make_response):
+    client = make_client()
+    client.set_retry_policy(RetryPolicy(backoff_base=0, jitter=False))
+    with patch("pdnd_client.transport.Transport.request", return_value=make_response(503, "down")) as mock_request:
+        with pytest.raises(Exception):
+            client.put_api(iter([b"a", b"b"]))
+    assert mock_request.call_count == 1
+
+def test_unsupported_method(make_client):
+    with pytest.raises(ValueError):
+        make_client().send_api("DELETE")